@@ -1,25 +1,48 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import AsyncIterator
 from zoneinfo import ZoneInfo
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from transit_app.presenters.journey_presenter import JourneyPresenter
 
-from transit_app.config.settings import Settings
+from transit_app.container import AppContainer, build_container
 from transit_app.http.api_models import (
+    BatchEstimateItem,
+    BatchEstimateRequest,
+    BatchEstimateResponse,
+    CacheStatsResponse,
+    DepartureBoardResponse,
+    DepartureResponse,
     EstimateRequest,
     JourneyEstimateResponse,
     EtaResponse,
     ReliabilityResponse,
 )
-from transit_app.http.requests_client import RequestsHttpClient
-from transit_app.providers.mbta.client import MbtaV3Client
-from transit_app.services.eta import EtaEstimator
-from transit_app.services.reliability import ReliabilityScorer
-from transit_app.use_cases.journey import JourneyEstimator
+from transit_app.http.circuit_breaker import CircuitOpenError
+from transit_app.http.rate_limit import RateLimitExceeded
+from transit_app.services.eta import EtaEstimate
+from transit_app.use_cases.departures import DepartureBoard
+from transit_app.use_cases.journey import JourneyEstimate, JourneyEstimator, JourneyQuery
 
-app = FastAPI(title="Transit Reliability API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Build the object graph once per worker; torn down on shutdown
+    container = build_container()
+    if container.settings.warm_on_startup:
+        container.warm_up()
+    container.start()
+    app.state.container = container
+    try:
+        yield
+    finally:
+        container.close()
+
+
+app = FastAPI(title="Transit Reliability API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,46 +55,137 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/estimate", response_model=JourneyEstimateResponse)
-def estimate(req: EstimateRequest) -> JourneyEstimateResponse:
-    now = datetime.now(tz=ZoneInfo("America/New_York"))
 
-    settings = Settings.from_env()
-    http = RequestsHttpClient()
-    mbta = MbtaV3Client(http=http, settings=settings)
+def get_container(request: Request) -> AppContainer:
+    return request.app.state.container
 
-    journey = JourneyEstimator(
-        mbta_client=mbta,
-        eta_estimator=EtaEstimator(),
-        reliability_scorer=ReliabilityScorer(),
-    )
+
+def get_journey(container: AppContainer = Depends(get_container)) -> JourneyEstimator:
+    return container.journey
+
+
+def get_departures(container: AppContainer = Depends(get_container)) -> DepartureBoard:
+    return container.departures
+
+
+@app.post("/estimate", response_model=JourneyEstimateResponse)
+async def estimate(
+    req: EstimateRequest,
+    journey: JourneyEstimator = Depends(get_journey),
+    container: AppContainer = Depends(get_container),
+) -> JourneyEstimateResponse:
+    now = datetime.now(tz=ZoneInfo("America/New_York"))
 
     try:
-        result = journey.estimate(
+        result = await journey.estimate_async(
             origin_stop_id=req.origin_stop_id,
             destination_stop_id=req.destination_stop_id,
             route_id=req.route_id,
             now=now,
+            deadline_s=container.settings.timeout_s,
         )
         summary = JourneyPresenter.to_summary(result)
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return _to_response(result, summary)
+
+
+@app.post("/estimate/batch", response_model=BatchEstimateResponse)
+async def estimate_batch(
+    req: BatchEstimateRequest,
+    journey: JourneyEstimator = Depends(get_journey),
+    container: AppContainer = Depends(get_container),
+) -> BatchEstimateResponse:
+    now = datetime.now(tz=ZoneInfo("America/New_York"))
+    queries = [
+        JourneyQuery(
+            origin_stop_id=item.origin_stop_id,
+            destination_stop_id=item.destination_stop_id,
+            route_id=item.route_id,
+        )
+        for item in req.items
+    ]
+    outcomes = await journey.estimate_many_async(queries, now=now, deadline_s=container.settings.timeout_s)
+
+    results: list[BatchEstimateItem] = []
+    for outcome in outcomes:
+        if outcome.estimate is None:
+            results.append(BatchEstimateItem(error=outcome.error))
+            continue
+        summary = JourneyPresenter.to_summary(outcome.estimate)
+        results.append(BatchEstimateItem(estimate=_to_response(outcome.estimate, summary)))
+    return BatchEstimateResponse(results=results)
+
+
+@app.get("/stops/{stop_id}/departures", response_model=DepartureBoardResponse)
+async def departures(
+    stop_id: str,
+    limit: int = Query(default=20, ge=1, le=100),
+    board: DepartureBoard = Depends(get_departures),
+    container: AppContainer = Depends(get_container),
+) -> DepartureBoardResponse:
+    now = datetime.now(tz=ZoneInfo("America/New_York"))
+
+    try:
+        result = await board.board_async(stop_id=stop_id, now=now, limit=limit, deadline_s=container.settings.timeout_s)
+    except (RateLimitExceeded, CircuitOpenError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    return DepartureBoardResponse(
+        stop_id=result.stop_id,
+        generated_at=result.generated_at,
+        departures=[
+            DepartureResponse(
+                route_id=d.route_id,
+                trip_id=d.trip_id,
+                direction_id=d.direction_id,
+                eta=_eta_response(d.eta),
+                reliability=ReliabilityResponse(score=d.reliability.score, reasons=d.reliability.reasons),
+            )
+            for d in result.departures
+        ],
+    )
+
+
+def _eta_response(eta: EtaEstimate) -> EtaResponse:
+    return EtaResponse(
+        depart_time=eta.depart_time,
+        p50_arrival=eta.p50_arrival,
+        p80_arrival=eta.p80_arrival,
+        p90_arrival=eta.p90_arrival,
+        headway_seconds=eta.headway_seconds,
+        explanation=eta.explanation,
+    )
+
+
+def _to_response(result: JourneyEstimate, summary: str) -> JourneyEstimateResponse:
     return JourneyEstimateResponse(
         route_id=result.route_id,
         trip_id=result.trip_id,
         generated_at=result.generated_at,
-        eta=EtaResponse(
-            depart_time=result.eta.depart_time,
-            p50_arrival=result.eta.p50_arrival,
-            p80_arrival=result.eta.p80_arrival,
-            p90_arrival=result.eta.p90_arrival,
-            headway_seconds=result.eta.headway_seconds,
-            explanation=result.eta.explanation,
-        ),
+        eta=_eta_response(result.eta),
         reliability=ReliabilityResponse(
             score=result.reliability.score,
             reasons=result.reliability.reasons,
         ),
         summary=summary,
     )
+
+
+@app.get("/stats/cache", response_model=CacheStatsResponse)
+def cache_stats(container: AppContainer = Depends(get_container)) -> CacheStatsResponse:
+    if container.prediction_cache is None:
+        return CacheStatsResponse(enabled=False)
+    stats = container.prediction_cache.stats()
+    return CacheStatsResponse(
+        enabled=True,
+        hits=stats.hits,
+        misses=stats.misses,
+        coalesced=stats.coalesced,
+        size=stats.size,
+    )
@@ -3,26 +3,14 @@ from __future__ import annotations
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from transit_app.config.settings import Settings
-from transit_app.http.requests_client import RequestsHttpClient
-from transit_app.providers.mbta.client import MbtaV3Client
-from transit_app.services.eta import EtaEstimator
-from transit_app.services.reliability import ReliabilityScorer
-from transit_app.use_cases.journey import JourneyEstimator
+from transit_app.container import build_container
 
 
 def main() -> None:
     now = datetime.now(tz=ZoneInfo("America/New_York"))
 
-    settings = Settings.from_env()
-    http = RequestsHttpClient()
-    mbta = MbtaV3Client(http=http, settings=settings)
-
-    journey = JourneyEstimator(
-        mbta_client=mbta,
-        eta_estimator=EtaEstimator(),
-        reliability_scorer=ReliabilityScorer(),
-    )
+    container = build_container()
+    journey = container.journey
 
     # Start with a known simple case: Red Line, Davis -> Harvard (closer stop tends to match more often)
     origin_stop_id = "place-davis"
@@ -39,6 +27,8 @@ def main() -> None:
         )
     except RuntimeError as e:
         print("Journey estimation failed:", e)
+    finally:
+        container.close()
 
     if result is None:
         return
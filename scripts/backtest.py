@@ -0,0 +1,86 @@
+"""
+Replay archived predictions through the journey estimator and report how
+often actual arrivals fell inside the P80/P90 bands.
+
+Needs an archive recorded with ARCHIVE_DIR. Journeys are ROUTE:ORIGIN:DESTINATION
+using the stop ids MBTA reported (platform ids), or parent stations
+(e.g. place-davis) with --reference-dir.
+
+Run:
+  python scripts/backtest.py data/archive --start 2026-01-01 --end 2026-02-01 \
+      --journey Red:70061:70075 --journey Orange:70001:70036 --workers 8
+Compare heuristics against a calibration table with --calibration data/reference/calibration.json.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime
+from pathlib import Path
+
+from transit_app.archive.backtest import plan_units, run_backtest
+from transit_app.repositories.reference import ReferenceRepository
+from transit_app.services.calibration import SERVICE_TZ
+from transit_app.storage.local import LocalBlobStorage
+from transit_app.use_cases.journey import JourneyQuery
+
+
+def parse_journey(value: str) -> JourneyQuery:
+    try:
+        route_id, origin, destination = value.split(":")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected ROUTE:ORIGIN:DESTINATION, got {value!r}") from None
+    return JourneyQuery(origin_stop_id=origin, destination_stop_id=destination, route_id=route_id)
+
+
+def parse_day(value: str) -> datetime:
+    # Dates are service-time days
+    return datetime.fromisoformat(value).replace(tzinfo=SERVICE_TZ)
+
+
+def _pct(value: float | None) -> str:
+    return f"{100 * value:5.1f}%" if value is not None else "    -"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("archive", type=Path)
+    parser.add_argument("--start", type=parse_day, required=True)
+    parser.add_argument("--end", type=parse_day, required=True)
+    parser.add_argument("--journey", type=parse_journey, action="append", required=True)
+    parser.add_argument("--step-s", type=int, default=60, help="simulated seconds between requests")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--no-route-split", action="store_true", help="one unit per day instead of per day and route")
+    parser.add_argument("--calibration", type=Path, default=None)
+    parser.add_argument("--reference-dir", type=Path, default=None, help="stops_min.json with parent stations")
+    args = parser.parse_args()
+
+    units = plan_units(
+        archive_root=args.archive,
+        start=args.start,
+        end=args.end,
+        queries=args.journey,
+        by_route=not args.no_route_split,
+        step_s=args.step_s,
+        calibration_file=args.calibration,
+        parents=ReferenceRepository(LocalBlobStorage(args.reference_dir)).parent_stations() if args.reference_dir else None,
+    )
+    started = time.perf_counter()
+    results = run_backtest(units, max_workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(units)} units in {elapsed:.1f}s")
+    print(f"{'journey':40} {'estimates':>9} {'failed':>7} {'scored':>7} {'<=P80':>7} {'<=P90':>7} {'P50 MAE':>8}")
+    for q in args.journey:
+        c = results[q]
+        mae = f"{c.p50_mean_abs_error_s:7.0f}s" if c.p50_mean_abs_error_s is not None else "       -"
+        name = f"{q.route_id}:{q.origin_stop_id}:{q.destination_stop_id}"
+        print(
+            f"{name:40} {c.estimates:9d} {c.failed:7d} {c.scored:7d} "
+            f"{_pct(c.p80_coverage):>7} {_pct(c.p90_coverage):>7} {mae}"
+        )
+
+
+if __name__ == "__main__":
+    main()
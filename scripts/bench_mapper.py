@@ -0,0 +1,78 @@
+"""
+Compare row (Prediction objects) vs columnar (PredictionBatch) mapping of a
+decoded predictions payload, including the filter/sort/trip-join a journey
+estimate needs.
+
+Run:
+  python scripts/bench_mapper.py --records 500 --rounds 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Callable
+
+from transit_app.providers.mbta.columnar import prediction_batch_from_mbta
+from transit_app.providers.mbta.mapper import predictions_from_mbta
+
+
+def _record(i: int) -> dict[str, Any]:
+    minute = i % 60
+    return {
+        "type": "prediction",
+        "id": f"prediction-{i}",
+        "attributes": {
+            "arrival_time": f"2026-01-20T12:{minute:02d}:00-05:00",
+            "departure_time": f"2026-01-20T12:{minute:02d}:30-05:00",
+            "direction_id": i % 2,
+        },
+        "relationships": {
+            "route": {"data": {"id": "Red", "type": "route"}},
+            "stop": {"data": {"id": ("70064", "70066")[i % 2], "type": "stop"}},
+            "trip": {"data": {"id": f"trip-{i // 2}", "type": "trip"}},
+        },
+    }
+
+
+def rows(payload: dict[str, Any]) -> None:
+    preds = predictions_from_mbta(payload)
+    origin = sorted((p for p in preds if p.stop_id == "70064" and p.departure_time), key=lambda p: p.departure_time)
+    dest: dict[str, Any] = {}
+    for p in preds:
+        if p.stop_id == "70066" and p.trip_id:
+            t = p.arrival_time or p.departure_time
+            if t is not None and (p.trip_id not in dest or t < dest[p.trip_id]):
+                dest[p.trip_id] = t
+    next((p for p in origin if p.trip_id in dest), None)
+
+
+def columns(payload: dict[str, Any]) -> None:
+    batch = prediction_batch_from_mbta(payload)
+    origin = batch.filter(stop_ids=["70064"], require="departure").sort_by("departure")
+    dest = batch.filter(stop_ids=["70066"]).earliest_by_trip()
+    next((code for code in origin.trip if origin.string(code) in dest), None)
+
+
+def _bench(label: str, fn: Callable[[dict[str, Any]], None], payload: dict[str, Any], rounds: int) -> None:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(payload)
+    per_call_ms = (time.perf_counter() - start) / rounds * 1000
+    print(f"{label:>8}: map+match {per_call_ms:7.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    payload = {"data": [_record(i) for i in range(args.records)]}
+    print(f"synthetic payload, {args.records} predictions, {args.rounds} rounds")
+    _bench("rows", rows, payload, args.rounds)
+    _bench("columns", columns, payload, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
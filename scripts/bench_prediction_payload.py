@@ -0,0 +1,129 @@
+"""
+Compare payload size and decode+map time for full vs sparse-fieldset
+prediction responses, and for the stdlib decoder vs the bytes-level path
+(`predictions_from_bytes` with each installed JSON backend).
+
+Run:
+  python scripts/bench_prediction_payload.py                       # synthetic payloads
+  python scripts/bench_prediction_payload.py --live place-davis Red # live MBTA (network)
+  python scripts/bench_prediction_payload.py --payload recorded.json # a recorded response body
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import requests
+
+from transit_app.providers.mbta.client import PREDICTION_FIELDS, STOP_FIELDS
+from transit_app.http.json_backend import JsonBackend, json_backend
+from transit_app.providers.mbta.mapper import predictions_from_bytes, predictions_from_mbta
+
+
+def _full_record(i: int) -> dict[str, Any]:
+    return {
+        "type": "prediction",
+        "id": f"prediction-ADDED-{1581000000 + i}-70064-{i}",
+        "attributes": {
+            "arrival_time": "2026-01-20T12:05:00-05:00",
+            "arrival_uncertainty": 60,
+            "departure_time": "2026-01-20T12:06:00-05:00",
+            "departure_uncertainty": 60,
+            "direction_id": 0,
+            "last_trip": False,
+            "revenue": "REVENUE",
+            "schedule_relationship": None,
+            "status": None,
+            "stop_sequence": 10 + i,
+            "update_type": "MID_TRIP",
+        },
+        "relationships": {
+            "route": {"data": {"id": "Red", "type": "route"}},
+            "stop": {"data": {"id": "70064", "type": "stop"}},
+            "trip": {"data": {"id": f"trip-{i}", "type": "trip"}},
+            "vehicle": {"data": {"id": f"R-{5000 + i}", "type": "vehicle"}},
+            "alerts": {"data": []},
+            "schedule": {"data": None},
+        },
+    }
+
+
+def _trimmed_record(i: int) -> dict[str, Any]:
+    full = _full_record(i)
+    keep = set(PREDICTION_FIELDS.split(","))
+    full["attributes"] = {k: v for k, v in full["attributes"].items() if k in keep}
+    return full
+
+
+def _backends() -> list[JsonBackend]:
+    out: list[JsonBackend] = []
+    for name in ("orjson", "msgspec"):
+        try:
+            out.append(json_backend(name))
+        except RuntimeError:
+            continue
+    return out
+
+
+def _time_ms(fn: Callable[[], Any], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def _bench(label: str, body: bytes, rounds: int) -> None:
+    # Baseline: what requests' resp.json() + predictions_from_mbta did
+    baseline = _time_ms(lambda: predictions_from_mbta(json.loads(body)), rounds)
+    print(f"{label:>8}: {len(body):>9,} bytes  decode+map {baseline:7.3f} ms (json)")
+    for backend in _backends():
+        ms = _time_ms(lambda: predictions_from_bytes(body, json=backend), rounds)
+        print(f"{'':>8}  {'':>9}        decode+map {ms:7.3f} ms ({backend.name}, {baseline / ms:.1f}x)")
+
+
+def synthetic(records: int, rounds: int) -> None:
+    full = json.dumps({"data": [_full_record(i) for i in range(records)]}).encode()
+    trimmed = json.dumps({"data": [_trimmed_record(i) for i in range(records)]}).encode()
+    print(f"synthetic payload, {records} predictions, {rounds} rounds")
+    _bench("full", full, rounds)
+    _bench("trimmed", trimmed, rounds)
+
+
+def live(stop_id: str, route_id: str, base_url: str, rounds: int) -> None:
+    url = base_url.rstrip("/") + "/predictions"
+    base = {"filter[stop]": stop_id, "filter[route]": route_id, "sort": "departure_time"}
+    variants = {
+        "full": {**base, "include": "stop"},
+        "trimmed": {**base, "include": "stop", "fields[prediction]": PREDICTION_FIELDS, "fields[stop]": STOP_FIELDS},
+    }
+    print(f"live MBTA payload for stop={stop_id} route={route_id}, {rounds} rounds")
+    for label, params in variants.items():
+        resp = requests.get(url, params=params, timeout=10)
+        resp.raise_for_status()
+        _bench(label, resp.content, rounds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--live", nargs=2, metavar=("STOP_ID", "ROUTE_ID"))
+    parser.add_argument("--payload", type=Path, help="recorded predictions response body (JSON file)")
+    parser.add_argument("--base-url", default="https://api-v3.mbta.com")
+    parser.add_argument("--records", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.payload:
+        print(f"recorded payload {args.payload}, {args.rounds} rounds")
+        _bench("recorded", args.payload.read_bytes(), args.rounds)
+    elif args.live:
+        live(args.live[0], args.live[1], args.base_url, args.rounds)
+    else:
+        synthetic(args.records, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Build the ETA calibration table from recorded trips.
+
+Input: JSON lines, one trip per line:
+  {"route_id": "Red", "origin_stop_id": "place-davis", "destination_stop_id": "place-pktrm",
+   "departure_time": "...", "predicted_arrival": "...", "actual_arrival": "...", "headway_seconds": 420}
+
+Run:
+  python scripts/build_calibration.py trips.jsonl --out data/reference/calibration.json
+Then point the API at it with CALIBRATION_FILE=calibration.json.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+from transit_app.services.calibration import CalibrationObservation, build_calibration
+
+
+def read_observations(path: Path) -> Iterator[CalibrationObservation]:
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            yield CalibrationObservation(
+                route_id=row["route_id"],
+                origin_stop_id=row["origin_stop_id"],
+                destination_stop_id=row["destination_stop_id"],
+                departure_time=datetime.fromisoformat(row["departure_time"]),
+                predicted_arrival=datetime.fromisoformat(row["predicted_arrival"]),
+                actual_arrival=datetime.fromisoformat(row["actual_arrival"]),
+                headway_seconds=row.get("headway_seconds"),
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trips", type=Path)
+    parser.add_argument("--out", type=Path, default=Path("data/reference/calibration.json"))
+    parser.add_argument("--min-samples", type=int, default=20)
+    args = parser.parse_args()
+
+    table = build_calibration(read_observations(args.trips), min_samples=args.min_samples)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_bytes(table.to_json())
+    print(f"Wrote {len(table)} calibration entries -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -123,6 +123,8 @@ def write_minified_json(stops: list[StopRow], routes: list[RouteRow]) -> None:
     # Keep it small: only what UI needs
     stops_min = [
         {"stop_id": s.stop_id, "stop_name": s.stop_name}
+        # Platforms carry their parent so real-time feeds (platform ids) can be mapped to stations
+        | ({"parent_station": s.parent_station} if s.parent_station else {})
         for s in stops
         # Keep parent stations (location_type=1) and regular stops if parent missing
         if (s.location_type in (None, 0, 1))
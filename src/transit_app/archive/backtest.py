@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterable
+
+from transit_app.archive.replay import ReplayMbtaClient
+from transit_app.archive.segments import ArchiveReader
+from transit_app.services.calibration import SERVICE_TZ, CalibrationTable
+from transit_app.services.eta import EtaEstimator
+from transit_app.services.reliability import ReliabilityScorer
+from transit_app.use_cases.journey import JourneyEstimator, JourneyQuery
+
+
+@dataclass(frozen=True)
+class BandCoverage:
+    """
+    How estimates for one journey held up against what actually happened.
+
+    A well-calibrated estimator has the actual arrival at or before P80
+    about 80% of the time and at or before P90 about 90% of the time.
+    """
+
+    estimates: int = 0
+    failed: int = 0  # no estimate (no departures / no trip match at that moment)
+    scored: int = 0  # estimates whose trip has a known actual arrival
+    within_p80: int = 0
+    within_p90: int = 0
+    p50_abs_error_s: int = 0  # summed over scored estimates
+
+    def __add__(self, other: "BandCoverage") -> "BandCoverage":
+        return BandCoverage(
+            estimates=self.estimates + other.estimates,
+            failed=self.failed + other.failed,
+            scored=self.scored + other.scored,
+            within_p80=self.within_p80 + other.within_p80,
+            within_p90=self.within_p90 + other.within_p90,
+            p50_abs_error_s=self.p50_abs_error_s + other.p50_abs_error_s,
+        )
+
+    @property
+    def p80_coverage(self) -> float | None:
+        return self.within_p80 / self.scored if self.scored else None
+
+    @property
+    def p90_coverage(self) -> float | None:
+        return self.within_p90 / self.scored if self.scored else None
+
+    @property
+    def p50_mean_abs_error_s(self) -> float | None:
+        return self.p50_abs_error_s / self.scored if self.scored else None
+
+
+@dataclass(frozen=True)
+class BacktestUnit:
+    """
+    One independent slice of a backtest: some journeys over one service day.
+
+    Picklable on purpose, so units can be shipped to worker processes; each
+    worker opens the archive and builds its own estimators.
+    """
+
+    archive_root: str
+    start: datetime
+    end: datetime
+    queries: tuple[JourneyQuery, ...]
+    step_s: int = 60
+    calibration_file: str | None = None
+    max_age_s: int = 300
+    # How long past `end` to keep reading, so trips departing late still get an actual arrival
+    lookahead_s: int = 2 * 3600
+    # (platform, parent station) pairs, so journeys can be asked by parent station
+    parents: tuple[tuple[str, str], ...] = ()
+
+
+def plan_units(
+    *,
+    archive_root: Path,
+    start: datetime,
+    end: datetime,
+    queries: Iterable[JourneyQuery],
+    by_route: bool = True,
+    step_s: int = 60,
+    calibration_file: Path | None = None,
+    parents: dict[str, str] | None = None,
+) -> list[BacktestUnit]:
+    """
+    Split [start, end) into one unit per service day (midnight to midnight
+    service time), and per route unless `by_route` is False. Days and
+    routes share nothing, so units replay in parallel without coordination.
+    """
+    if start.tzinfo is None or end.tzinfo is None:
+        raise ValueError("start and end must be timezone-aware")
+    queries = tuple(queries)
+    parent_pairs = tuple(sorted((parents or {}).items()))
+    groups: list[tuple[JourneyQuery, ...]]
+    if by_route:
+        by_route_id: dict[str, list[JourneyQuery]] = {}
+        for q in queries:
+            by_route_id.setdefault(q.route_id, []).append(q)
+        groups = [tuple(qs) for qs in by_route_id.values()]
+    else:
+        groups = [queries]
+
+    units: list[BacktestUnit] = []
+    day = start.astimezone(SERVICE_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end:
+        # Wall-clock arithmetic in SERVICE_TZ: the next local midnight, across DST changes too
+        next_day = day + timedelta(days=1)
+        unit_start, unit_end = max(day, start), min(next_day, end)
+        if unit_start < unit_end:
+            units.extend(
+                BacktestUnit(
+                    archive_root=str(archive_root),
+                    start=unit_start,
+                    end=unit_end,
+                    queries=group,
+                    step_s=step_s,
+                    calibration_file=str(calibration_file) if calibration_file else None,
+                    parents=parent_pairs,
+                )
+                for group in groups
+            )
+        day = next_day
+    return units
+
+
+def run_unit(unit: BacktestUnit) -> dict[JourneyQuery, BandCoverage]:
+    """
+    Replay one unit: step an injected clock through the day, ask
+    JourneyEstimator for every journey at each step, and score each
+    estimate against the trip's actual arrival at the destination.
+    """
+    client = ReplayMbtaClient(
+        ArchiveReader(Path(unit.archive_root)),
+        start=unit.start - timedelta(seconds=unit.max_age_s),
+        end=unit.end + timedelta(seconds=unit.lookahead_s),
+        route_ids={q.route_id for q in unit.queries},
+        max_age_s=unit.max_age_s,
+        parents=dict(unit.parents),
+    )
+    calibration = (
+        CalibrationTable.from_json(Path(unit.calibration_file).read_bytes()) if unit.calibration_file else None
+    )
+    estimator = JourneyEstimator(
+        mbta_client=client,  # type: ignore[arg-type]  # duck-typed MbtaV3Client
+        eta_estimator=EtaEstimator(calibration),
+        reliability_scorer=ReliabilityScorer(),
+    )
+    actuals = client.actual_arrivals()
+
+    counts = {q: [0, 0, 0, 0, 0, 0] for q in unit.queries}
+    step = timedelta(seconds=unit.step_s)
+    # Step in UTC: stepping in service time would skip or repeat an hour at DST changes
+    now = unit.start.astimezone(timezone.utc)
+    while now < unit.end:
+        client.advance_to(now)
+        for q in unit.queries:
+            c = counts[q]
+            try:
+                estimate = estimator.estimate(
+                    origin_stop_id=q.origin_stop_id,
+                    destination_stop_id=q.destination_stop_id,
+                    route_id=q.route_id,
+                    now=now,
+                )
+            except (RuntimeError, ValueError):
+                # One bad moment (no match, inconsistent predictions) must not abort the unit
+                c[1] += 1
+                continue
+            c[0] += 1
+            actual_s = actuals.get((q.destination_stop_id, estimate.trip_id))
+            if actual_s is None:
+                continue
+            eta = estimate.eta
+            c[2] += 1
+            c[3] += actual_s <= eta.p80_arrival.timestamp()
+            c[4] += actual_s <= eta.p90_arrival.timestamp()
+            c[5] += int(abs(actual_s - eta.p50_arrival.timestamp()))
+        now += step
+
+    return {q: BandCoverage(*c) for q, c in counts.items()}
+
+
+def run_backtest(units: Iterable[BacktestUnit], *, max_workers: int | None = None) -> dict[JourneyQuery, BandCoverage]:
+    """
+    Run units across a process pool (CPU-bound: parsing and estimating, no
+    I/O waits) and sum coverage per journey. `max_workers=1` runs in-process,
+    which is easier to debug and profile.
+    """
+    units = list(units)
+    if max_workers == 1:
+        return _merge(map(run_unit, units))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return _merge(pool.map(run_unit, units))
+
+
+def _merge(results: Iterable[dict[JourneyQuery, BandCoverage]]) -> dict[JourneyQuery, BandCoverage]:
+    total: dict[JourneyQuery, BandCoverage] = {}
+    for result in results:
+        for q, coverage in result.items():
+            total[q] = total.get(q, BandCoverage()) + coverage
+    return total
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from transit_app.archive.segments import SegmentWriter, Snapshot
+from transit_app.providers.mbta.columnar import prediction_batch_from_mbta
+
+
+@dataclass(frozen=True)
+class RecorderStats:
+    recorded_rows: int
+    dropped_snapshots: int
+    buffered_rows: int
+
+
+class PredictionRecorder:
+    """
+    Captures prediction payloads into the archive without slowing callers.
+
+    Why this exists:
+    - recording must never add latency to /estimate: `record_payload` only
+      appends a reference to a bounded in-memory buffer
+    - mapping to columns, compression and disk I/O happen on a background
+      thread, flushed every `flush_interval_s` or once half the buffer fills
+
+    When the buffer is full, new snapshots are dropped (and counted) rather
+    than blocking the caller or growing memory without bound. A batch that
+    fails to map or write (disk full, permissions) is counted as dropped too.
+    """
+
+    def __init__(
+        self,
+        writer: SegmentWriter,
+        *,
+        max_buffered_rows: int = 100_000,
+        flush_interval_s: float = 5.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._writer = writer
+        self._max_rows = max_buffered_rows
+        self._flush_interval_s = flush_interval_s
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        self._buffer: deque[tuple[int, dict[str, Any]]] = deque()
+        self._buffered_rows = 0
+        self._recorded_rows = 0
+        self._dropped = 0
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+    def record_payload(self, payload: dict[str, Any], captured_at: float | None = None) -> bool:
+        """
+        Queue a JSON:API predictions payload (treated as read-only).
+        Returns False if it was dropped because the buffer is full.
+        """
+        rows = len(payload.get("data") or ())
+        if not rows:
+            return True
+        at = int(self._clock() if captured_at is None else captured_at)
+        with self._cond:
+            if self._buffered_rows + rows > self._max_rows:
+                self._dropped += 1
+                return False
+            self._buffer.append((at, payload))
+            self._buffered_rows += rows
+            if self._buffered_rows * 2 >= self._max_rows:
+                self._cond.notify()
+        return True
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="prediction-recorder", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 5.0) -> None:
+        """Flush what's buffered and close the writer."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_s)
+            self._thread = None
+        else:
+            self.flush()
+        self._writer.close()
+
+    def flush(self) -> None:
+        with self._cond:
+            pending = list(self._buffer)
+            self._buffer.clear()
+            self._buffered_rows = 0
+        if not pending:
+            return
+        try:
+            snapshots = [
+                Snapshot(captured_at=at, batch=prediction_batch_from_mbta(payload))
+                for at, payload in pending
+            ]
+            self._writer.write(snapshots)
+        except Exception:
+            with self._cond:
+                self._dropped += len(pending)
+            raise
+        with self._cond:
+            self._recorded_rows += sum(len(s.batch) for s in snapshots)
+
+    def stats(self) -> RecorderStats:
+        with self._cond:
+            return RecorderStats(
+                recorded_rows=self._recorded_rows,
+                dropped_snapshots=self._dropped,
+                buffered_rows=self._buffered_rows,
+            )
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping and self._buffered_rows * 2 < self._max_rows:
+                    self._cond.wait(timeout=self._flush_interval_s)
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception:
+                # Disk trouble or a malformed payload must not kill the recorder;
+                # this batch is lost (flush counted it as dropped)
+                pass
+            if stopping:
+                return
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+from transit_app.archive.segments import ALL_COLUMNS, ArchiveReader
+from transit_app.http.rate_limit import Priority
+from transit_app.providers.mbta.columnar import MISSING, NAT
+from transit_app.providers.mbta.mapper import MbtaPayload
+
+# (stop, route, trip, direction, arrival, departure) for one archived prediction
+_Row = tuple[str, str, str, int, int, int]
+
+
+class ReplayMbtaClient:
+    """
+    Stands in for MbtaV3Client while replaying archived predictions.
+
+    Why this exists:
+    - JourneyEstimator, DepartureBoard etc. run unchanged against history:
+      they query this client exactly as they would query MBTA
+    - time is injected: `advance_to(now)` applies every snapshot captured up
+      to `now`, and queries see the latest prediction per (stop, trip) as a
+      live poll at `now` would have
+
+    Predictions not refreshed within `max_age_s` of `now`, or whose time has
+    passed, are dropped from the view (upstream stops reporting them too).
+
+    Archived stop ids are platform ids as MBTA reported them. With `parents`
+    (platform -> parent station), queries for a parent station also match its
+    platforms and the response `include`s stop resources, as upstream does.
+
+    Only the sync query methods are provided; replays run one step at a time.
+    """
+
+    def __init__(
+        self,
+        reader: ArchiveReader,
+        *,
+        start: datetime,
+        end: datetime,
+        route_ids: Iterable[str],
+        max_age_s: int = 300,
+        parents: dict[str, str] | None = None,
+    ) -> None:
+        if start.tzinfo is None or end.tzinfo is None:
+            raise ValueError("start and end must be timezone-aware")
+        self._routes = frozenset(route_ids)
+        self._max_age_s = max_age_s
+        self._parents = parents or {}
+
+        # Load the route's rows once, in capture order. Segments from several
+        # writers interleave in time, so the sort can't be skipped.
+        captured: list[tuple[int, _Row]] = []
+        for block in reader.scan(start, end, columns=ALL_COLUMNS):
+            cols = zip(
+                block["captured_at"],
+                block["stop"],
+                block["route"],
+                block["trip"],
+                block["direction"],
+                block["arrival"],
+                block["departure"],
+            )
+            for at, stop, route, trip, direction, arrival, departure in cols:
+                if route in self._routes and stop is not None and trip is not None:
+                    captured.append((at, (stop, route, trip, direction, arrival, departure)))
+        captured.sort(key=lambda r: r[0])
+        self._captured = captured
+
+        self._cursor = 0
+        self._now_s = NAT
+        # (stop, trip) -> (captured_at, row)
+        self._view: dict[tuple[str, str], tuple[int, _Row]] = {}
+
+    def advance_to(self, now: datetime) -> None:
+        """Apply every snapshot captured at or before `now`. Time only moves forward."""
+        now_s = int(now.timestamp())
+        if now_s < self._now_s:
+            raise ValueError("Replay time cannot move backwards")
+        self._now_s = now_s
+        captured, i = self._captured, self._cursor
+        while i < len(captured) and captured[i][0] <= now_s:
+            at, row = captured[i]
+            self._view[(row[0], row[2])] = (at, row)
+            i += 1
+        self._cursor = i
+
+    def actual_arrivals(self, *, tolerance_s: int = 90) -> dict[tuple[str, str], int]:
+        """
+        (stop, trip) -> arrival epoch seconds, taken as the last prediction
+        seen for that trip at that stop, provided it was captured within
+        `tolerance_s` of the time it predicted (i.e. as the vehicle pulled in).
+        Trips that vanished earlier (cancelled, archive gaps) are left out.
+        With `parents`, arrivals are also keyed by the platform's parent station.
+        """
+        last: dict[tuple[str, str], tuple[int, int]] = {}
+        for at, row in self._captured:
+            t = row[4] if row[4] != NAT else row[5]
+            if t != NAT:
+                last[(row[0], row[2])] = (at, t)
+        actuals: dict[tuple[str, str], int] = {}
+        for (stop, trip), (at, t) in last.items():
+            if at < t - tolerance_s:
+                continue
+            actuals[(stop, trip)] = t
+            parent = self._parents.get(stop)
+            if parent is not None:
+                actuals[(parent, trip)] = t
+        return actuals
+
+    def get_predictions(
+            self,
+            *,
+            stop_id: str,
+            route_id: str | None = None,
+            direction_id: int | None = None,
+            limit: int = 10,
+            sort: str = "departure_time",
+            priority: Priority = Priority.INTERACTIVE,
+    ) -> dict[str, Any]:
+        return self._query([stop_id], route_id, direction_id, limit, sort, include_stops=False)
+
+    def get_predictions_many(
+            self,
+            *,
+            stop_ids: list[str],
+            route_id: str | None = None,
+            direction_id: int | None = None,
+            limit: int = 30,
+            sort: str = "departure_time",
+            priority: Priority = Priority.INTERACTIVE,
+    ) -> dict[str, Any]:
+        return self._query(stop_ids, route_id, direction_id, limit, sort, include_stops=True)
+
+    def _query(
+        self,
+        stop_ids: list[str],
+        route_id: str | None,
+        direction_id: int | None,
+        limit: int,
+        sort: str,
+        *,
+        include_stops: bool,
+    ) -> dict[str, Any]:
+        if self._now_s == NAT:
+            raise RuntimeError("Replay has not been advanced to a point in time yet")
+        if sort not in ("departure_time", "arrival_time"):
+            raise ValueError(f"Unsupported sort for replay: {sort!r}")
+        wanted = set(stop_ids)
+        oldest = self._now_s - self._max_age_s
+
+        rows: list[_Row] = []
+        for at, row in self._view.values():
+            stop, route, _, direction, arrival, departure = row
+            if at < oldest or max(arrival, departure) < self._now_s:
+                continue
+            if stop not in wanted and self._parents.get(stop) not in wanted:
+                continue
+            if (route_id is not None and route != route_id) or (direction_id is not None and direction != direction_id):
+                continue
+            rows.append(row)
+
+        column = 5 if sort == "departure_time" else 4
+        # Upstream puts rows without the sort time last
+        rows.sort(key=lambda r: (r[column] == NAT, r[column]))
+        rows = rows[:limit]
+
+        payload = MbtaPayload(data=[_resource(row) for row in rows])
+        if include_stops:
+            payload["included"] = [
+                {
+                    "type": "stop",
+                    "id": stop,
+                    "relationships": {"parent_station": {"data": {"id": self._parents[stop]}}},
+                }
+                for stop in sorted({row[0] for row in rows if row[0] in self._parents})
+            ]
+        return payload
+
+
+def _resource(row: _Row) -> dict[str, Any]:
+    stop, route, trip, direction, arrival, departure = row
+    return {
+        "type": "prediction",
+        "attributes": {
+            "direction_id": direction if direction != MISSING else None,
+            "arrival_time": _iso(arrival),
+            "departure_time": _iso(departure),
+        },
+        "relationships": {
+            "stop": {"data": {"id": stop}},
+            "route": {"data": {"id": route}},
+            "trip": {"data": {"id": trip}},
+        },
+    }
+
+
+def _iso(epoch_s: int) -> str | None:
+    return datetime.fromtimestamp(epoch_s, tz=timezone.utc).isoformat() if epoch_s != NAT else None
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import json
+import os
+import struct
+import sys
+import time
+import uuid
+import zlib
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator, Sequence
+
+from transit_app.providers.mbta.columnar import MISSING, PredictionBatch
+
+MAGIC = b"TPAR1\n"
+SEGMENT_SUFFIX = ".tpar"
+
+# Column name -> array typecode ("strings" is the block's id dictionary, stored as JSON)
+ARRAY_COLUMNS: dict[str, str] = {
+    "captured_at": "q",
+    "stop": "q",
+    "route": "q",
+    "trip": "q",
+    "direction": "b",
+    "arrival": "q",
+    "departure": "q",
+}
+ID_COLUMNS = ("stop", "route", "trip")
+ALL_COLUMNS = tuple(ARRAY_COLUMNS)
+
+_LENGTH = struct.Struct(">I")
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Predictions as observed at one moment (`captured_at`, epoch seconds)."""
+
+    captured_at: int
+    batch: PredictionBatch
+
+
+def partition_of(epoch_s: int) -> str:
+    """UTC hour partition directory, e.g. `2026-01-20/13`."""
+    return datetime.fromtimestamp(epoch_s, tz=timezone.utc).strftime("%Y-%m-%d/%H")
+
+
+class SegmentWriter:
+    """
+    Appends compressed column blocks to time-partitioned segment files.
+
+    Why this exists:
+    - a durable record of what MBTA predicted and when (calibration, backtests,
+      debugging reliability complaints)
+    - append-only: a crash can at worst truncate the block being written,
+      which readers skip
+
+    Layout: `<root>/<YYYY-MM-DD>/<HH>/<writer-id>-<seq>.tpar` (UTC hour of
+    capture). A segment is MAGIC followed by blocks; each block is a
+    length-prefixed JSON header (row count, capture-time range, compressed
+    column sizes) and then one zlib-compressed chunk per column. Ids are
+    dictionary-encoded per block. A segment rotates once it reaches
+    `max_segment_bytes`; every writer starts fresh files, never reopening old ones.
+
+    Not thread-safe: owned by a single flushing thread (see PredictionRecorder).
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        compression_level: int = 6,
+    ) -> None:
+        self._root = root
+        self._max_segment_bytes = max_segment_bytes
+        self._level = compression_level
+        # Unique per writer, so several processes (or hosts) can share an archive directory
+        self._writer_id = f"{int(time.time() * 1000)}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._seq = 0
+        self._open: dict[str, BinaryIO] = {}
+        self.segments_written = 0
+
+    def write(self, snapshots: Sequence[Snapshot]) -> None:
+        """Write snapshots as one block per hour partition they fall in."""
+        by_partition: dict[str, list[Snapshot]] = {}
+        for snap in snapshots:
+            if len(snap.batch):
+                by_partition.setdefault(partition_of(snap.captured_at), []).append(snap)
+        for partition, snaps in by_partition.items():
+            block = self._encode_block(snaps)
+            f = self._segment(partition)
+            try:
+                f.write(block)
+                f.flush()
+            except OSError:
+                # Part of the block may be on disk; start the next block in a new segment
+                del self._open[partition]
+                try:
+                    f.close()
+                except OSError:
+                    pass
+                raise
+
+    def close(self) -> None:
+        for f in self._open.values():
+            f.close()
+        self._open.clear()
+
+    def _segment(self, partition: str) -> BinaryIO:
+        f = self._open.get(partition)
+        if f is not None and f.tell() < self._max_segment_bytes:
+            return f
+        if f is not None:
+            f.close()
+        # Partitions only move forward in time; close the ones we've left
+        for old in [p for p in self._open if p < partition]:
+            self._open.pop(old).close()
+
+        directory = self._root / partition
+        directory.mkdir(parents=True, exist_ok=True)
+        self._seq += 1
+        f = (directory / f"{self._writer_id}-{self._seq:05d}{SEGMENT_SUFFIX}").open("ab")
+        f.write(MAGIC)
+        self._open[partition] = f
+        self.segments_written += 1
+        return f
+
+    def _encode_block(self, snapshots: Sequence[Snapshot]) -> bytes:
+        codes: dict[str, int] = {}
+        cols = {name: array(typecode) for name, typecode in ARRAY_COLUMNS.items()}
+        for snap in snapshots:
+            batch = snap.batch
+            # Re-intern this batch's string table into the block dictionary
+            remap = [codes.setdefault(s, len(codes)) for s in batch.strings]
+            for name in ID_COLUMNS:
+                cols[name].extend(remap[c] if c != MISSING else MISSING for c in getattr(batch, name))
+            cols["captured_at"].extend([snap.captured_at] * len(batch))
+            cols["direction"].extend(batch.direction)
+            cols["arrival"].extend(batch.arrival)
+            cols["departure"].extend(batch.departure)
+
+        chunks = [(name, zlib.compress(col.tobytes(), self._level)) for name, col in cols.items()]
+        chunks.append(("strings", zlib.compress(json.dumps(list(codes)).encode(), self._level)))
+        captured = cols["captured_at"]
+        header = json.dumps(
+            {
+                "rows": len(captured),
+                "t_min": min(captured),
+                "t_max": max(captured),
+                "byteorder": sys.byteorder,
+                "columns": [[name, len(data)] for name, data in chunks],
+            },
+            separators=(",", ":"),
+        ).encode()
+        return b"".join([_LENGTH.pack(len(header)), header, *(data for _, data in chunks)])
+
+
+class ArchiveReader:
+    """
+    Scans archived predictions by capture time with column projection.
+
+    Memory stays bounded by one block: partitions outside the range are never
+    opened, blocks outside it are skipped by header, and columns that weren't
+    asked for are seeked over without being read or decompressed.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self._root = root
+
+    def scan(
+        self,
+        start: datetime,
+        end: datetime,
+        columns: Iterable[str] = ALL_COLUMNS,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Yield one dict per block: column name -> values for rows captured in
+        [start, end). Id columns come back as lists of str (None if missing),
+        the others as arrays of epoch seconds / direction ids.
+        """
+        wanted = tuple(columns)
+        unknown = set(wanted) - set(ARRAY_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown archive columns: {sorted(unknown)}")
+        start_s, end_s = int(start.timestamp()), int(end.timestamp())
+
+        for path in self._segments(start_s, end_s):
+            with path.open("rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    continue
+                yield from self._scan_segment(f, start_s, end_s, wanted)
+
+    def _segments(self, start_s: int, end_s: int) -> Iterator[Path]:
+        first, last = partition_of(start_s), partition_of(max(start_s, end_s - 1))
+        for day in sorted(p for p in self._root.iterdir() if p.is_dir()) if self._root.exists() else ():
+            for hour in sorted(p for p in day.iterdir() if p.is_dir()):
+                partition = f"{day.name}/{hour.name}"
+                if first <= partition <= last:
+                    yield from sorted(hour.glob(f"*{SEGMENT_SUFFIX}"))
+
+    @staticmethod
+    def _scan_segment(f: BinaryIO, start_s: int, end_s: int, wanted: tuple[str, ...]) -> Iterator[dict[str, Any]]:
+        # The time filter needs captured_at and ids need the dictionary, even if not projected
+        needed = set(wanted) | {"captured_at"}
+        if needed & set(ID_COLUMNS):
+            needed.add("strings")
+
+        while True:
+            prefix = f.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                return
+            header_bytes = f.read(_LENGTH.unpack(prefix)[0])
+            try:
+                header = json.loads(header_bytes)
+            except ValueError:
+                return  # truncated tail of a segment whose writer died mid-block
+            sizes = header["columns"]
+            if header["t_max"] < start_s or header["t_min"] >= end_s:
+                f.seek(sum(size for _, size in sizes), 1)
+                continue
+
+            raw: dict[str, bytes] = {}
+            for name, size in sizes:
+                if name not in needed:
+                    f.seek(size, 1)
+                    continue
+                data = f.read(size)
+                if len(data) < size:
+                    return
+                try:
+                    raw[name] = zlib.decompress(data)
+                except zlib.error:
+                    return  # torn block from a failed write; nothing after it is trusted
+
+            yield _decode_block(raw, header, start_s, end_s, wanted)
+
+
+def _decode_block(
+    raw: dict[str, bytes],
+    header: dict[str, Any],
+    start_s: int,
+    end_s: int,
+    wanted: tuple[str, ...],
+) -> dict[str, Any]:
+    def column(name: str) -> array:
+        values = array(ARRAY_COLUMNS[name])
+        values.frombytes(raw[name])
+        if header["byteorder"] != sys.byteorder:
+            values.byteswap()
+        return values
+
+    captured = column("captured_at")
+    rows = [i for i, t in enumerate(captured) if start_s <= t < end_s]
+    strings = json.loads(raw["strings"]) if "strings" in raw else []
+
+    out: dict[str, Any] = {}
+    for name in wanted:
+        values = captured if name == "captured_at" else column(name)
+        if name in ID_COLUMNS:
+            out[name] = [strings[values[i]] if values[i] != MISSING else None for i in rows]
+        else:
+            out[name] = array(values.typecode, (values[i] for i in rows))
+    return out
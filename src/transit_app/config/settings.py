@@ -3,6 +3,37 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 
+
+def _env_float(name: str, default: str) -> float:
+    raw = os.getenv(name, default).strip()
+    try:
+        return float(raw)
+    except ValueError as e:
+        raise ValueError(f"{name} must be a number, got: {raw!r}") from e
+
+
+def _env_bool(name: str, default: str) -> bool:
+    raw = os.getenv(name, default).strip().lower()
+    if raw in ("1", "true", "yes", "on"):
+        return True
+    if raw in ("0", "false", "no", "off", ""):
+        return False
+    raise ValueError(f"{name} must be a boolean, got: {raw!r}")
+
+
+def _env_list(name: str) -> tuple[str, ...]:
+    raw = os.getenv(name, "")
+    return tuple(x.strip() for x in raw.split(",") if x.strip())
+
+
+def _env_int(name: str, default: str) -> int:
+    raw = os.getenv(name, default).strip()
+    try:
+        return int(raw)
+    except ValueError as e:
+        raise ValueError(f"{name} must be an integer, got: {raw!r}") from e
+
+
 @dataclass(frozen=True)
 class Settings:
     """
@@ -18,6 +49,72 @@ class Settings:
     mbta_api_key: str | None = None
     timeout_s: float = 10.0
 
+    # Upstream connection pool + retry policy
+    http_pool_size: int = 10
+    http_max_retries: int = 2
+    http_backoff_s: float = 0.25
+    http_backoff_jitter_s: float = 0.25
+    # JSON decoder for upstream bodies: auto (fastest installed), orjson, msgspec or json
+    json_backend: str = "auto"
+
+    # Upstream request budget (MBTA: 1000/min with an API key; <= 0 disables)
+    rate_limit_per_min: float = 1000.0
+    rate_limit_burst: int = 50
+    rate_limit_max_wait_s: float = 2.0
+
+    # Prediction cache (TTL <= 0 disables it)
+    prediction_cache_ttl_s: float = 10.0
+    prediction_cache_max_entries: int = 1024
+    # SQLite file shared by all workers on the host (e.g. /dev/shm/transit-cache.db); None = per-process cache
+    prediction_cache_shared_path: str | None = None
+    # Merge concurrent multi-stop requests arriving within this window (0 disables)
+    prediction_batch_window_s: float = 0.005
+    # Send If-None-Match / If-Modified-Since and reuse payloads on 304
+    conditional_requests: bool = True
+
+    # Fail fast after this many consecutive upstream failures; probe again after the reset period
+    breaker_failure_threshold: int = 5
+    breaker_reset_s: float = 30.0
+    # Serve cached predictions up to this old while upstream is unavailable
+    stale_max_age_s: float = 300.0
+
+    # Journey predictions page: start small, widen (doubling) up to the max only when the trip join misses
+    journey_page_limit: int = 10
+    journey_max_limit: int = 80
+
+    # Routes kept live via the MBTA event stream (empty = poll only)
+    prediction_stream_routes: tuple[str, ...] = ()
+
+    # System-wide GTFS-Realtime TripUpdates feed (e.g. https://cdn.mbta.com/realtime/TripUpdates.pb);
+    # while fresh, journeys read from it instead of polling per stop. None disables it.
+    gtfs_rt_trip_updates_url: str | None = None
+    gtfs_rt_refresh_s: float = 15.0
+
+    # Rolling headway per stop/route/direction over this many observed departures (0 = single-gap headway)
+    headway_window: int = 12
+
+    # Refresh active service alerts in the background this often (<= 0 disables alerts)
+    alerts_refresh_s: float = 30.0
+
+    # Keep the most-asked /estimate queries warm in the prediction cache, refreshed every
+    # headway/10 within [min, max] seconds, using at most this many upstream requests a minute
+    # (top K <= 0 or no prediction cache disables it)
+    prefetch_top_k: int = 50
+    prefetch_budget_per_min: float = 200.0
+    prefetch_min_interval_s: float = 10.0
+    prefetch_max_interval_s: float = 60.0
+
+    # Prediction archive (None disables recording)
+    archive_dir: str | None = None
+    archive_segment_mb: int = 64
+    archive_buffer_rows: int = 100_000
+
+    # App startup
+    reference_dir: str = "data/reference"
+    # Calibration table (scripts/build_calibration.py output) under reference_dir; None = heuristic bands
+    calibration_file: str | None = None
+    warm_on_startup: bool = False
+
     @staticmethod
     def from_env() -> "Settings":
         """
@@ -27,19 +124,79 @@ class Settings:
         - MBTA_BASE_URL (optional)
         - MBTA_API_KEY (optional)
         - HTTP_TIMEOUT_S (optional)
+        - HTTP_POOL_SIZE (optional)
+        - HTTP_MAX_RETRIES (optional)
+        - HTTP_BACKOFF_S (optional)
+        - HTTP_BACKOFF_JITTER_S (optional)
+        - JSON_BACKEND (optional)
+        - RATE_LIMIT_PER_MIN (optional)
+        - RATE_LIMIT_BURST (optional)
+        - RATE_LIMIT_MAX_WAIT_S (optional)
+        - PREDICTION_CACHE_TTL_S (optional)
+        - PREDICTION_CACHE_MAX_ENTRIES (optional)
+        - PREDICTION_CACHE_SHARED_PATH (optional)
+        - PREDICTION_BATCH_WINDOW_S (optional)
+        - CONDITIONAL_REQUESTS (optional)
+        - BREAKER_FAILURE_THRESHOLD (optional)
+        - BREAKER_RESET_S (optional)
+        - STALE_MAX_AGE_S (optional)
+        - JOURNEY_PAGE_LIMIT (optional)
+        - JOURNEY_MAX_LIMIT (optional)
+        - PREDICTION_STREAM_ROUTES (optional, comma-separated route ids)
+        - GTFS_RT_TRIP_UPDATES_URL (optional)
+        - GTFS_RT_REFRESH_S (optional)
+        - HEADWAY_WINDOW (optional)
+        - ALERTS_REFRESH_S (optional)
+        - PREFETCH_TOP_K (optional)
+        - PREFETCH_BUDGET_PER_MIN (optional)
+        - PREFETCH_MIN_INTERVAL_S (optional)
+        - PREFETCH_MAX_INTERVAL_S (optional)
+        - ARCHIVE_DIR (optional)
+        - ARCHIVE_SEGMENT_MB (optional)
+        - ARCHIVE_BUFFER_ROWS (optional)
+        - REFERENCE_DIR (optional)
+        - CALIBRATION_FILE (optional)
+        - WARM_ON_STARTUP (optional)
         """
         base_url = os.getenv("MBTA_BASE_URL", "https://api-v3.mbta.com").strip()
         api_key = os.getenv("MBTA_API_KEY")
         api_key = api_key.strip() if api_key else None
 
-        timeout_raw = os.getenv("HTTP_TIMEOUT_S", "10").strip()
-        try:
-            timeout_s = float(timeout_raw)
-        except ValueError as e:
-            raise ValueError(f"HTTP_TIMEOUT_S must be a number, got: {timeout_raw!r}") from e
-        
-        return Settings(mbta_base_url=base_url, mbta_api_key=api_key, timeout_s=timeout_s)
-    
-
-    
-        
\ No newline at end of file
+        return Settings(
+            mbta_base_url=base_url,
+            mbta_api_key=api_key,
+            timeout_s=_env_float("HTTP_TIMEOUT_S", "10"),
+            http_pool_size=_env_int("HTTP_POOL_SIZE", "10"),
+            http_max_retries=_env_int("HTTP_MAX_RETRIES", "2"),
+            http_backoff_s=_env_float("HTTP_BACKOFF_S", "0.25"),
+            http_backoff_jitter_s=_env_float("HTTP_BACKOFF_JITTER_S", "0.25"),
+            json_backend=os.getenv("JSON_BACKEND", "auto").strip().lower(),
+            rate_limit_per_min=_env_float("RATE_LIMIT_PER_MIN", "1000"),
+            rate_limit_burst=_env_int("RATE_LIMIT_BURST", "50"),
+            rate_limit_max_wait_s=_env_float("RATE_LIMIT_MAX_WAIT_S", "2"),
+            prediction_cache_ttl_s=_env_float("PREDICTION_CACHE_TTL_S", "10"),
+            prediction_cache_max_entries=_env_int("PREDICTION_CACHE_MAX_ENTRIES", "1024"),
+            prediction_cache_shared_path=os.getenv("PREDICTION_CACHE_SHARED_PATH", "").strip() or None,
+            prediction_batch_window_s=_env_float("PREDICTION_BATCH_WINDOW_S", "0.005"),
+            conditional_requests=_env_bool("CONDITIONAL_REQUESTS", "true"),
+            breaker_failure_threshold=_env_int("BREAKER_FAILURE_THRESHOLD", "5"),
+            breaker_reset_s=_env_float("BREAKER_RESET_S", "30"),
+            stale_max_age_s=_env_float("STALE_MAX_AGE_S", "300"),
+            journey_page_limit=_env_int("JOURNEY_PAGE_LIMIT", "10"),
+            journey_max_limit=_env_int("JOURNEY_MAX_LIMIT", "80"),
+            prediction_stream_routes=_env_list("PREDICTION_STREAM_ROUTES"),
+            gtfs_rt_trip_updates_url=os.getenv("GTFS_RT_TRIP_UPDATES_URL", "").strip() or None,
+            gtfs_rt_refresh_s=_env_float("GTFS_RT_REFRESH_S", "15"),
+            headway_window=_env_int("HEADWAY_WINDOW", "12"),
+            alerts_refresh_s=_env_float("ALERTS_REFRESH_S", "30"),
+            prefetch_top_k=_env_int("PREFETCH_TOP_K", "50"),
+            prefetch_budget_per_min=_env_float("PREFETCH_BUDGET_PER_MIN", "200"),
+            prefetch_min_interval_s=_env_float("PREFETCH_MIN_INTERVAL_S", "10"),
+            prefetch_max_interval_s=_env_float("PREFETCH_MAX_INTERVAL_S", "60"),
+            archive_dir=os.getenv("ARCHIVE_DIR", "").strip() or None,
+            archive_segment_mb=_env_int("ARCHIVE_SEGMENT_MB", "64"),
+            archive_buffer_rows=_env_int("ARCHIVE_BUFFER_ROWS", "100000"),
+            reference_dir=os.getenv("REFERENCE_DIR", "data/reference").strip(),
+            calibration_file=os.getenv("CALIBRATION_FILE", "").strip() or None,
+            warm_on_startup=_env_bool("WARM_ON_STARTUP", "false"),
+        )
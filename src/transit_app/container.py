@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from transit_app.archive.recorder import PredictionRecorder
+from transit_app.archive.segments import SegmentWriter
+from transit_app.config.settings import Settings
+from transit_app.http.circuit_breaker import CircuitBreakers
+from transit_app.http.json_backend import json_backend
+from transit_app.http.rate_limit import TokenBucketScheduler
+from transit_app.http.requests_client import AsyncRequestsHttpClient, RequestsHttpClient
+from transit_app.providers.base import PredictionSource, PredictionSources
+from transit_app.providers.gtfs_rt.feed import TripUpdatesFeed
+from transit_app.providers.mbta.alerts import AlertsCache
+from transit_app.providers.mbta.cache import PredictionCache, ResponseCache
+from transit_app.providers.mbta.client import MbtaV3Client
+from transit_app.providers.mbta.headway_observer import HeadwayObserver
+from transit_app.providers.mbta.prefetch import HotStopPrefetcher
+from transit_app.providers.mbta.shared_cache import SharedPredictionCache
+from transit_app.providers.mbta.stream import PredictionStore, PredictionStreamConsumer
+from transit_app.repositories.reference import ReferenceRepository
+from transit_app.services.calibration import CalibrationTable
+from transit_app.services.eta import EtaEstimator
+from transit_app.services.headways import HeadwayTracker
+from transit_app.services.reliability import ReliabilityScorer
+from transit_app.storage.local import LocalBlobStorage
+from transit_app.use_cases.departures import DepartureBoard
+from transit_app.use_cases.journey import JourneyEstimator
+
+# How long the prefetching worker can go silent before another takes over
+_PREFETCH_LEASE_S = 30.0
+
+
+@dataclass(frozen=True)
+class AppContainer:
+    """
+    Long-lived object graph for one app process (one uvicorn worker).
+
+    Why this exists:
+    - Settings are parsed and services built once, not on every request
+    - Pooled resources (HTTP sessions) survive between requests
+    - One place to warm up on startup and release on shutdown
+    """
+
+    settings: Settings
+    scheduler: TokenBucketScheduler | None
+    breakers: CircuitBreakers
+    http: RequestsHttpClient
+    async_http: AsyncRequestsHttpClient
+    mbta: MbtaV3Client
+    prediction_cache: ResponseCache | None
+    prediction_store: PredictionStore | None
+    prediction_stream: PredictionStreamConsumer | None
+    trip_updates: TripUpdatesFeed | None
+    recorder: PredictionRecorder | None
+    headways: HeadwayTracker | None
+    headway_observer: HeadwayObserver | None
+    alerts: AlertsCache | None
+    prefetcher: HotStopPrefetcher | None
+    journey: JourneyEstimator
+    departures: DepartureBoard
+    reference: ReferenceRepository
+
+    def warm_up(self) -> None:
+        """Pre-load reference data and open an upstream connection (best effort)."""
+        for load in (self.reference.list_stops, self.reference.list_routes):
+            try:
+                load()
+            except Exception:
+                # Missing or unreadable artifacts must not stop startup; the first request retries the load
+                pass
+        self.http.warm(self.settings.mbta_base_url, timeout_s=self.settings.timeout_s)
+
+    def start(self) -> None:
+        """Start background workers (live predictions, alerts refresh, prefetcher, archive recorder, headways)."""
+        if self.recorder is not None:
+            self.recorder.start()
+        if self.headway_observer is not None:
+            self.headway_observer.start()
+        if self.alerts is not None:
+            self.alerts.start()
+        if self.prefetcher is not None:
+            self.prefetcher.start()
+        if self.prediction_stream is not None:
+            self.prediction_stream.start()
+        if self.trip_updates is not None:
+            self.trip_updates.start()
+
+    def close(self) -> None:
+        if self.prediction_stream is not None:
+            self.prediction_stream.stop()
+        if self.trip_updates is not None:
+            self.trip_updates.stop()
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+        if self.alerts is not None:
+            self.alerts.stop()
+        if self.recorder is not None:
+            self.recorder.stop()
+        if self.headway_observer is not None:
+            self.headway_observer.stop()
+        self.async_http.close()
+        self.http.close()
+
+
+def build_container(settings: Settings | None = None) -> AppContainer:
+    settings = settings or Settings.from_env()
+    scheduler = (
+        TokenBucketScheduler(
+            rate_per_s=settings.rate_limit_per_min / 60.0,
+            burst=settings.rate_limit_burst,
+            max_wait_s=settings.rate_limit_max_wait_s,
+        )
+        if settings.rate_limit_per_min > 0
+        else None
+    )
+    breakers = CircuitBreakers(
+        failure_threshold=settings.breaker_failure_threshold,
+        reset_timeout_s=settings.breaker_reset_s,
+    )
+    http = RequestsHttpClient(settings, header_observer=scheduler.observe_headers if scheduler else None)
+    async_http = AsyncRequestsHttpClient(http, max_workers=settings.http_pool_size)
+    prediction_cache: ResponseCache | None = None
+    if settings.prediction_cache_ttl_s > 0 and settings.prediction_cache_shared_path:
+        prediction_cache = SharedPredictionCache(
+            settings.prediction_cache_shared_path,
+            ttl_s=settings.prediction_cache_ttl_s,
+            max_entries=settings.prediction_cache_max_entries,
+            # Kept as long as it can still be served stale
+            keep_s=settings.stale_max_age_s,
+            json=json_backend(settings.json_backend),
+        )
+    elif settings.prediction_cache_ttl_s > 0:
+        prediction_cache = PredictionCache(
+            ttl_s=settings.prediction_cache_ttl_s,
+            max_entries=settings.prediction_cache_max_entries,
+        )
+    recorder = (
+        PredictionRecorder(
+            SegmentWriter(Path(settings.archive_dir), max_segment_bytes=settings.archive_segment_mb * 1024 * 1024),
+            max_buffered_rows=settings.archive_buffer_rows,
+        )
+        if settings.archive_dir
+        else None
+    )
+    headways = HeadwayTracker(window=settings.headway_window) if settings.headway_window > 0 else None
+    headway_observer = HeadwayObserver(headways) if headways else None
+    payload_observer = _fan_out(
+        recorder.record_payload if recorder else None,
+        headway_observer.record_payload if headway_observer else None,
+    )
+    mbta = MbtaV3Client(
+        http=http,
+        settings=settings,
+        async_http=async_http,
+        cache=prediction_cache,
+        batch_window_s=settings.prediction_batch_window_s,
+        conditional_requests=settings.conditional_requests,
+        scheduler=scheduler,
+        breakers=breakers,
+        stale_max_age_s=settings.stale_max_age_s,
+        payload_observer=payload_observer,
+    )
+
+    alerts = AlertsCache(mbta, refresh_s=settings.alerts_refresh_s) if settings.alerts_refresh_s > 0 else None
+    prefetcher = (
+        HotStopPrefetcher(
+            mbta,
+            top_k=settings.prefetch_top_k,
+            budget_per_min=settings.prefetch_budget_per_min,
+            headways=headways,
+            min_interval_s=settings.prefetch_min_interval_s,
+            max_interval_s=settings.prefetch_max_interval_s,
+            # With a shared cache, one worker prefetches for all of them
+            leader=(
+                (lambda: prediction_cache.hold_lease("prefetch", _PREFETCH_LEASE_S))
+                if isinstance(prediction_cache, SharedPredictionCache)
+                else None
+            ),
+        )
+        if settings.prefetch_top_k > 0 and prediction_cache is not None
+        else None
+    )
+
+    prediction_store: PredictionStore | None = None
+    prediction_stream: PredictionStreamConsumer | None = None
+    if settings.prediction_stream_routes:
+        prediction_store = PredictionStore(settings.prediction_stream_routes)
+        prediction_stream = PredictionStreamConsumer(
+            # Dedicated client: a held-open stream must not occupy a slot in the request pool
+            stream=RequestsHttpClient(settings),
+            settings=settings,
+            store=prediction_store,
+            routes=settings.prediction_stream_routes,
+            payload_observer=payload_observer,
+        )
+
+    reference_storage = LocalBlobStorage(Path(settings.reference_dir))
+    reference = ReferenceRepository(reference_storage)
+
+    trip_updates = (
+        TripUpdatesFeed(
+            http=http,
+            url=settings.gtfs_rt_trip_updates_url,
+            refresh_s=settings.gtfs_rt_refresh_s,
+            # Tolerate a couple of failed refreshes before falling back to polling
+            max_age_s=max(3 * settings.gtfs_rt_refresh_s, 60.0),
+            parents=reference.parent_stations(),
+            timeout_s=settings.timeout_s,
+        )
+        if settings.gtfs_rt_trip_updates_url
+        else None
+    )
+    # The event stream (when configured) is fresher for its routes, so it is asked first
+    sources: list[PredictionSource] = [s for s in (prediction_store, trip_updates) if s is not None]
+    prediction_source: PredictionSource | None = (
+        PredictionSources(sources) if len(sources) > 1 else sources[0] if sources else None
+    )
+
+    calibration = (
+        # Loaded once per process; lookups on the request path are O(1)
+        CalibrationTable.from_json(reference_storage.read_bytes(settings.calibration_file))
+        if settings.calibration_file
+        else None
+    )
+    eta_estimator = EtaEstimator(calibration)
+    reliability_scorer = ReliabilityScorer()
+    journey = JourneyEstimator(
+        mbta_client=mbta,
+        eta_estimator=eta_estimator,
+        reliability_scorer=reliability_scorer,
+        prediction_store=prediction_source,
+        headway_tracker=headways,
+        alerts=alerts,
+        prefetcher=prefetcher,
+        initial_limit=settings.journey_page_limit,
+        max_limit=settings.journey_max_limit,
+    )
+    departures = DepartureBoard(
+        mbta_client=mbta,
+        eta_estimator=eta_estimator,
+        reliability_scorer=reliability_scorer,
+        headway_tracker=headways,
+    )
+
+    return AppContainer(
+        settings=settings,
+        scheduler=scheduler,
+        breakers=breakers,
+        http=http,
+        async_http=async_http,
+        mbta=mbta,
+        prediction_cache=prediction_cache,
+        prediction_store=prediction_store,
+        prediction_stream=prediction_stream,
+        trip_updates=trip_updates,
+        recorder=recorder,
+        headways=headways,
+        headway_observer=headway_observer,
+        alerts=alerts,
+        prefetcher=prefetcher,
+        journey=journey,
+        departures=departures,
+        reference=reference,
+    )
+
+
+def _fan_out(*observers: Callable[[Any], None] | None) -> Callable[[Any], None] | None:
+    """One payload observer calling each configured observer in turn (None if there are none)."""
+    active = [o for o in observers if o is not None]
+    if not active:
+        return None
+    if len(active) == 1:
+        return active[0]
+
+    def observe(payload: Any) -> None:
+        for observer in active:
+            observer(payload)
+
+    return observe
@@ -3,11 +3,14 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Prediction:
     """
     A normalized real-time prediction for a vehicle arriving/departing a stop.
     We keep this minimal for Slice 1. Will expand later.
+
+    Slotted (no per-instance __dict__): thousands of these stay resident in
+    the prediction cache and live store.
     """
     stop_id: str
     route_id: Optional[str]
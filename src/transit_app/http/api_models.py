@@ -3,7 +3,10 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+# Upper bound on items in one POST /estimate/batch
+MAX_BATCH_ESTIMATES = 100
 
 
 class EstimateRequest(BaseModel):
@@ -33,3 +36,39 @@ class JourneyEstimateResponse(BaseModel):
     eta: EtaResponse
     summary: str
     reliability: ReliabilityResponse
+
+
+class BatchEstimateRequest(BaseModel):
+    items: List[EstimateRequest] = Field(min_length=1, max_length=MAX_BATCH_ESTIMATES)
+
+
+class BatchEstimateItem(BaseModel):
+    """One result per request item, in request order; `error` is set instead of `estimate` on failure."""
+    estimate: JourneyEstimateResponse | None = None
+    error: str | None = None
+
+
+class BatchEstimateResponse(BaseModel):
+    results: List[BatchEstimateItem]
+
+
+class DepartureResponse(BaseModel):
+    route_id: str | None
+    trip_id: str | None
+    direction_id: int | None
+    eta: EtaResponse
+    reliability: ReliabilityResponse
+
+
+class DepartureBoardResponse(BaseModel):
+    stop_id: str
+    generated_at: datetime
+    departures: List[DepartureResponse]
+
+
+class CacheStatsResponse(BaseModel):
+    enabled: bool
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    size: int = 0
@@ -1,5 +1,25 @@
 from __future__ import annotations
-from typing import Any, Protocol
+from dataclasses import dataclass
+from typing import Any, Iterator, Protocol
+
+class HttpStatusError(RuntimeError):
+    """Upstream answered with a non-2xx status."""
+
+    def __init__(self, message: str, *, status_code: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+@dataclass(frozen=True)
+class ConditionalResponse:
+    """
+    Result of a conditional GET.
+    not_modified=True means the upstream answered 304 and `data` is None;
+    the caller should reuse whatever it stored for the validators it sent.
+    """
+    not_modified: bool
+    data: dict[str, Any] | None
+    etag: str | None
+    last_modified: str | None
 
 class HttpClient(Protocol):
     """
@@ -19,3 +39,86 @@ class HttpClient(Protocol):
             timeout_s: float = 10.0,
     ) -> dict[str, Any]:
         ...
+
+    def get_json_conditional(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None = None,
+            headers: dict[str, str] | None = None,
+            timeout_s: float = 10.0,
+            etag: str | None = None,
+            last_modified: str | None = None,
+    ) -> ConditionalResponse:
+        """Like get_json, but sends If-None-Match / If-Modified-Since and surfaces 304s."""
+        ...
+
+    def get_bytes(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None = None,
+            headers: dict[str, str] | None = None,
+            timeout_s: float = 10.0,
+    ) -> bytes:
+        """Raw (decompressed) response body, for callers that decode it themselves."""
+        ...
+
+
+class AsyncHttpClient(Protocol):
+    """
+    Async counterpart of HttpClient.
+
+    Lets async callers (FastAPI `async def` routes) issue several upstream
+    requests concurrently without holding a server worker thread per request.
+    """
+
+    async def get_json(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None = None,
+            headers: dict[str, str] | None = None,
+            timeout_s: float = 10.0,
+    ) -> dict[str, Any]:
+        ...
+
+    async def get_json_conditional(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None = None,
+            headers: dict[str, str] | None = None,
+            timeout_s: float = 10.0,
+            etag: str | None = None,
+            last_modified: str | None = None,
+    ) -> ConditionalResponse:
+        ...
+
+    async def get_bytes(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None = None,
+            headers: dict[str, str] | None = None,
+            timeout_s: float = 10.0,
+    ) -> bytes:
+        ...
+
+
+class EventStreamClient(Protocol):
+    """
+    Something that can hold open a long-lived `text/event-stream` response
+    and yield its lines as they arrive.
+    """
+
+    def stream_lines(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None = None,
+            headers: dict[str, str] | None = None,
+            timeout_s: float = 10.0,
+            idle_timeout_s: float = 60.0,
+    ) -> Iterator[str]:
+        ...
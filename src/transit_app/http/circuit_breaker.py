@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream endpoint whose breaker is open."""
+
+
+@dataclass(frozen=True)
+class BreakerStatus:
+    state: BreakerState
+    consecutive_failures: int
+    retry_in_s: float
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream endpoint.
+
+    Why this exists:
+    - when MBTA is down or slow, every request would otherwise wait the full
+      timeout before failing; an open breaker fails fast instead
+    - after `reset_timeout_s` a single half-open probe is let through; its
+      outcome closes the breaker or re-opens it for another period
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold <= 0:
+            raise ValueError("failure_threshold must be positive")
+        self._threshold = failure_threshold
+        self._reset_timeout_s = reset_timeout_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = BreakerState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self, name: str = "upstream") -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            if self._state is BreakerState.CLOSED:
+                return
+            if self._state is BreakerState.OPEN:
+                if self._clock() - self._opened_at < self._reset_timeout_s:
+                    raise CircuitOpenError(f"Circuit open for {name}; failing fast")
+                self._state = BreakerState.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                raise CircuitOpenError(f"Circuit half-open for {name}; probe already in flight")
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = BreakerState.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_abandoned(self) -> None:
+        """A call was cancelled before it finished: free the probe slot, count nothing."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state is BreakerState.HALF_OPEN or self._failures >= self._threshold:
+                self._state = BreakerState.OPEN
+                self._opened_at = self._clock()
+
+    def status(self) -> BreakerStatus:
+        with self._lock:
+            retry_in = 0.0
+            if self._state is BreakerState.OPEN:
+                retry_in = max(0.0, self._reset_timeout_s - (self._clock() - self._opened_at))
+            return BreakerStatus(state=self._state, consecutive_failures=self._failures, retry_in_s=retry_in)
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per upstream endpoint, created on first use with shared settings."""
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._kwargs = dict(failure_threshold=failure_threshold, reset_timeout_s=reset_timeout_s, clock=clock)
+        self._lock = threading.Lock()
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def for_endpoint(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(**self._kwargs)
+            return breaker
+
+    def statuses(self) -> dict[str, BreakerStatus]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: b.status() for name, b in breakers.items()}
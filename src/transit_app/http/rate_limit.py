@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Callable, Mapping
+
+
+class Priority(IntEnum):
+    """Lower value is served first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when the upstream request budget can't cover a request in time."""
+
+
+@dataclass(frozen=True)
+class RateLimitStats:
+    granted: int
+    shed: int
+    tokens: float
+    blocked_for_s: float
+
+
+class TokenBucketScheduler:
+    """
+    Token-bucket admission control for upstream requests, with priorities.
+
+    Why this exists:
+    - MBTA enforces a per-key quota; hitting it means 429s for everyone
+    - interactive requests (/estimate) must be served ahead of background work
+    - when the budget is gone we delay or shed work instead of burning retries
+
+    The bucket refills at `rate_per_s` up to `burst`. Background requests keep
+    `background_reserve` of the bucket free for interactive traffic and are shed
+    immediately if they could not be admitted within their wait budget.
+    `observe_headers` keeps the bucket in line with the upstream's own
+    `x-ratelimit-*` accounting.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate_per_s: float,
+        burst: int,
+        max_wait_s: float = 2.0,
+        background_reserve: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ) -> None:
+        if rate_per_s <= 0 or burst <= 0:
+            raise ValueError("rate_per_s and burst must be positive")
+        self._rate = rate_per_s
+        self._burst = float(burst)
+        self._max_wait_s = max_wait_s
+        self._reserve = background_reserve * burst
+        self._clock = clock
+        self._wall_clock = wall_clock
+
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._blocked_until = 0.0
+        self._queue: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+
+        self._granted = 0
+        self._shed = 0
+
+    def acquire(self, priority: Priority = Priority.INTERACTIVE, *, max_wait_s: float | None = None) -> None:
+        ticket = self._enqueue(priority)
+        deadline = self._clock() + (self._max_wait_s if max_wait_s is None else max_wait_s)
+        with self._cond:
+            while True:
+                wait = self._try_take(ticket, deadline)
+                if wait <= 0:
+                    return
+                self._cond.wait(timeout=wait)
+
+    async def acquire_async(self, priority: Priority = Priority.INTERACTIVE, *, max_wait_s: float | None = None) -> None:
+        ticket = self._enqueue(priority)
+        deadline = self._clock() + (self._max_wait_s if max_wait_s is None else max_wait_s)
+        while True:
+            with self._cond:
+                wait = self._try_take(ticket, deadline)
+            if wait <= 0:
+                return
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                with self._cond:
+                    self._leave(ticket)
+                raise
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        """Reconcile with the upstream's `x-ratelimit-remaining` / `x-ratelimit-reset`."""
+        lowered = {k.lower(): v for k, v in headers.items()}
+        try:
+            remaining = int(lowered["x-ratelimit-remaining"])
+        except (KeyError, ValueError):
+            return
+        with self._cond:
+            self._refill()
+            self._tokens = min(self._tokens, float(remaining))
+            if remaining <= 0:
+                try:
+                    reset_at = float(lowered["x-ratelimit-reset"])
+                except (KeyError, ValueError):
+                    reset_at = self._wall_clock() + 1.0 / self._rate
+                self._blocked_until = self._clock() + max(0.0, reset_at - self._wall_clock())
+            self._cond.notify_all()
+
+    def stats(self) -> RateLimitStats:
+        with self._cond:
+            self._refill()
+            return RateLimitStats(
+                granted=self._granted,
+                shed=self._shed,
+                tokens=self._tokens,
+                blocked_for_s=max(0.0, self._blocked_until - self._clock()),
+            )
+
+    def _enqueue(self, priority: Priority) -> tuple[int, int]:
+        ticket = (int(priority), next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _try_take(self, ticket: tuple[int, int], deadline: float) -> float:
+        """
+        Caller holds self._cond.
+        Returns 0 if a token was taken, else how long to wait before retrying.
+        Raises RateLimitExceeded if the token can't be had before `deadline`.
+        """
+        now = self._clock()
+        self._refill()
+
+        if now < self._blocked_until:
+            wait = self._blocked_until - now
+        elif self._queue[0] != ticket:
+            # Someone more urgent (or earlier) goes first
+            wait = 0.005
+        else:
+            threshold = 1.0 if ticket[0] == Priority.INTERACTIVE else 1.0 + self._reserve
+            if self._tokens >= threshold:
+                self._tokens -= 1.0
+                self._granted += 1
+                self._leave(ticket)
+                return 0.0
+            wait = (threshold - self._tokens) / self._rate
+
+        if now + wait > deadline:
+            self._shed += 1
+            self._leave(ticket)
+            kind = "background" if ticket[0] == Priority.BACKGROUND else "interactive"
+            raise RateLimitExceeded(f"Upstream request budget exhausted; {kind} request shed")
+        return min(wait, deadline - now)
+
+    def _leave(self, ticket: tuple[int, int]) -> None:
+        # Caller holds self._cond
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+        self._cond.notify_all()
+
+    def _refill(self) -> None:
+        # Caller holds self._cond
+        now = self._clock()
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+            self._updated_at = now
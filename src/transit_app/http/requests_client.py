@@ -1,13 +1,74 @@
 from __future__ import annotations
-from typing import Any
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterator, Mapping
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from transit_app.config.settings import Settings
+from transit_app.http.base import ConditionalResponse, HttpClient, HttpStatusError
+from transit_app.http.json_backend import JsonBackend, json_backend
+
+# Upstream statuses worth retrying: rate limiting + transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
 
 class RequestsHttpClient:
     """
     Local/dev HTTP client based on 'requests'.
     Implements the HttpClient Protocol by matching its method signature.
+
+    Owns a long-lived Session so connections (TCP + TLS) are pooled and
+    kept alive across calls instead of re-handshaking on every request.
+    Retries on 429/5xx are bounded and use jittered exponential backoff
+    (honouring Retry-After when the upstream sends it).
+
+    If `header_observer` is given it sees every response's headers (e.g. a
+    rate-limit scheduler reading x-ratelimit-*); 429s are then left to that
+    observer instead of being retried here.
+
+    JSON bodies are decoded with `json` (a JsonBackend); by default the
+    fastest one installed, per Settings.json_backend.
     """
 
+    def __init__(
+            self,
+            settings: Settings | None = None,
+            *,
+            header_observer: Callable[[Mapping[str, str]], None] | None = None,
+            json: JsonBackend | None = None,
+    ) -> None:
+        settings = settings or Settings()
+        self._header_observer = header_observer
+        self._json = json or json_backend(settings.json_backend)
+        self._session = requests.Session()
+        # requests already negotiates gzip; set it explicitly so it's part of the contract
+        self._session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+        # With an observer (rate-limit scheduler) attached, 429s are its call, not ours
+        retry_statuses = tuple(s for s in RETRY_STATUSES if s != 429) if header_observer else RETRY_STATUSES
+        retry = Retry(
+            total=settings.http_max_retries,
+            connect=settings.http_max_retries,
+            read=settings.http_max_retries,
+            status=settings.http_max_retries,
+            status_forcelist=retry_statuses,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            backoff_factor=settings.http_backoff_s,
+            backoff_jitter=settings.http_backoff_jitter_s,
+            respect_retry_after_header=True,
+            # Hand the final response back so raise_for_status produces our error message
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=settings.http_pool_size,
+            pool_maxsize=settings.http_pool_size,
+            max_retries=retry,
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
     def get_json(
             self,
             url: str,
@@ -16,22 +77,197 @@ class RequestsHttpClient:
             headers: dict[str, str] | None = None,
             timeout_s: float = 10.0,
     ) -> dict[str, Any]:
+        resp = self._get(url, params=params, headers=headers, timeout_s=timeout_s)
+        return self._decode(url, resp)
+
+    def get_bytes(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None = None,
+            headers: dict[str, str] | None = None,
+            timeout_s: float = 10.0,
+    ) -> bytes:
+        resp = self._get(url, params=params, headers=headers, timeout_s=timeout_s)
+        self._raise_for_status(url, resp)
+        return resp.content
+
+    def get_json_conditional(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None = None,
+            headers: dict[str, str] | None = None,
+            timeout_s: float = 10.0,
+            etag: str | None = None,
+            last_modified: str | None = None,
+    ) -> ConditionalResponse:
+        conditional_headers = dict(headers or {})
+        if etag:
+            conditional_headers["If-None-Match"] = etag
+        if last_modified:
+            conditional_headers["If-Modified-Since"] = last_modified
+
+        resp = self._get(url, params=params, headers=conditional_headers, timeout_s=timeout_s)
+        new_etag = resp.headers.get("ETag", etag)
+        new_last_modified = resp.headers.get("Last-Modified", last_modified)
+        if resp.status_code == 304:
+            return ConditionalResponse(not_modified=True, data=None, etag=new_etag, last_modified=new_last_modified)
+
+        return ConditionalResponse(
+            not_modified=False,
+            data=self._decode(url, resp),
+            etag=new_etag,
+            last_modified=new_last_modified,
+        )
+
+    def stream_lines(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None = None,
+            headers: dict[str, str] | None = None,
+            timeout_s: float = 10.0,
+            idle_timeout_s: float = 60.0,
+    ) -> Iterator[str]:
+        """
+        Yield decoded lines of a `text/event-stream` response as they arrive.
+        `idle_timeout_s` bounds the wait for the next byte, not the whole stream.
+        """
+        stream_headers = {**(headers or {}), "Accept": "text/event-stream"}
         try:
-            resp = requests.get(url, params=params, headers=headers, timeout=timeout_s)
+            resp = self._session.get(
+                url,
+                params=params,
+                headers=stream_headers,
+                timeout=(timeout_s, idle_timeout_s),
+                stream=True,
+            )
         except requests.RequestException as e:
             raise RuntimeError(f"HTTP request failed for {url}") from e
-        
+
+        with resp:
+            if resp.status_code >= 400:
+                raise HttpStatusError(
+                    f"HTTP {resp.status_code} for {url}. Body: {resp.text[:500]}", status_code=resp.status_code
+                )
+            # SSE is UTF-8 by definition; servers often omit the charset
+            resp.encoding = resp.encoding or "utf-8"
+            try:
+                for line in resp.iter_lines(decode_unicode=True):
+                    yield line or ""
+            except requests.RequestException as e:
+                raise RuntimeError(f"Event stream from {url} was interrupted") from e
+
+    def _get(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None,
+            headers: dict[str, str] | None,
+            timeout_s: float,
+    ) -> requests.Response:
+        try:
+            resp = self._session.get(url, params=params, headers=headers, timeout=timeout_s)
+        except requests.RequestException as e:
+            raise RuntimeError(f"HTTP request failed for {url}") from e
+        if self._header_observer is not None:
+            self._header_observer(resp.headers)
+        return resp
+
+    @staticmethod
+    def _raise_for_status(url: str, resp: requests.Response) -> None:
         # Raise for non-2xx response (includes 4xx/5xx)
         try:
             resp.raise_for_status()
         except requests.HTTPError as e:
             body = resp.text[:500] # cap for readable errors
-            raise RuntimeError(f"HTTP {resp.status_code} for {url}. Body: {body}") from e
-        
+            raise HttpStatusError(f"HTTP {resp.status_code} for {url}. Body: {body}", status_code=resp.status_code) from e
+
+    def _decode(self, url: str, resp: requests.Response) -> dict[str, Any]:
+        self._raise_for_status(url, resp)
         try:
-            data: dict[str, Any] = resp.json()
+            data: dict[str, Any] = self._json.loads(resp.content)
         except ValueError as e:
             body = resp.text[:500]
             raise RuntimeError(f"Expected JSON response from {url}. Body: {body}") from e
-        
+
         return data
+
+    def warm(self, url: str, *, timeout_s: float = 10.0) -> bool:
+        """
+        Open a pooled connection to `url` ahead of real traffic.
+        Best effort: returns False instead of raising if the upstream is unreachable.
+        """
+        try:
+            self._session.head(url, timeout=timeout_s)
+        except requests.RequestException:
+            return False
+        return True
+
+    def close(self) -> None:
+        """Release pooled connections."""
+        self._session.close()
+
+
+class AsyncRequestsHttpClient:
+    """
+    AsyncHttpClient backed by a (pooled) sync HttpClient.
+
+    Blocking I/O runs on a small dedicated executor sized to the connection
+    pool, so awaiting callers never tie up the event loop or the server's
+    shared threadpool, and concurrent awaits overlap their round trips.
+    """
+
+    def __init__(self, http: HttpClient, *, max_workers: int = 10) -> None:
+        self._http = http
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upstream-http")
+
+    async def get_json(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None = None,
+            headers: dict[str, str] | None = None,
+            timeout_s: float = 10.0,
+    ) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        call = partial(self._http.get_json, url, params=params, headers=headers, timeout_s=timeout_s)
+        return await loop.run_in_executor(self._executor, call)
+
+    async def get_json_conditional(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None = None,
+            headers: dict[str, str] | None = None,
+            timeout_s: float = 10.0,
+            etag: str | None = None,
+            last_modified: str | None = None,
+    ) -> ConditionalResponse:
+        loop = asyncio.get_running_loop()
+        call = partial(
+            self._http.get_json_conditional,
+            url,
+            params=params,
+            headers=headers,
+            timeout_s=timeout_s,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        return await loop.run_in_executor(self._executor, call)
+
+    async def get_bytes(
+            self,
+            url: str,
+            *,
+            params: dict[str, Any] | None = None,
+            headers: dict[str, str] | None = None,
+            timeout_s: float = 10.0,
+    ) -> bytes:
+        loop = asyncio.get_running_loop()
+        call = partial(self._http.get_bytes, url, params=params, headers=headers, timeout_s=timeout_s)
+        return await loop.run_in_executor(self._executor, call)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
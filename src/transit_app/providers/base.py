@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Protocol, Sequence
+
+from transit_app.domain.models import Prediction
+
+
+class PredictionSource(Protocol):
+    """
+    A locally held, continuously refreshed index of live predictions.
+
+    Why this exists:
+    - JourneyEstimator reads predictions without an upstream call whenever a
+      source covers the route, whatever keeps that source current (MBTA event
+      stream, GTFS-Realtime feed, ...)
+    - sources stay swappable and easy to fake in tests
+    """
+
+    def covers(self, route_id: str) -> bool:
+        """True if the source currently has complete, fresh data for `route_id`."""
+        ...
+
+    def predictions_for(self, stop_id: str, route_id: str | None = None) -> list[Prediction]:
+        """Predictions at a stop (or any platform of a parent station)."""
+        ...
+
+
+class PredictionSources:
+    """Several sources tried in order: the first one covering a route answers for it."""
+
+    def __init__(self, sources: Sequence[PredictionSource]) -> None:
+        self._sources = list(sources)
+
+    def covers(self, route_id: str) -> bool:
+        return any(source.covers(route_id) for source in self._sources)
+
+    def predictions_for(self, stop_id: str, route_id: str | None = None) -> list[Prediction]:
+        for source in self._sources:
+            if route_id is None or source.covers(route_id):
+                return source.predictions_for(stop_id, route_id)
+        return []
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from transit_app.domain.models import Prediction
+from transit_app.http.base import HttpClient
+from transit_app.providers.gtfs_rt.trip_updates import decode_trip_updates, feed_timestamp
+
+
+@dataclass(frozen=True)
+class _Index:
+    by_stop: dict[str, tuple[Prediction, ...]]
+    by_trip: dict[str, tuple[Prediction, ...]]
+    size: int
+
+
+_EMPTY = _Index(by_stop={}, by_trip={}, size=0)
+
+
+class TripUpdatesFeed:
+    """
+    Live predictions for the whole system from one GTFS-Realtime TripUpdates feed.
+
+    Why this exists:
+    - per-stop /predictions calls grow with the number of stops users ask
+      about; one feed download per cycle covers every stop and trip
+    - implements PredictionSource, so JourneyEstimator answers from it
+      without any upstream call
+
+    The feed is downloaded every `refresh_s` on a background thread, decoded
+    (pure-Python protobuf reader, see providers.gtfs_rt.protobuf) and indexed
+    by stop and trip off to the side; the finished index is swapped in
+    whole, so readers never lock. A feed whose header timestamp hasn't moved
+    is not decoded again. If refreshes keep failing, `covers` turns False once
+    the data is older than `max_age_s`, and callers fall back to polling.
+
+    Feed stop ids are platform ids; with `parents` (platform -> parent
+    station) predictions are also indexed under the parent station.
+    """
+
+    def __init__(
+        self,
+        *,
+        http: HttpClient,
+        url: str,
+        refresh_s: float = 15.0,
+        max_age_s: float = 90.0,
+        parents: dict[str, str] | None = None,
+        timeout_s: float = 10.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._http = http
+        self._url = url
+        self._refresh_s = refresh_s
+        self._max_age_s = max_age_s
+        self._parents = parents or {}
+        self._timeout_s = timeout_s
+        self._clock = clock
+        self._index = _EMPTY
+        self._feed_timestamp: int | None = None
+        self._refreshed_at: float | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def covers(self, route_id: str) -> bool:
+        # System-wide feed: a route missing from it simply has no upcoming trips
+        return self._refreshed_at is not None and self._clock() - self._refreshed_at <= self._max_age_s
+
+    def predictions_for(self, stop_id: str, route_id: str | None = None) -> list[Prediction]:
+        found = self._index.by_stop.get(stop_id, ())
+        if route_id is None:
+            return list(found)
+        return [p for p in found if p.route_id == route_id]
+
+    def predictions_for_trip(self, trip_id: str) -> list[Prediction]:
+        return list(self._index.by_trip.get(trip_id, ()))
+
+    def __len__(self) -> int:
+        return self._index.size
+
+    def refresh(self) -> bool:
+        """
+        Download and index the feed. Returns False if it was unchanged since
+        the last refresh. Raises RuntimeError on download or decode failure.
+        """
+        data = self._http.get_bytes(self._url, timeout_s=self._timeout_s)
+        try:
+            timestamp = feed_timestamp(data)
+            if timestamp is not None and timestamp == self._feed_timestamp:
+                self._refreshed_at = self._clock()
+                return False
+            feed = decode_trip_updates(data)
+        except (ValueError, IndexError) as e:
+            raise RuntimeError(f"Malformed GTFS-Realtime feed from {self._url}: {e}") from e
+
+        self._index = self._build_index(feed.predictions)
+        self._feed_timestamp = feed.timestamp
+        self._refreshed_at = self._clock()
+        return True
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="gtfs-rt-trip-updates", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 1.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_s)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except RuntimeError:
+                pass  # keep serving the last feed until it ages out (see covers)
+            self._stop.wait(self._refresh_s)
+
+    def _build_index(self, predictions: list[Prediction]) -> _Index:
+        by_stop: dict[str, list[Prediction]] = {}
+        by_trip: dict[str, list[Prediction]] = {}
+        for p in predictions:
+            by_stop.setdefault(p.stop_id, []).append(p)
+            parent = self._parents.get(p.stop_id)
+            if parent is not None:
+                by_stop.setdefault(parent, []).append(p)
+            if p.trip_id:
+                by_trip.setdefault(p.trip_id, []).append(p)
+        return _Index(
+            by_stop={k: tuple(v) for k, v in by_stop.items()},
+            by_trip={k: tuple(v) for k, v in by_trip.items()},
+            size=len(predictions),
+        )
@@ -0,0 +1,107 @@
+"""
+Minimal protocol-buffers wire-format reader.
+
+Enough to walk a message field by field without generated code or the
+protobuf runtime: callers know their schema (field numbers) and decode only
+the fields they need, skipping the rest by length.
+https://protobuf.dev/programming-guides/encoding/
+"""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+VARINT = 0
+FIXED64 = 1
+LENGTH_DELIMITED = 2
+FIXED32 = 5
+
+_INT64_SIGN = 1 << 63
+_UINT64 = 1 << 64
+
+
+def read_varint(buf: bytes, pos: int, end: int | None = None) -> tuple[int, int]:
+    """
+    Decode a base-128 varint at `pos` that must end before `end` (default:
+    the end of `buf`); returns (value, next position).
+    """
+    n = len(buf) if end is None else end
+    if pos >= n:
+        raise ValueError("Truncated varint")
+    b = buf[pos]
+    if b < 0x80:
+        return b, pos + 1
+    result = b & 0x7F
+    shift = 7
+    pos += 1
+    while True:
+        if pos >= n:
+            raise ValueError("Truncated varint")
+        b = buf[pos]
+        result |= (b & 0x7F) << shift
+        pos += 1
+        if b < 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 70:
+            raise ValueError("Varint is too long")
+
+
+def as_signed(value: int) -> int:
+    """Reinterpret a decoded int32/int64 varint (two's complement) as signed."""
+    return value - _UINT64 if value >= _INT64_SIGN else value
+
+
+def iter_fields(buf: bytes, start: int = 0, end: int | None = None) -> Iterator[tuple[int, int, int, int]]:
+    """
+    Walk the fields of the message in buf[start:end].
+
+    Yields (field_number, wire_type, value, value_end):
+    - VARINT / FIXED64 / FIXED32: `value` is the unsigned integer, `value_end` is 0
+    - LENGTH_DELIMITED: the payload is buf[value:value_end] (string, bytes
+      or an embedded message to walk with another `iter_fields`)
+    """
+    pos = start
+    end = len(buf) if end is None else end
+    # Keys, lengths and small ints are almost always one byte: decode those inline
+    while pos < end:
+        key = buf[pos]
+        if key < 0x80:
+            pos += 1
+        else:
+            key, pos = read_varint(buf, pos, end)
+        field, wire_type = key >> 3, key & 0x7
+        if wire_type == VARINT:
+            if pos >= end:
+                raise ValueError("Truncated varint")
+            value = buf[pos]
+            if value < 0x80:
+                pos += 1
+            else:
+                value, pos = read_varint(buf, pos, end)
+            yield field, wire_type, value, 0
+        elif wire_type == LENGTH_DELIMITED:
+            if pos >= end:
+                raise ValueError("Truncated length-delimited field")
+            length = buf[pos]
+            if length < 0x80:
+                pos += 1
+            else:
+                length, pos = read_varint(buf, pos, end)
+            if pos + length > end:
+                raise ValueError("Truncated length-delimited field")
+            yield field, wire_type, pos, pos + length
+            pos += length
+        elif wire_type == FIXED64:
+            if pos + 8 > end:
+                raise ValueError("Truncated fixed64 field")
+            yield field, wire_type, int.from_bytes(buf[pos:pos + 8], "little"), 0
+            pos += 8
+        elif wire_type == FIXED32:
+            if pos + 4 > end:
+                raise ValueError("Truncated fixed32 field")
+            yield field, wire_type, int.from_bytes(buf[pos:pos + 4], "little"), 0
+            pos += 4
+        else:
+            # Groups (3/4) are deprecated and not used by GTFS-Realtime
+            raise ValueError(f"Unsupported wire type {wire_type} for field {field}")
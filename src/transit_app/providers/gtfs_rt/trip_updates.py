@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from transit_app.domain.models import Prediction
+from transit_app.providers.gtfs_rt.protobuf import (
+    FIXED32,
+    FIXED64,
+    LENGTH_DELIMITED,
+    VARINT,
+    as_signed,
+    iter_fields,
+    read_varint,
+)
+
+# Field numbers from gtfs-realtime.proto (https://gtfs.org/realtime/reference/)
+_FEED_HEADER, _FEED_ENTITY = 1, 2
+_HEADER_TIMESTAMP = 3
+_ENTITY_IS_DELETED, _ENTITY_TRIP_UPDATE = 2, 3
+_TRIP_UPDATE_TRIP, _TRIP_UPDATE_STOP_TIME_UPDATE = 1, 2
+_TRIP_ID, _TRIP_ROUTE_ID, _TRIP_DIRECTION_ID = 1, 5, 6
+_STU_ARRIVAL, _STU_DEPARTURE, _STU_STOP_ID, _STU_SCHEDULE_RELATIONSHIP = 2, 3, 4, 5
+_EVENT_TIME = 2
+
+# StopTimeUpdate.ScheduleRelationship: SKIPPED / NO_DATA rows carry no usable times
+_SKIPPED, _NO_DATA = 1, 2
+
+
+@dataclass(frozen=True)
+class DecodedTripUpdates:
+    """A decoded GTFS-Realtime TripUpdates feed: one Prediction per stop time update."""
+
+    timestamp: int | None  # feed header timestamp (epoch seconds)
+    predictions: list[Prediction]
+
+
+def feed_timestamp(data: bytes) -> int | None:
+    """Header timestamp only, without decoding the entities (the header comes first)."""
+    for field, wire_type, value, end in iter_fields(data):
+        if field == _FEED_HEADER and wire_type == LENGTH_DELIMITED:
+            return _header_timestamp(data, value, end)
+    return None
+
+
+def decode_trip_updates(data: bytes) -> DecodedTripUpdates:
+    """
+    Decode a serialized FeedMessage. Only trip updates are read; vehicle
+    positions, alerts and unknown fields are skipped by length.
+    Raises ValueError on malformed input.
+    """
+    timestamp: int | None = None
+    predictions: list[Prediction] = []
+    # Feeds repeat the same times and ids thousands of times; build each object once
+    times: dict[int, datetime] = {}
+    strings: dict[bytes, str] = {}
+
+    def text(start: int, end: int) -> str:
+        raw = data[start:end]
+        s = strings.get(raw)
+        if s is None:
+            s = strings[raw] = sys.intern(raw.decode("utf-8"))
+        return s
+
+    def at(epoch_s: int | None) -> datetime | None:
+        if epoch_s is None:
+            return None
+        t = times.get(epoch_s)
+        if t is None:
+            t = times[epoch_s] = datetime.fromtimestamp(epoch_s, tz=timezone.utc)
+        return t
+
+    for field, wire_type, value, end in iter_fields(data):
+        if wire_type != LENGTH_DELIMITED:
+            continue
+        if field == _FEED_HEADER:
+            timestamp = _header_timestamp(data, value, end)
+            continue
+        if field != _FEED_ENTITY:
+            continue
+
+        trip_update: tuple[int, int] | None = None
+        deleted = False
+        for e_field, e_type, e_value, e_end in iter_fields(data, value, end):
+            if e_field == _ENTITY_TRIP_UPDATE and e_type == LENGTH_DELIMITED:
+                trip_update = (e_value, e_end)
+            elif e_field == _ENTITY_IS_DELETED and e_type == VARINT:
+                deleted = bool(e_value)
+        if trip_update is None or deleted:
+            continue
+
+        trip_id: str | None = None
+        route_id: str | None = None
+        direction_id: int | None = None
+        updates: list[tuple[int, int]] = []
+        for t_field, t_type, t_value, t_end in iter_fields(data, *trip_update):
+            if t_type != LENGTH_DELIMITED:
+                continue
+            if t_field == _TRIP_UPDATE_STOP_TIME_UPDATE:
+                updates.append((t_value, t_end))
+            elif t_field == _TRIP_UPDATE_TRIP:
+                for d_field, d_type, d_value, d_end in iter_fields(data, t_value, t_end):
+                    if d_field == _TRIP_ID and d_type == LENGTH_DELIMITED:
+                        trip_id = text(d_value, d_end)
+                    elif d_field == _TRIP_ROUTE_ID and d_type == LENGTH_DELIMITED:
+                        route_id = text(d_value, d_end)
+                    elif d_field == _TRIP_DIRECTION_ID and d_type == VARINT:
+                        direction_id = d_value
+
+        for start, stop in updates:
+            stop_id: str | None = None
+            arrival: int | None = None
+            departure: int | None = None
+            relationship = 0
+            for s_field, s_type, s_value, s_end in iter_fields(data, start, stop):
+                if s_field == _STU_STOP_ID and s_type == LENGTH_DELIMITED:
+                    stop_id = text(s_value, s_end)
+                elif s_field == _STU_ARRIVAL and s_type == LENGTH_DELIMITED:
+                    arrival = _event_time(data, s_value, s_end)
+                elif s_field == _STU_DEPARTURE and s_type == LENGTH_DELIMITED:
+                    departure = _event_time(data, s_value, s_end)
+                elif s_field == _STU_SCHEDULE_RELATIONSHIP and s_type == VARINT:
+                    relationship = s_value
+            if stop_id is None or relationship in (_SKIPPED, _NO_DATA):
+                continue
+            if arrival is None and departure is None:
+                continue
+            predictions.append(
+                Prediction(
+                    stop_id=stop_id,
+                    route_id=route_id,
+                    trip_id=trip_id,
+                    direction_id=direction_id,
+                    arrival_time=at(arrival),
+                    departure_time=at(departure),
+                )
+            )
+
+    return DecodedTripUpdates(timestamp=timestamp, predictions=predictions)
+
+
+def _header_timestamp(data: bytes, start: int, end: int) -> int | None:
+    for field, wire_type, value, _ in iter_fields(data, start, end):
+        if field == _HEADER_TIMESTAMP and wire_type == VARINT:
+            return value
+    return None
+
+
+def _event_time(data: bytes, start: int, end: int) -> int | None:
+    # StopTimeEvent.time is an absolute int64 epoch; events with only a delay can't be placed.
+    # Hot path (two events per stop time update): walk the tiny message without a generator.
+    pos = start
+    while pos < end:
+        key, pos = read_varint(data, pos, end)
+        wire_type = key & 0x7
+        if wire_type == VARINT:
+            value, pos = read_varint(data, pos, end)
+            if key >> 3 == _EVENT_TIME:
+                return as_signed(value) or None
+        else:
+            if wire_type == LENGTH_DELIMITED:
+                length, pos = read_varint(data, pos, end)
+                pos += length
+            elif wire_type == FIXED64:
+                pos += 8
+            elif wire_type == FIXED32:
+                pos += 4
+            else:
+                raise ValueError(f"Unsupported wire type {wire_type} for field {key >> 3}")
+            if pos > end:
+                raise ValueError("Truncated field")
+    return None
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from transit_app.providers.mbta.client import MbtaV3Client
+from transit_app.providers.mbta.columnar import NAT, epoch_seconds
+
+# How much an effect at maximum severity (10) widens bands; scaled linearly by severity.
+# Effects not listed (elevator/escalator closures, parking, access issues...) don't change travel time.
+EFFECT_WEIGHTS: dict[str, float] = {
+    "SUSPENSION": 1.0,
+    "SHUTTLE": 1.0,
+    "DELAY": 1.0,
+    "DETOUR": 0.5,
+    "SNOW_ROUTE": 0.5,
+    "STATION_CLOSURE": 0.5,
+    "STOP_CLOSURE": 0.5,
+    "SERVICE_CHANGE": 0.3,
+    "SCHEDULE_CHANGE": 0.3,
+    "TRACK_CHANGE": 0.2,
+}
+MAX_ALERT_MULTIPLIER = 2.0
+
+
+@dataclass(frozen=True)
+class ActiveAlert:
+    """The parts of an MBTA alert that matter to estimates."""
+
+    alert_id: str
+    effect: str
+    severity: int
+    # (start, end) epoch seconds; end is NAT for open-ended alerts
+    periods: tuple[tuple[int, int], ...]
+
+    def active_at(self, epoch_s: int) -> bool:
+        if not self.periods:
+            return True
+        return any(start <= epoch_s and (end == NAT or epoch_s < end) for start, end in self.periods)
+
+    @property
+    def multiplier(self) -> float:
+        return 1.0 + EFFECT_WEIGHTS.get(self.effect, 0.0) * min(self.severity, 10) / 10
+
+
+@dataclass(frozen=True)
+class AlertImpact:
+    """Combined effect of the alerts touching one journey (the worst alert wins)."""
+
+    multiplier: float
+    severity: int | None
+    effect: str | None
+
+
+NO_IMPACT = AlertImpact(multiplier=1.0, severity=None, effect=None)
+
+# ("route", route_id) / ("stop", stop_id) / ("route_stop", route_id, stop_id)
+_IndexKey = tuple[str, ...]
+
+
+class AlertsCache:
+    """
+    Active MBTA service alerts, indexed by route and stop, refreshed in the
+    background.
+
+    Why this exists:
+    - alerts change on the order of minutes; fetching /alerts per /estimate
+      would double upstream cost
+    - `impact` is a handful of dict lookups, cheap enough for every request
+
+    An informed entity with only a route applies to the whole route, one with
+    only a stop to every route at that stop, and one with both to that stop
+    on that route. Each refresh builds a new index and swaps it in whole, so
+    readers never lock and never see a half-built index. A refresh that
+    fails keeps the previous index; an unchanged alert set (304) is not
+    re-indexed.
+    """
+
+    def __init__(
+        self,
+        mbta_client: MbtaV3Client,
+        *,
+        refresh_s: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._mbta = mbta_client
+        self._refresh_s = refresh_s
+        self._clock = clock
+        self._index: dict[_IndexKey, tuple[ActiveAlert, ...]] = {}
+        self._last_payload: dict[str, Any] | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.refreshed_at: float | None = None
+        self.failed_refreshes = 0
+
+    def __len__(self) -> int:
+        return len({a.alert_id for alerts in self._index.values() for a in alerts})
+
+    def impact(self, *, route_id: str, stop_ids: Iterable[str] = ()) -> AlertImpact:
+        """Worst active alert affecting `route_id` as a whole or any of `stop_ids`."""
+        index = self._index  # one consistent snapshot for this lookup
+        if not index:
+            return NO_IMPACT
+        found: list[ActiveAlert] = list(index.get(("route", route_id), ()))
+        for stop_id in stop_ids:
+            found.extend(index.get(("stop", stop_id), ()))
+            found.extend(index.get(("route_stop", route_id, stop_id), ()))
+
+        now_s = int(self._clock())
+        worst: ActiveAlert | None = None
+        for alert in found:
+            if alert.active_at(now_s) and (worst is None or alert.multiplier > worst.multiplier):
+                worst = alert
+        if worst is None or worst.multiplier <= 1.0:
+            return NO_IMPACT
+        return AlertImpact(
+            multiplier=min(worst.multiplier, MAX_ALERT_MULTIPLIER),
+            severity=worst.severity,
+            effect=worst.effect,
+        )
+
+    def refresh(self) -> None:
+        """Fetch active alerts and swap in a new index (raises RuntimeError on upstream failure)."""
+        payload = self._mbta.get_alerts()
+        if payload is not self._last_payload:
+            self._index = build_alert_index(payload)
+            self._last_payload = payload
+        self.refreshed_at = self._clock()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mbta-alerts", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 1.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_s)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                # Upstream down or an unexpected payload: keep serving the last index; try again next period
+                self.failed_refreshes += 1
+            self._stop.wait(self._refresh_s)
+
+
+def build_alert_index(payload: dict[str, Any]) -> dict[_IndexKey, tuple[ActiveAlert, ...]]:
+    """Index a JSON:API alerts document by route, stop and route+stop."""
+    index: dict[_IndexKey, list[ActiveAlert]] = {}
+    for item in payload.get("data", []) or []:
+        attrs = item.get("attributes", {}) or {}
+        effect = attrs.get("effect")
+        if not isinstance(effect, str) or EFFECT_WEIGHTS.get(effect, 0.0) <= 0:
+            continue
+        severity = attrs.get("severity")
+        alert = ActiveAlert(
+            alert_id=str(item.get("id")),
+            effect=effect,
+            severity=severity if isinstance(severity, int) else 0,
+            periods=tuple(
+                (epoch_seconds(p.get("start")), epoch_seconds(p.get("end")))
+                for p in attrs.get("active_period") or []
+                if isinstance(p, dict) and p.get("start")
+            ),
+        )
+        keys: set[_IndexKey] = set()
+        for entity in attrs.get("informed_entity") or []:
+            route, stop = entity.get("route"), entity.get("stop")
+            if isinstance(route, str) and isinstance(stop, str):
+                keys.add(("route_stop", route, stop))
+            elif isinstance(route, str):
+                keys.add(("route", route))
+            elif isinstance(stop, str):
+                keys.add(("stop", stop))
+        for key in keys:
+            index.setdefault(key, []).append(alert)
+    return {key: tuple(alerts) for key, alerts in index.items()}
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from transit_app.http.rate_limit import Priority
+
+# fetch(stop_ids, route_id, direction_id, limit, sort, priority) -> raw MBTA payload
+BatchFetch = Callable[[list[str], Optional[str], Optional[int], int, str, Priority], Awaitable[dict[str, Any]]]
+
+_BatchKey = tuple[Optional[str], Optional[int], str, Priority]
+
+
+@dataclass
+class _Batch:
+    stop_ids: list[str] = field(default_factory=list)
+    limit: int = 0
+    future: asyncio.Future[dict[str, Any]] | None = None
+    task: asyncio.Task[None] | None = None
+
+
+class PredictionBatcher:
+    """
+    Merges multi-stop prediction requests that arrive within a short window.
+
+    Requests for the same (route, direction, sort, priority) issued within
+    `window_s` of each other are sent upstream as one `filter[stop]=a,b,c`
+    call, at that priority. Every caller
+    receives the merged payload; callers split it with `predictions_by_stop`,
+    which ignores stops they did not ask for.
+    """
+
+    def __init__(self, fetch: BatchFetch, *, window_s: float) -> None:
+        if window_s <= 0:
+            raise ValueError("window_s must be positive")
+        self._fetch = fetch
+        self._window_s = window_s
+        self._open: dict[_BatchKey, _Batch] = {}
+
+    async def get(
+        self,
+        *,
+        stop_ids: list[str],
+        route_id: str | None,
+        direction_id: int | None,
+        limit: int,
+        sort: str,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> dict[str, Any]:
+        key = (route_id, direction_id, sort, priority)
+        batch = self._open.get(key)
+        if batch is None:
+            batch = self._open[key] = _Batch(future=asyncio.get_running_loop().create_future())
+            batch.task = asyncio.create_task(self._flush_later(key, batch))
+
+        for stop_id in stop_ids:
+            if stop_id not in batch.stop_ids:
+                batch.stop_ids.append(stop_id)
+        batch.limit += limit
+
+        assert batch.future is not None
+        # shield: a cancelled caller must not cancel the shared upstream call
+        return await asyncio.shield(batch.future)
+
+    async def _flush_later(self, key: _BatchKey, batch: _Batch) -> None:
+        await asyncio.sleep(self._window_s)
+        # Close the window before fetching so late arrivals start a new batch
+        self._open.pop(key, None)
+        route_id, direction_id, sort, priority = key
+
+        assert batch.future is not None
+        try:
+            payload = await self._fetch(batch.stop_ids, route_id, direction_id, batch.limit, sort, priority)
+        except asyncio.CancelledError:
+            batch.future.cancel()
+            raise
+        except Exception as e:
+            batch.future.set_exception(e)
+            batch.future.exception()  # retrieved; avoid "never retrieved" noise
+            return
+        batch.future.set_result(payload)
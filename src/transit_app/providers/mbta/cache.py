@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, Protocol
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Point-in-time counters for a PredictionCache."""
+    hits: int
+    misses: int
+    coalesced: int
+    size: int
+
+
+class ResponseCache(Protocol):
+    """
+    What MbtaV3Client needs from a prediction response cache.
+
+    Implementations: PredictionCache (in-process) and SharedPredictionCache
+    (shared by every worker process on a host).
+    """
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        *,
+        serve_stale: Callable[[Any, float], Any] | None = None,
+        stale_max_age_s: float | None = None,
+    ) -> Any:
+        ...
+
+    async def get_or_load_async(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        *,
+        serve_stale: Callable[[Any, float], Any] | None = None,
+        stale_max_age_s: float | None = None,
+    ) -> Any:
+        ...
+
+    def put(self, key: Hashable, value: Any, *, ttl_s: float | None = None) -> None:
+        ...
+
+    def get_stale(self, key: Hashable, max_age_s: float | None = None) -> tuple[Any, float] | None:
+        ...
+
+    def stats(self) -> CacheStats:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class _Flight:
+    """A load in progress that other threads can wait on."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class PredictionCache:
+    """
+    Short-lived TTL + LRU cache for upstream prediction payloads.
+
+    Why this exists:
+    - many users ask about the same busy stops within seconds of each other
+    - concurrent misses for one key collapse into a single upstream call
+      (single-flight), which keeps us under the MBTA rate limit at peak
+
+    Cached values are shared between callers and must be treated as read-only.
+    Failed loads are never cached; every waiter sees the error.
+
+    Expired entries are kept (until LRU eviction) as a last-known-good copy:
+    `get_stale` returns them, and callers passing `serve_stale` get them
+    immediately instead of waiting on a refresh that is already in flight,
+    unless the copy is older than `stale_max_age_s`; then they wait.
+
+    `put` stores a value loaded elsewhere (a background refresher), optionally
+    with its own TTL for that entry.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_s: float,
+        max_entries: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if ttl_s <= 0:
+            raise ValueError("ttl_s must be positive")
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self._ttl_s = ttl_s
+        self._max_entries = max_entries
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        # key -> (stored_at, ttl_s, value)
+        self._entries: OrderedDict[Hashable, tuple[float, float, Any]] = OrderedDict()
+        self._flights: dict[Hashable, _Flight] = {}
+        self._async_flights: dict[Hashable, asyncio.Future[Any]] = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        *,
+        serve_stale: Callable[[Any, float], Any] | None = None,
+        stale_max_age_s: float | None = None,
+    ) -> Any:
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._coalesced += 1
+                stale = self._stale(key, stale_max_age_s) if serve_stale is not None else None
+                if stale is not None:
+                    return serve_stale(*stale)
+                leader = False
+            else:
+                self._misses += 1
+                flight = self._flights[key] = _Flight()
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            with self._lock:
+                self._store(key, flight.value)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value
+
+    async def get_or_load_async(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        *,
+        serve_stale: Callable[[Any, float], Any] | None = None,
+        stale_max_age_s: float | None = None,
+    ) -> Any:
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            pending = self._async_flights.get(key)
+            if pending is not None:
+                self._coalesced += 1
+                stale = self._stale(key, stale_max_age_s) if serve_stale is not None else None
+                if stale is not None:
+                    return serve_stale(*stale)
+                leader = False
+            else:
+                self._misses += 1
+                pending = self._async_flights[key] = asyncio.get_running_loop().create_future()
+                leader = True
+
+        if not leader:
+            # shield: one waiter being cancelled must not cancel the shared load
+            return await asyncio.shield(pending)
+
+        try:
+            value = await loader()
+            with self._lock:
+                self._store(key, value)
+            pending.set_result(value)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                # The leader gave up (e.g. its deadline fired); waiters get a plain failure
+                pending.set_exception(RuntimeError("Shared upstream load was cancelled"))
+            else:
+                pending.set_exception(e)
+            # Mark retrieved so an un-awaited failure doesn't log a warning
+            pending.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._async_flights[key]
+        return value
+
+    def put(self, key: Hashable, value: Any, *, ttl_s: float | None = None) -> None:
+        """Store `value` as fresh for `ttl_s` (default: the cache TTL)."""
+        if ttl_s is not None and ttl_s <= 0:
+            raise ValueError("ttl_s must be positive")
+        with self._lock:
+            self._store(key, value, ttl_s)
+
+    def get_stale(self, key: Hashable, max_age_s: float | None = None) -> tuple[Any, float] | None:
+        """Last stored value for `key` and its age in seconds, fresh or not."""
+        with self._lock:
+            return self._stale(key, max_age_s)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                coalesced=self._coalesced,
+                size=len(self._entries),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, key: Hashable) -> tuple[bool, Any]:
+        # Caller holds self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        stored_at, ttl_s, value = entry
+        if self._clock() - stored_at >= ttl_s:
+            return False, None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return True, value
+
+    def _stale(self, key: Hashable, max_age_s: float | None = None) -> tuple[Any, float] | None:
+        # Caller holds self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, _, value = entry
+        age_s = self._clock() - stored_at
+        if max_age_s is not None and age_s > max_age_s:
+            return None
+        return value, age_s
+
+    def _store(self, key: Hashable, value: Any, ttl_s: float | None = None) -> None:
+        # Caller holds self._lock
+        self._entries[key] = (self._clock(), self._ttl_s if ttl_s is None else ttl_s, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
@@ -1,17 +1,82 @@
 from __future__ import annotations
-from typing import Any
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Literal
 from transit_app.config.settings import Settings
-from transit_app.http.base import HttpClient
+from transit_app.http.base import AsyncHttpClient, ConditionalResponse, HttpClient, HttpStatusError
+from transit_app.http.circuit_breaker import CircuitBreaker, CircuitBreakers
+from transit_app.http.rate_limit import Priority, RateLimitExceeded, TokenBucketScheduler
+from transit_app.providers.mbta.batching import PredictionBatcher
+from transit_app.providers.mbta.cache import ResponseCache
+from transit_app.providers.mbta.endpoints import alerts as alerts_url
 from transit_app.providers.mbta.endpoints import predictions as predictions_url
+from transit_app.providers.mbta.mapper import MbtaPayload
+
+# Sparse fieldsets: only what mapper.predictions_from_mbta reads.
+# Relationship linkage (stop/route/trip ids) is always returned by MBTA v3.
+PREDICTION_FIELDS = "arrival_time,departure_time,direction_id"
+# Included stops are only used to map platforms back to parent stations
+STOP_FIELDS = "location_type"
+# Only what providers.mbta.alerts reads
+ALERT_FIELDS = "effect,severity,informed_entity,active_period"
+
+_ENDPOINT_URLS = {"predictions": predictions_url, "alerts": alerts_url}
 
 class MbtaV3Client:
     """
     Thin client for MBTA v3 API.
     Responsibility: perform HTTP requests and return raw JSON dicts.
+
+    Async methods require an AsyncHttpClient (injected as `async_http`).
+    If a ResponseCache (PredictionCache, or SharedPredictionCache across
+    worker processes) is injected, prediction payloads are served from it
+    and concurrent misses for the same query share one upstream call.
+    With `batch_window_s` > 0, async multi-stop requests arriving within that
+    window are merged into one upstream call.
+    With `conditional_requests`, each query remembers its ETag/Last-Modified
+    and a 304 Not Modified reuses the previous (already mapped) payload.
+    With a TokenBucketScheduler, every upstream call (not cache hits) first
+    takes a token at the caller's `priority`; RateLimitExceeded means shed.
+    With CircuitBreakers, an endpoint failing repeatedly fails fast; while it
+    is unavailable (or a refresh is in flight) the last cached payload is
+    served instead, flagged `stale` (see MbtaPayload).
+    `payload_observer` sees every predictions payload received from upstream
+    (including reused 304 payloads, not cache hits), e.g. to archive it; it
+    must not block (queue the payload, see PredictionRecorder) and its errors
+    are ignored.
     """
-    def __init__(self, http: HttpClient, settings: Settings) -> None:
+    def __init__(
+            self,
+            http: HttpClient,
+            settings: Settings,
+            async_http: AsyncHttpClient | None = None,
+            cache: ResponseCache | None = None,
+            batch_window_s: float = 0.0,
+            conditional_requests: bool = True,
+            max_validators: int = 1024,
+            scheduler: TokenBucketScheduler | None = None,
+            breakers: CircuitBreakers | None = None,
+            stale_max_age_s: float = 300.0,
+            payload_observer: Callable[[MbtaPayload], None] | None = None,
+    ) -> None:
         self._http = http
+        self._async_http = async_http
         self._settings = settings
+        self._cache = cache
+        self._batcher = (
+            PredictionBatcher(self._fetch_many_async, window_s=batch_window_s)
+            if batch_window_s > 0
+            else None
+        )
+        self._conditional = conditional_requests
+        self._max_validators = max_validators
+        self._validators: OrderedDict[Hashable, tuple[str | None, str | None, MbtaPayload]] = OrderedDict()
+        self._validators_lock = threading.Lock()
+        self._scheduler = scheduler
+        self._breakers = breakers
+        self._stale_max_age_s = stale_max_age_s
+        self._payload_observer = payload_observer
 
     def get_predictions(
             self,
@@ -21,27 +86,305 @@ class MbtaV3Client:
             direction_id: int | None = None,
             limit: int = 10,
             sort: str = "departure_time",
+            priority: Priority = Priority.INTERACTIVE,
+    ) -> dict[str, Any]:
+        key = (stop_id, route_id, direction_id, limit, sort)
+        params = self._predictions_params(stop_id, route_id, direction_id, limit, sort)
+
+        return self._load(key, lambda: self._fetch(key, params, priority))
+
+    async def get_predictions_async(
+            self,
+            *,
+            stop_id: str,
+            route_id: str | None = None,
+            direction_id: int | None = None,
+            limit: int = 10,
+            sort: str = "departure_time",
+            priority: Priority = Priority.INTERACTIVE,
+    ) -> dict[str, Any]:
+        key = (stop_id, route_id, direction_id, limit, sort)
+        params = self._predictions_params(stop_id, route_id, direction_id, limit, sort)
+
+        return await self._load_async(key, lambda: self._fetch_async(key, params, priority))
+
+    def get_predictions_many(
+            self,
+            *,
+            stop_ids: list[str],
+            route_id: str | None = None,
+            direction_id: int | None = None,
+            limit: int = 30,
+            sort: str = "departure_time",
+            priority: Priority = Priority.INTERACTIVE,
+    ) -> dict[str, Any]:
+        """
+        Predictions for several stops in one upstream call (`filter[stop]=a,b`).
+        Split the payload per stop with `mapper.predictions_by_stop`.
+        """
+        key = (tuple(stop_ids), route_id, direction_id, limit, sort)
+        params = self._predictions_params(",".join(stop_ids), route_id, direction_id, limit, sort, include="stop")
+
+        return self._load(key, lambda: self._fetch(key, params, priority))
+
+    async def get_predictions_many_async(
+            self,
+            *,
+            stop_ids: list[str],
+            route_id: str | None = None,
+            direction_id: int | None = None,
+            limit: int = 30,
+            sort: str = "departure_time",
+            priority: Priority = Priority.INTERACTIVE,
+    ) -> dict[str, Any]:
+        async def load() -> dict[str, Any]:
+            if self._batcher is not None:
+                return await self._batcher.get(
+                    stop_ids=stop_ids,
+                    route_id=route_id,
+                    direction_id=direction_id,
+                    limit=limit,
+                    sort=sort,
+                    priority=priority,
+                )
+            return await self._fetch_many_async(stop_ids, route_id, direction_id, limit, sort, priority)
+
+        return await self._load_async((tuple(stop_ids), route_id, direction_id, limit, sort), load)
+
+    def refresh_predictions_many(
+            self,
+            *,
+            stop_ids: list[str],
+            route_id: str | None = None,
+            direction_id: int | None = None,
+            limit: int = 30,
+            sort: str = "departure_time",
+            ttl_s: float | None = None,
+            priority: Priority = Priority.BACKGROUND,
+    ) -> dict[str, Any]:
+        """
+        Fetch `get_predictions_many` upstream regardless of the cache and store
+        the result fresh for `ttl_s` (default: the cache TTL). Meant for a
+        background prefetcher (see HotStopPrefetcher), hence BACKGROUND priority.
+        """
+        key = (tuple(stop_ids), route_id, direction_id, limit, sort)
+        params = self._predictions_params(",".join(stop_ids), route_id, direction_id, limit, sort, include="stop")
+
+        payload = self._fetch(key, params, priority)
+        if self._cache is not None:
+            self._cache.put(key, payload, ttl_s=ttl_s)
+        return payload
+
+    def get_alerts(self, *, priority: Priority = Priority.BACKGROUND) -> dict[str, Any]:
+        """
+        Service alerts active now. Meant for a background refresher (see
+        AlertsCache), hence BACKGROUND priority and no response cache; with
+        conditional requests an unchanged alert set comes back as the same payload.
+        """
+        params = {"filter[datetime]": "NOW", "fields[alert]": ALERT_FIELDS}
+        return self._fetch(("alerts",), params, priority, endpoint="alerts")
+
+    async def _fetch_many_async(
+            self,
+            stop_ids: list[str],
+            route_id: str | None,
+            direction_id: int | None,
+            limit: int,
+            sort: str,
+            priority: Priority = Priority.INTERACTIVE,
     ) -> dict[str, Any]:
+        key = (tuple(stop_ids), route_id, direction_id, limit, sort)
+        params = self._predictions_params(",".join(stop_ids), route_id, direction_id, limit, sort, include="stop")
+        return await self._fetch_async(key, params, priority)
+
+    def _load(self, key: Hashable, fetch: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        if self._cache is None:
+            return fetch()
+        try:
+            return self._cache.get_or_load(
+                key, fetch, serve_stale=self._mark_stale, stale_max_age_s=self._stale_max_age_s
+            )
+        except RuntimeError as e:
+            return self._stale_or_raise(key, e)
+
+    async def _load_async(self, key: Hashable, fetch: Callable[[], Awaitable[dict[str, Any]]]) -> dict[str, Any]:
+        if self._cache is None:
+            return await fetch()
+        try:
+            return await self._cache.get_or_load_async(
+                key, fetch, serve_stale=self._mark_stale, stale_max_age_s=self._stale_max_age_s
+            )
+        except RuntimeError as e:
+            return self._stale_or_raise(key, e)
+
+    def _stale_or_raise(self, key: Hashable, error: RuntimeError) -> dict[str, Any]:
+        assert self._cache is not None
+        stale = self._cache.get_stale(key, max_age_s=self._stale_max_age_s)
+        if stale is None:
+            raise error
+        return self._mark_stale(*stale)
+
+    @staticmethod
+    def _mark_stale(payload: Any, age_s: float) -> Any:
+        return payload.as_stale(age_s) if isinstance(payload, MbtaPayload) else payload
+
+    def _observe(self, payload: MbtaPayload) -> None:
+        if self._payload_observer is None:
+            return
+        try:
+            self._payload_observer(payload)
+        except Exception:
+            pass  # the upstream call succeeded; an observer bug must not fail the request
+
+    def _breaker(self, endpoint: str = "predictions") -> CircuitBreaker | None:
+        return self._breakers.for_endpoint(endpoint) if self._breakers is not None else None
+
+    def _fetch(
+            self,
+            key: Hashable,
+            params: dict[str, Any],
+            priority: Priority,
+            endpoint: str = "predictions",
+    ) -> dict[str, Any]:
+        if self._scheduler is not None:
+            self._scheduler.acquire(priority)
+        breaker = self._breaker(endpoint)
+        if breaker is not None:
+            breaker.before_call(f"MBTA {endpoint}")
+        try:
+            payload = self._fetch_upstream(key, params, endpoint)
+        except RuntimeError as e:
+            _record_outcome(breaker, e)
+            raise
+        _record_outcome(breaker, None)
+        if endpoint == "predictions":
+            self._observe(payload)
+        return payload
+
+    def _fetch_upstream(self, key: Hashable, params: dict[str, Any], endpoint: str = "predictions") -> MbtaPayload:
+        url = _ENDPOINT_URLS[endpoint](self._settings.mbta_base_url)
+        if not self._conditional:
+            return MbtaPayload(
+                self._http.get_json(url, params=params, headers=self._headers(), timeout_s=self._settings.timeout_s)
+            )
+
+        etag, last_modified, previous = self._validators_for(key)
+        resp = self._http.get_json_conditional(
+            url,
+            params=params,
+            headers=self._headers(),
+            timeout_s=self._settings.timeout_s,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        return self._apply_conditional(key, resp, previous)
+
+    async def _fetch_async(self, key: Hashable, params: dict[str, Any], priority: Priority) -> dict[str, Any]:
+        if self._async_http is None:
+            raise RuntimeError("MbtaV3Client was built without an async HTTP client")
+        if self._scheduler is not None:
+            await self._scheduler.acquire_async(priority)
+        breaker = self._breaker()
+        if breaker is not None:
+            breaker.before_call("MBTA predictions")
+        try:
+            payload = await self._fetch_upstream_async(key, params)
+        except RuntimeError as e:
+            _record_outcome(breaker, e)
+            raise
+        except asyncio.CancelledError:
+            # The caller gave up (deadline, disconnect, sibling failure); that says nothing about upstream
+            if breaker is not None:
+                breaker.record_abandoned()
+            raise
+        _record_outcome(breaker, None)
+        self._observe(payload)
+        return payload
+
+    async def _fetch_upstream_async(self, key: Hashable, params: dict[str, Any]) -> MbtaPayload:
+        assert self._async_http is not None
         url = predictions_url(self._settings.mbta_base_url)
+        if not self._conditional:
+            return MbtaPayload(
+                await self._async_http.get_json(
+                    url, params=params, headers=self._headers(), timeout_s=self._settings.timeout_s
+                )
+            )
+
+        etag, last_modified, previous = self._validators_for(key)
+        resp = await self._async_http.get_json_conditional(
+            url,
+            params=params,
+            headers=self._headers(),
+            timeout_s=self._settings.timeout_s,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        return self._apply_conditional(key, resp, previous)
+
+    def _validators_for(self, key: Hashable) -> tuple[str | None, str | None, MbtaPayload | None]:
+        with self._validators_lock:
+            entry = self._validators.get(key)
+            if entry is None:
+                return None, None, None
+            self._validators.move_to_end(key)
+            return entry
 
+    def _apply_conditional(
+            self,
+            key: Hashable,
+            resp: ConditionalResponse,
+            previous: MbtaPayload | None,
+    ) -> MbtaPayload:
+        if resp.not_modified:
+            if previous is None:
+                raise RuntimeError("Upstream answered 304 Not Modified for a query we have no payload for")
+            return previous
+
+        payload = MbtaPayload(resp.data or {})
+        if resp.etag or resp.last_modified:
+            with self._validators_lock:
+                self._validators[key] = (resp.etag, resp.last_modified, payload)
+                self._validators.move_to_end(key)
+                while len(self._validators) > self._max_validators:
+                    self._validators.popitem(last=False)
+        return payload
+
+    @staticmethod
+    def _predictions_params(
+            stop_filter: str,
+            route_id: str | None,
+            direction_id: int | None,
+            limit: int,
+            sort: str,
+            include: Literal["stop"] | None = None,
+    ) -> dict[str, Any]:
         params: dict[str, Any] = {
-            "filter[stop]": stop_id,
+            "filter[stop]": stop_filter,
             "page[limit]": limit,
             "sort": sort,
+            "fields[prediction]": PREDICTION_FIELDS,
         }
+        if include == "stop":
+            params["include"] = include
+            params["fields[stop]"] = STOP_FIELDS
         if route_id is not None:
             params["filter[route]"] = route_id
         if direction_id is not None:
             params["filter[direction_id]"] = direction_id
+        return params
 
-        headers: dict[str, str] = {}
+    def _headers(self) -> dict[str, str] | None:
         if self._settings.mbta_api_key:
-            headers["x-api-key"] = self._settings.mbta_api_key
+            return {"x-api-key": self._settings.mbta_api_key}
+        return None
 
-        return self._http.get_json(
-            url,
-            params=params,
-            headers=headers if headers else None,
-            timeout_s=self._settings.timeout_s,
-        )
-    
\ No newline at end of file
+
+def _record_outcome(breaker: CircuitBreaker | None, error: BaseException | None) -> None:
+    if breaker is None:
+        return
+    # A 4xx (other than 429) proves the endpoint is up; the request itself was bad
+    if error is None or (isinstance(error, HttpStatusError) and error.status_code < 500 and error.status_code != 429):
+        breaker.record_success()
+    elif not isinstance(error, RateLimitExceeded):
+        breaker.record_failure()
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import cached_property, lru_cache
+from typing import Any, Iterable, Literal
+
+from transit_app.domain.models import Prediction
+from transit_app.providers.mbta.mapper import parent_stations, parse_iso, related_id
+
+# Sentinel for a missing timestamp (int64 minimum, like numpy's NaT)
+NAT = -(2**63)
+# Sentinel for a missing interned id / direction
+MISSING = -1
+
+TimeColumn = Literal["arrival", "departure", "arrival_or_departure"]
+
+
+def epoch_seconds(value: Any) -> int:
+    """
+    Epoch seconds for an MBTA ISO-8601 timestamp, NAT if missing or unparseable.
+    Naive timestamps can't be placed on the timeline and map to NAT.
+    """
+    if not isinstance(value, str):
+        return NAT
+    return _epoch_seconds(value)
+
+
+@lru_cache(maxsize=4096)
+def _epoch_seconds(value: str) -> int:
+    # One payload repeats the same timestamps across stops and trips, so most calls are cache hits
+    parsed = parse_iso(value)
+    if parsed is None or parsed.tzinfo is None:
+        return NAT
+    return int(parsed.timestamp())
+
+
+@dataclass(frozen=True)
+class PredictionBatch:
+    """
+    Struct-of-arrays view of many predictions.
+
+    Why this exists:
+    - mapping hundreds of records into one Prediction object each dominates
+      CPU time for full-route and multi-stop payloads
+    - filtering, sorting and trip joins only need ids and times, so they run
+      over flat int arrays instead of per-row objects
+
+    Ids are interned: `stop`, `route` and `trip` hold indexes into `strings`
+    (MISSING if absent). Times are epoch seconds (NAT if absent).
+    Batches derived with `take`/`filter` share the parent's string table.
+    """
+
+    strings: tuple[str, ...]
+    stop: array
+    route: array
+    trip: array
+    direction: array
+    arrival: array
+    departure: array
+
+    def __len__(self) -> int:
+        return len(self.stop)
+
+    def code_of(self, value: str) -> int:
+        """Interned code of `value` in this batch, MISSING if it never occurs."""
+        return self._codes.get(value, MISSING)
+
+    @cached_property
+    def _codes(self) -> dict[str, int]:
+        # string -> code, built on the first lookup (frozen dataclasses still allow cached_property)
+        return {value: code for code, value in enumerate(self.strings)}
+
+    def string(self, code: int) -> str | None:
+        return self.strings[code] if code != MISSING else None
+
+    def times(self, column: TimeColumn) -> array:
+        if column == "arrival":
+            return self.arrival
+        if column == "departure":
+            return self.departure
+        return array("q", (a if a != NAT else d for a, d in zip(self.arrival, self.departure)))
+
+    def take(self, indexes: Iterable[int]) -> PredictionBatch:
+        idx = list(indexes)
+        return PredictionBatch(
+            strings=self.strings,
+            stop=array("l", (self.stop[i] for i in idx)),
+            route=array("l", (self.route[i] for i in idx)),
+            trip=array("l", (self.trip[i] for i in idx)),
+            direction=array("b", (self.direction[i] for i in idx)),
+            arrival=array("q", (self.arrival[i] for i in idx)),
+            departure=array("q", (self.departure[i] for i in idx)),
+        )
+
+    def filter(
+        self,
+        *,
+        stop_ids: Iterable[str] | None = None,
+        route_id: str | None = None,
+        direction_id: int | None = None,
+        require: TimeColumn | None = None,
+    ) -> PredictionBatch:
+        """Rows matching every given condition; `require` drops rows without that time."""
+        keep = range(len(self))
+        if stop_ids is not None:
+            # An id absent from the batch must not match rows whose stop is MISSING
+            codes = {self.code_of(s) for s in stop_ids} - {MISSING}
+            stop = self.stop
+            keep = [i for i in keep if stop[i] in codes]
+        if route_id is not None:
+            code = self.code_of(route_id)
+            if code == MISSING:
+                return self.take([])
+            route = self.route
+            keep = [i for i in keep if route[i] == code]
+        if direction_id is not None:
+            direction = self.direction
+            keep = [i for i in keep if direction[i] == direction_id]
+        if require is not None:
+            times = self.times(require)
+            keep = [i for i in keep if times[i] != NAT]
+        return self.take(keep)
+
+    def argsort(self, column: TimeColumn = "departure") -> list[int]:
+        """Row order by time, missing times last (stable)."""
+        times = self.times(column)
+        return sorted(range(len(self)), key=lambda i: (times[i] == NAT, times[i]))
+
+    def sort_by(self, column: TimeColumn = "departure") -> PredictionBatch:
+        return self.take(self.argsort(column))
+
+    def earliest_by_trip(self, column: TimeColumn = "arrival_or_departure") -> dict[str, int]:
+        """trip id -> earliest time in `column` (rows without a trip or time are skipped)."""
+        times = self.times(column)
+        best: dict[int, int] = {}
+        for code, t in zip(self.trip, times):
+            if code == MISSING or t == NAT:
+                continue
+            if code not in best or t < best[code]:
+                best[code] = t
+        return {self.strings[code]: t for code, t in best.items()}
+
+    def to_predictions(self) -> list[Prediction]:
+        """Materialize row objects (only for the rows you actually need)."""
+        return [
+            Prediction(
+                stop_id=self.strings[self.stop[i]],
+                route_id=self.string(self.route[i]),
+                trip_id=self.string(self.trip[i]),
+                direction_id=self.direction[i] if self.direction[i] != MISSING else None,
+                arrival_time=_to_datetime(self.arrival[i]),
+                departure_time=_to_datetime(self.departure[i]),
+            )
+            for i in range(len(self))
+        ]
+
+
+def _to_datetime(epoch_s: int) -> datetime | None:
+    return datetime.fromtimestamp(epoch_s, tz=timezone.utc) if epoch_s != NAT else None
+
+
+def prediction_batch_from_mbta(payload: dict[str, Any], *, parents: dict[str, str] | None = None) -> PredictionBatch:
+    """
+    Columnar counterpart of `predictions_from_mbta`.
+    With `parents` (child stop -> parent station), platform stops are
+    recorded under their parent station id.
+    """
+    # Interned id -> code; insertion order is the string table
+    codes: dict[str, int] = {}
+    stop, route, trip = array("l"), array("l"), array("l")
+    direction, arrival, departure = array("b"), array("q"), array("q")
+    for item in payload.get("data", []):
+        rel = item.get("relationships", {}) or {}
+        stop_id = related_id(rel, "stop")
+        if not isinstance(stop_id, str) or not stop_id:
+            continue
+        if parents:
+            stop_id = parents.get(stop_id, stop_id)
+        route_id = related_id(rel, "route")
+        trip_id = related_id(rel, "trip")
+        attrs = item.get("attributes", {}) or {}
+        direction_id = attrs.get("direction_id")
+        arrival_time = attrs.get("arrival_time")
+        departure_time = attrs.get("departure_time")
+
+        stop.append(codes.setdefault(stop_id, len(codes)))
+        route.append(codes.setdefault(route_id, len(codes)) if isinstance(route_id, str) else MISSING)
+        trip.append(codes.setdefault(trip_id, len(codes)) if isinstance(trip_id, str) else MISSING)
+        direction.append(direction_id if type(direction_id) is int and direction_id in (0, 1) else MISSING)
+        arrival.append(_epoch_seconds(arrival_time) if isinstance(arrival_time, str) else NAT)
+        departure.append(_epoch_seconds(departure_time) if isinstance(departure_time, str) else NAT)
+
+    return PredictionBatch(
+        strings=tuple(codes),
+        stop=stop,
+        route=route,
+        trip=trip,
+        direction=direction,
+        arrival=arrival,
+        departure=departure,
+    )
+
+
+def prediction_batches_by_stop(payload: dict[str, Any], stop_ids: list[str]) -> dict[str, PredictionBatch]:
+    """Columnar counterpart of `predictions_by_stop` (platforms attributed to parent stations)."""
+    wanted = set(stop_ids)
+    parents = {child: parent for child, parent in parent_stations(payload).items() if child not in wanted}
+    batch = prediction_batch_from_mbta(payload, parents=parents)
+    return {stop_id: batch.filter(stop_ids=[stop_id]) for stop_id in stop_ids}
@@ -6,3 +6,10 @@ def predictions(base_url: str) -> str:
     Build the MBTA predictions endpoint URL.
     """
     return urljoin(base_url.rstrip("/") + "/", "predictions")
+
+
+def alerts(base_url: str) -> str:
+    """
+    Build the MBTA alerts endpoint URL.
+    """
+    return urljoin(base_url.rstrip("/") + "/", "alerts")
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from transit_app.providers.mbta.columnar import MISSING, NAT, prediction_batch_from_mbta
+from transit_app.providers.mbta.mapper import parent_stations
+from transit_app.services.headways import Departure, HeadwayTracker
+
+
+def departures_from_mbta(payload: dict[str, Any]) -> list[Departure]:
+    """
+    Predicted departures in a JSON:API predictions document, as HeadwayTracker
+    takes them. Rows without a trip, route or departure time are skipped; a
+    platform's rows are repeated under its parent station when the payload
+    includes stop resources.
+    """
+    batch = prediction_batch_from_mbta(payload)
+    if not len(batch):
+        return []
+    parents = parent_stations(payload)
+    strings = batch.strings
+    out: list[Departure] = []
+    for i in range(len(batch)):
+        departure_s, route, trip, stop = batch.departure[i], batch.route[i], batch.trip[i], batch.stop[i]
+        if departure_s == NAT or route == MISSING or trip == MISSING or stop == MISSING:
+            continue
+        direction = batch.direction[i]
+        direction_id = direction if direction != MISSING else None
+        stop_id = strings[stop]
+        for sid in (stop_id, parents.get(stop_id)):
+            if sid is not None:
+                out.append((sid, strings[route], direction_id, strings[trip], departure_s))
+    return out
+
+
+@dataclass(frozen=True)
+class HeadwayObserverStats:
+    observed_payloads: int
+    dropped_payloads: int
+    errors: int
+
+
+class HeadwayObserver:
+    """
+    Feeds prediction payloads to a HeadwayTracker without slowing callers.
+
+    Why this exists:
+    - payload observers run on request threads and the event loop, and must
+      not block: `record_payload` only appends a reference to a bounded queue
+    - mapping payloads to departures and updating the tracker (under its
+      lock) happen on a background thread, every `flush_interval_s`
+
+    When the queue holds `max_pending` payloads, new ones are dropped (and
+    counted); the next poll of the same stops carries the same departures.
+    """
+
+    def __init__(
+        self,
+        tracker: HeadwayTracker,
+        *,
+        max_pending: int = 1000,
+        flush_interval_s: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_pending <= 0:
+            raise ValueError("max_pending must be positive")
+        self._tracker = tracker
+        self._max_pending = max_pending
+        self._flush_interval_s = flush_interval_s
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        self._pending: deque[tuple[float, dict[str, Any]]] = deque()
+        self._observed = 0
+        self._dropped = 0
+        self._errors = 0
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+    def record_payload(self, payload: dict[str, Any], captured_at: float | None = None) -> bool:
+        """
+        Queue a JSON:API predictions payload (treated as read-only).
+        Returns False if it was dropped because the queue is full.
+        """
+        at = self._clock() if captured_at is None else captured_at
+        with self._cond:
+            if len(self._pending) >= self._max_pending:
+                self._dropped += 1
+                return False
+            self._pending.append((at, payload))
+        return True
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="headway-observer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 1.0) -> None:
+        """Process what's queued and stop the background thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_s)
+            self._thread = None
+        else:
+            self.flush()
+
+    def flush(self) -> None:
+        """Feed every queued payload to the tracker, oldest first."""
+        with self._cond:
+            pending = list(self._pending)
+            self._pending.clear()
+        for at, payload in pending:
+            try:
+                self._tracker.observe(departures_from_mbta(payload), captured_at=at)
+            except Exception:
+                # A malformed payload must not stop the rest from being observed
+                with self._cond:
+                    self._errors += 1
+                continue
+            with self._cond:
+                self._observed += 1
+
+    def stats(self) -> HeadwayObserverStats:
+        with self._cond:
+            return HeadwayObserverStats(
+                observed_payloads=self._observed,
+                dropped_payloads=self._dropped,
+                errors=self._errors,
+            )
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping:
+                    self._cond.wait(timeout=self._flush_interval_s)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
@@ -1,65 +1,166 @@
 from __future__ import annotations
 
+import sys
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Optional
 
 from transit_app.domain.models import Prediction
+from transit_app.http.json_backend import JsonBackend, json_backend
 
 def _parse_time(value: Any) -> Optional[datetime]:
     if value is None:
         return None
     if not isinstance(value, str):
         return None
+    return parse_iso(value)
+
+@lru_cache(maxsize=4096)
+def parse_iso(value: str) -> Optional[datetime]:
+    """Parse an MBTA timestamp; None if it isn't valid ISO 8601."""
+    # One payload repeats the same timestamps across stops and trips; datetimes
+    # are immutable, so cache hits share one object instead of re-parsing.
     # MBTA uses ISO 8601 timestamps, often with timezone offset
     try:
         # Python 3.10 supports fromisoformat with offsets like "+00:00"
         return datetime.fromisoformat(value.replace("Z", "+00:00"))
     except ValueError:
         return None
-    
+
+def _intern(value: Any) -> Optional[str]:
+    # Ids repeat across every cached payload; interning keeps one copy of each
+    return sys.intern(value) if isinstance(value, str) else None
+
+def related_id(rel: dict[str, Any], name: str) -> Any:
+    """Id of the `name` relationship in a JSON:API `relationships` object, or None."""
+    # Trimmed payloads may carry `{"data": null}` or omit the relationship entirely
+    linkage = (rel.get(name) or {}).get("data") or {}
+    return linkage.get("id")
+
+class MbtaPayload(dict):
+    """
+    A raw MBTA JSON:API document that remembers its mapped predictions.
+
+    The client hands out the same MbtaPayload object for cache hits and
+    304 Not Modified responses, so the payload is only mapped once.
+    `stale` marks a last-known-good copy served while upstream is unavailable.
+    """
+
+    mapped: Optional[list[Prediction]] = None
+    stale: bool = False
+    age_s: float = 0.0
+
+    def as_stale(self, age_s: float) -> "MbtaPayload":
+        """Shallow copy flagged as stale; shares the mapped predictions."""
+        copy = MbtaPayload(self)
+        copy.mapped = self.mapped
+        copy.stale = True
+        copy.age_s = age_s
+        return copy
+
+def prediction_from_resource(item: dict[str, Any]) -> Optional[Prediction]:
+    """Map one JSON:API prediction resource; None if its stop can't be identified."""
+    attrs = item.get("attributes", {}) or {}
+    rel = item.get("relationships", {}) or {}
+
+    stop_id = related_id(rel, "stop")
+    if not isinstance(stop_id, str) or not stop_id:
+        # If we can't identify the stop, skip the record
+        return None
+    route_id = related_id(rel, "route")
+    trip_id = related_id(rel, "trip")
+
+    direction_id = attrs.get("direction_id")
+    if not isinstance(direction_id, int):
+        direction_id = None
+
+    arrival_time = _parse_time(attrs.get("arrival_time"))
+    departure_time = _parse_time(attrs.get("departure_time"))
+
+    return Prediction(
+        stop_id=sys.intern(stop_id),
+        route_id=_intern(route_id),
+        trip_id=_intern(trip_id),
+        direction_id=direction_id,
+        arrival_time=arrival_time,
+        departure_time=departure_time,
+    )
+
 def predictions_from_mbta(payload: dict[str, Any]) -> list[Prediction]:
-    data = payload.get("data", [])
+    if isinstance(payload, MbtaPayload) and payload.mapped is not None:
+        return list(payload.mapped)
+
     out: list[Prediction] = []
+    for item in payload.get("data", []):
+        prediction = prediction_from_resource(item)
+        if prediction is not None:
+            out.append(prediction)
+
+    if isinstance(payload, MbtaPayload):
+        payload.mapped = out
+        return list(out)
+    return out
+
+
+_default_json: Optional[JsonBackend] = None
+
+def payload_from_bytes(body: bytes, *, json: Optional[JsonBackend] = None) -> MbtaPayload:
+    """
+    Decode a raw predictions response body (see HttpClient.get_bytes) with the
+    fastest installed JSON backend, skipping requests' stdlib `resp.json()`.
+    """
+    global _default_json
+    if json is None:
+        if _default_json is None:
+            _default_json = json_backend("auto")
+        json = _default_json
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        raise RuntimeError(f"Expected a JSON predictions document. Body: {body[:500]!r}") from e
+    if not isinstance(data, dict):
+        raise RuntimeError("Expected a JSON:API document (object) for predictions")
+    return MbtaPayload(data)
+
+def predictions_from_bytes(body: bytes, *, json: Optional[JsonBackend] = None) -> list[Prediction]:
+    return predictions_from_mbta(payload_from_bytes(body, json=json))
+
+
+def parent_station_of(item: dict[str, Any]) -> Optional[str]:
+    """Parent station id of a JSON:API stop resource, if it has one."""
+    parent_id = related_id(item.get("relationships", {}) or {}, "parent_station")
+    return parent_id if isinstance(parent_id, str) else None
+
+
+def parent_stations(payload: dict[str, Any]) -> dict[str, str]:
+    """Map child stop id (platform) -> parent station id from `included` stop resources."""
+    parents: dict[str, str] = {}
+    for item in payload.get("included", []) or []:
+        if item.get("type") != "stop":
+            continue
+        parent_id = parent_station_of(item)
+        if isinstance(item.get("id"), str) and parent_id is not None:
+            parents[item["id"]] = parent_id
+    return parents
+
+
+def predictions_by_stop(payload: dict[str, Any], stop_ids: list[str]) -> dict[str, list[Prediction]]:
+    """
+    Split a multi-stop predictions payload back into one list per requested stop.
+
+    MBTA reports predictions against platform (child) stops, so a prediction is
+    attributed to a requested parent station via the `included` stop resources.
+    Predictions for stops that were not requested are dropped.
+    """
+    wanted = set(stop_ids)
+    parents = parent_stations(payload)
+    out: dict[str, list[Prediction]] = {stop_id: [] for stop_id in stop_ids}
 
-    for item in data:
-        attrs = item.get("attributes", {}) or {}
-        rel = item.get("relationships", {}) or {}
-
-        stop_id = (
-            rel.get("stop", {})
-            .get("data", {})
-            .get("id")
-        )
-        if not isinstance(stop_id, str) or not stop_id:
-            # If we can't identify the stop, skip the record
+    for p in predictions_from_mbta(payload):
+        if p.stop_id in wanted:
+            out[p.stop_id].append(p)
             continue
-        route_id = (
-            rel.get("route", {})
-            .get("data", {})
-            .get("id")
-        )
-
-        trip_id = (
-            rel.get("trip", {})
-            .get("data", {})
-            .get("id")
-        )
-
-        direction_id = attrs.get("direction_id")
-        if not isinstance(direction_id, int):
-            direction_id = None
-        
-        arrival_time = _parse_time(attrs.get("arrival_time"))
-        departure_time = _parse_time(attrs.get("departure_time"))
-
-        out.append(
-            Prediction(
-                stop_id=stop_id,
-                route_id=route_id if isinstance(route_id, str) else None,
-                trip_id=trip_id if isinstance(trip_id, str) else None,
-                direction_id=direction_id,
-                arrival_time=arrival_time,
-                departure_time=departure_time,
-            )
-        )
-    return out
\ No newline at end of file
+        parent = parents.get(p.stop_id)
+        if parent in wanted:
+            out[parent].append(p)
+    return out
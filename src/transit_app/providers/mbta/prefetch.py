@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Hashable, Sequence
+
+from transit_app.http.rate_limit import RateLimitExceeded, TokenBucketScheduler
+from transit_app.providers.mbta.client import MbtaV3Client
+from transit_app.services.headways import HeadwayTracker
+
+# Prefetched entries stay fresh this much longer than their refresh interval,
+# so a slow upstream call doesn't open a cold gap before the next refresh lands
+_TTL_SLACK = 1.5
+
+
+class PopularityCounter:
+    """
+    Exponentially decayed hit counts: a hit `half_life_s` ago weighs half a
+    hit now.
+
+    Hits add a weight that grows with time instead of decaying every count,
+    so `hit` is O(1); the reference point is moved forward (all weights
+    rescaled) before the weights get large. At most `max_keys` keys are kept;
+    past that, the coldest quarter is dropped.
+    """
+
+    def __init__(
+        self,
+        *,
+        half_life_s: float = 600.0,
+        max_keys: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if half_life_s <= 0:
+            raise ValueError("half_life_s must be positive")
+        if max_keys <= 0:
+            raise ValueError("max_keys must be positive")
+        self._half_life_s = half_life_s
+        self._max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._weights: dict[Hashable, float] = {}
+        self._origin = clock()
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def hit(self, key: Hashable) -> None:
+        with self._lock:
+            exponent = (self._clock() - self._origin) / self._half_life_s
+            if exponent > 64:
+                self._rebase(exponent)
+                exponent = 0.0
+            self._weights[key] = self._weights.get(key, 0.0) + 2.0**exponent
+            if len(self._weights) > self._max_keys:
+                keep = heapq.nlargest(self._max_keys * 3 // 4, self._weights.items(), key=lambda kv: kv[1])
+                self._weights = dict(keep)
+
+    def top(self, k: int) -> list[tuple[Hashable, float]]:
+        """The `k` most popular keys with their decayed hit counts, most popular first."""
+        with self._lock:
+            scale = 2.0 ** -((self._clock() - self._origin) / self._half_life_s)
+            return [(key, w * scale) for key, w in heapq.nlargest(k, self._weights.items(), key=lambda kv: kv[1])]
+
+    def _rebase(self, exponent: float) -> None:
+        # Caller holds self._lock
+        scale = 2.0**-exponent
+        self._weights = {key: w * scale for key, w in self._weights.items() if w * scale > 1e-9}
+        self._origin = self._clock()
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """One polled predictions query, exactly as JourneyEstimator asks it (one cache key)."""
+
+    stop_ids: tuple[str, ...]
+    route_id: str
+    limit: int
+
+
+@dataclass(frozen=True)
+class PrefetchStats:
+    tracked: int
+    refreshed: int
+    failed: int
+    over_budget: int
+    # Passes that raised (a bug or a broken dependency); the thread keeps going
+    errors: int
+
+
+class HotStopPrefetcher:
+    """
+    Keeps the prediction cache warm for the queries users ask most.
+
+    Why this exists:
+    - the first user to ask about a stop after the cache TTL pays the full
+      upstream latency; for busy stops that's a steady trickle of slow requests
+    - refreshing a handful of hot queries in the background costs a bounded,
+      configurable share of the upstream budget
+
+    JourneyEstimator `record`s each query it has to poll. Every `tick_s` the
+    top `top_k` queries by decayed popularity that are due are refreshed,
+    hottest first, through `MbtaV3Client.refresh_predictions_many` at
+    BACKGROUND priority. A query's interval follows its service: the rolling
+    headway at the origin times `headway_fraction`, clamped to
+    [`min_interval_s`, `max_interval_s`] (`min_interval_s` until a headway
+    is known), and its cache entry stays fresh until just after the next
+    refresh. Refreshes beyond `budget_per_min` are skipped, not queued;
+    failed ones are retried after `min_interval_s`.
+
+    With `leader`, a pass only runs while `leader()` is true, so one worker
+    process refreshes a shared cache for all of them (see
+    SharedPredictionCache.hold_lease); every worker still `record`s.
+    """
+
+    def __init__(
+        self,
+        mbta_client: MbtaV3Client,
+        *,
+        top_k: int = 50,
+        budget_per_min: float = 200.0,
+        headways: HeadwayTracker | None = None,
+        headway_fraction: float = 0.1,
+        min_interval_s: float = 10.0,
+        max_interval_s: float = 60.0,
+        half_life_s: float = 600.0,
+        tick_s: float = 1.0,
+        leader: Callable[[], bool] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if top_k <= 0 or budget_per_min <= 0:
+            raise ValueError("top_k and budget_per_min must be positive")
+        if not 0 < min_interval_s <= max_interval_s:
+            raise ValueError("need 0 < min_interval_s <= max_interval_s")
+        self._mbta = mbta_client
+        self._top_k = top_k
+        self._headways = headways
+        self._headway_fraction = headway_fraction
+        self._min_interval_s = min_interval_s
+        self._max_interval_s = max_interval_s
+        self._tick_s = tick_s
+        self._leader = leader
+        self._clock = clock
+        self._popularity = PopularityCounter(half_life_s=half_life_s, max_keys=max(1000, 20 * top_k), clock=clock)
+        self._budget = TokenBucketScheduler(
+            rate_per_s=budget_per_min / 60.0,
+            # Up to ten seconds' worth at once, e.g. the first pass after startup
+            burst=max(1, int(budget_per_min / 6)),
+            background_reserve=0.0,
+            clock=clock,
+        )
+        self._due_at: dict[HotQuery, float] = {}
+        self._refreshed = 0
+        self._failed = 0
+        self._over_budget = 0
+        self._errors = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record(self, stop_ids: Sequence[str], route_id: str, limit: int) -> None:
+        """Count one interactive query (cheap; called on the request path)."""
+        self._popularity.hit(HotQuery(stop_ids=tuple(stop_ids), route_id=route_id, limit=limit))
+
+    def interval_for(self, query: HotQuery) -> float:
+        """Refresh interval in seconds: shorter for frequent service, longer for sparse."""
+        headway_s: float | None = None
+        if self._headways is not None:
+            # The query doesn't pin a direction; follow the busier one
+            for direction_id in (0, 1):
+                stats = self._headways.stats(query.stop_ids[0], query.route_id, direction_id)
+                if stats is not None and (headway_s is None or stats.p50_s < headway_s):
+                    headway_s = stats.p50_s
+        if headway_s is None:
+            return self._min_interval_s
+        return min(self._max_interval_s, max(self._min_interval_s, headway_s * self._headway_fraction))
+
+    def run_once(self) -> int:
+        """Refresh the hot queries that are due. Returns how many were refreshed."""
+        if self._leader is not None and not self._leader():
+            return 0
+        now = self._clock()
+        hot = [query for query, _ in self._popularity.top(self._top_k)]
+        # Forget schedules of queries that fell out of the top K
+        due_at = {query: self._due_at.get(query, now) for query in hot}
+        refreshed = 0
+        for i, query in enumerate(hot):
+            if due_at[query] > now:
+                continue
+            try:
+                self._budget.acquire(max_wait_s=0.0)
+            except RateLimitExceeded:
+                self._over_budget += sum(1 for q in hot[i:] if due_at[q] <= now)
+                break
+            interval_s = self.interval_for(query)
+            try:
+                self._mbta.refresh_predictions_many(
+                    stop_ids=list(query.stop_ids),
+                    route_id=query.route_id,
+                    limit=query.limit,
+                    ttl_s=interval_s * _TTL_SLACK,
+                )
+            except RuntimeError:
+                self._failed += 1
+                due_at[query] = now + self._min_interval_s
+                continue
+            self._refreshed += 1
+            refreshed += 1
+            due_at[query] = now + interval_s
+        self._due_at = due_at
+        return refreshed
+
+    def stats(self) -> PrefetchStats:
+        return PrefetchStats(
+            tracked=len(self._popularity),
+            refreshed=self._refreshed,
+            failed=self._failed,
+            over_budget=self._over_budget,
+            errors=self._errors,
+        )
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mbta-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 1.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_s)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                # Prefetching is best effort: a failed pass must not stop later ones
+                self._errors += 1
+            self._stop.wait(self._tick_s)
@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from json import dumps
+from typing import Any, Awaitable, Callable, Hashable
+
+from transit_app.http.json_backend import JsonBackend, json_backend
+from transit_app.providers.mbta.cache import CacheStats, _Flight
+from transit_app.providers.mbta.mapper import MbtaPayload
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    stored_at REAL NOT NULL,
+    ttl_s REAL NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# Expired rows are swept every this many writes
+_PURGE_EVERY = 256
+
+# What a waiting caller should do next (see _elect)
+_HIT, _STALE, _LEAD, _WAIT = range(4)
+
+
+class SharedPredictionCache:
+    """
+    Prediction payload cache shared by every worker process on a host,
+    stored in a SQLite database in WAL mode.
+
+    Why this exists:
+    - with several uvicorn workers, an in-process PredictionCache is
+      duplicated per worker, and each worker polls MBTA for the same stops
+    - WAL lets any number of readers run alongside one writer, so a hit
+      costs one indexed read and no cross-process lock
+
+    Same contract as PredictionCache (see ResponseCache): TTL, single-flight
+    loads, stale copies (up to `stale_max_age_s` old) for `serve_stale` /
+    `get_stale`, per-entry TTLs via `put`. Within a process, concurrent
+    misses share one load as before.
+    Across processes one writer per key is elected with a lease row. Other
+    workers serve the stale copy if they're allowed to. Otherwise they poll
+    for the elected writer's result, and load it themselves if the lease
+    (`lease_s`) runs out first. A failed load releases its lease right away.
+    On the async path, every query (a write can wait up to `lease_s` for
+    SQLite's write lock) and payload decode runs in a worker thread, off the
+    event loop. A SQLite error is treated as a miss: the caller loads from
+    upstream and the result just isn't shared.
+
+    `hold_lease` elects one process for host-wide background work (e.g. the
+    prefetcher), with the same lease table.
+
+    Values must be JSON documents. They are stored as JSON and come back as
+    MbtaPayload (decoded with `json`, a JsonBackend). Each process keeps the
+    decoded payload for the newest version of up to `max_entries` keys, so
+    repeated hits don't decode or re-map it. Rows older than `keep_s` are
+    swept; they couldn't be served even as stale.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        ttl_s: float,
+        max_entries: int = 1024,
+        keep_s: float = 600.0,
+        lease_s: float = 5.0,
+        poll_s: float = 0.02,
+        json: JsonBackend | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if ttl_s <= 0:
+            raise ValueError("ttl_s must be positive")
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self._path = os.fspath(path)
+        self._ttl_s = ttl_s
+        self._max_entries = max_entries
+        self._keep_s = max(keep_s, ttl_s)
+        self._lease_s = lease_s
+        self._poll_s = poll_s
+        self._json = json or json_backend()
+        # Wall clock: timestamps are compared across processes
+        self._clock = clock
+        self._owner = uuid.uuid4().hex
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # key -> (stored_at, decoded payload) for the newest version this process has seen
+        self._decoded: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._flights: dict[str, _Flight] = {}
+        self._async_flights: dict[str, asyncio.Future[Any]] = {}
+        self._writes = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+        self._db().executescript(_SCHEMA)
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        *,
+        serve_stale: Callable[[Any, float], Any] | None = None,
+        stale_max_age_s: float | None = None,
+    ) -> Any:
+        k = _encode_key(key)
+        found, value = self._lookup(k)
+        if found:
+            with self._lock:
+                self._hits += 1
+            return value
+
+        with self._lock:
+            flight = self._flights.get(k)
+            leader = flight is None
+            if leader:
+                flight = self._flights[k] = _Flight()
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            stale = self._stale(k, stale_max_age_s) if serve_stale is not None else None
+            if stale is not None:
+                return serve_stale(*stale)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._load_elected(k, loader, serve_stale, stale_max_age_s)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[k]
+            flight.done.set()
+        return flight.value
+
+    async def get_or_load_async(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        *,
+        serve_stale: Callable[[Any, float], Any] | None = None,
+        stale_max_age_s: float | None = None,
+    ) -> Any:
+        k = _encode_key(key)
+        found, value = await asyncio.to_thread(self._lookup, k)
+        if found:
+            with self._lock:
+                self._hits += 1
+            return value
+
+        with self._lock:
+            pending = self._async_flights.get(k)
+            leader = pending is None
+            if leader:
+                pending = self._async_flights[k] = asyncio.get_running_loop().create_future()
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            stale = await asyncio.to_thread(self._stale, k, stale_max_age_s) if serve_stale is not None else None
+            if stale is not None:
+                return serve_stale(*stale)
+            # shield: one waiter being cancelled must not cancel the shared load
+            return await asyncio.shield(pending)
+
+        try:
+            value = await self._load_elected_async(k, loader, serve_stale, stale_max_age_s)
+            pending.set_result(value)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                pending.set_exception(RuntimeError("Shared upstream load was cancelled"))
+            else:
+                pending.set_exception(e)
+            pending.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._async_flights[k]
+        return value
+
+    def put(self, key: Hashable, value: Any, *, ttl_s: float | None = None) -> None:
+        """Store `value` as fresh for `ttl_s` (default: the cache TTL)."""
+        if ttl_s is not None and ttl_s <= 0:
+            raise ValueError("ttl_s must be positive")
+        self._store(_encode_key(key), value, ttl_s)
+
+    def get_stale(self, key: Hashable, max_age_s: float | None = None) -> tuple[Any, float] | None:
+        """Last stored value for `key` and its age in seconds, fresh or not."""
+        return self._stale(_encode_key(key), max_age_s)
+
+    def stats(self) -> CacheStats:
+        (size,) = self._db().execute("SELECT COUNT(*) FROM entries").fetchone()
+        with self._lock:
+            return CacheStats(hits=self._hits, misses=self._misses, coalesced=self._coalesced, size=size)
+
+    def clear(self) -> None:
+        """Drop every entry, for all processes."""
+        db = self._db()
+        db.execute("DELETE FROM entries")
+        db.execute("DELETE FROM leases")
+        with self._lock:
+            self._decoded.clear()
+
+    def _load_elected(
+        self,
+        k: str,
+        loader: Callable[[], Any],
+        serve_stale: Callable[[Any, float], Any] | None,
+        stale_max_age_s: float | None,
+    ) -> Any:
+        deadline = self._clock() + self._lease_s
+        while True:
+            step, value = self._elect(k, serve_stale is not None, stale_max_age_s, deadline)
+            if step == _HIT:
+                return value
+            if step == _STALE:
+                return serve_stale(*value)
+            if step == _LEAD:
+                break
+            time.sleep(self._poll_s)
+        try:
+            value = loader()
+            self._store(k, value, None)
+        finally:
+            self._release(k)
+        return value
+
+    async def _load_elected_async(
+        self,
+        k: str,
+        loader: Callable[[], Awaitable[Any]],
+        serve_stale: Callable[[Any, float], Any] | None,
+        stale_max_age_s: float | None,
+    ) -> Any:
+        deadline = self._clock() + self._lease_s
+        while True:
+            step, value = await asyncio.to_thread(self._elect, k, serve_stale is not None, stale_max_age_s, deadline)
+            if step == _HIT:
+                return value
+            if step == _STALE:
+                return serve_stale(*value)
+            if step == _LEAD:
+                break
+            await asyncio.sleep(self._poll_s)
+        try:
+            value = await loader()
+            await asyncio.to_thread(self._store, k, value, None)
+        finally:
+            await asyncio.to_thread(self._release, k)
+        return value
+
+    def _elect(
+        self,
+        k: str,
+        allow_stale: bool,
+        stale_max_age_s: float | None,
+        deadline: float,
+    ) -> tuple[int, Any]:
+        """One round of waiting for another process's load: what to do next (_STALE comes with (value, age))."""
+        found, value = self._lookup(k)
+        if found:
+            # Loaded by the elected writer in another process
+            with self._lock:
+                self._coalesced += 1
+            return _HIT, value
+        if self._claim(k):
+            with self._lock:
+                self._misses += 1
+            return _LEAD, None
+        if allow_stale:
+            stale = self._stale(k, stale_max_age_s)
+            if stale is not None:
+                with self._lock:
+                    self._coalesced += 1
+                return _STALE, stale
+        if self._clock() >= deadline:
+            # The elected writer is stuck or gone; load without a lease
+            with self._lock:
+                self._misses += 1
+            return _LEAD, None
+        return _WAIT, None
+
+    def hold_lease(self, name: str, lease_s: float) -> bool:
+        """
+        Take or renew the host-wide lease `name` for `lease_s` seconds. True
+        while this process holds it; another process can take it over once it
+        hasn't been renewed for `lease_s`.
+        """
+        now = self._clock()
+        owner = self._owner_id()
+        try:
+            cursor = self._db().execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at <= ? OR leases.owner = excluded.owner",
+                ("lease:" + name, owner, now + lease_s, now),
+            )
+        except sqlite3.Error:
+            return False
+        return cursor.rowcount == 1
+
+    def _claim(self, k: str) -> bool:
+        now = self._clock()
+        try:
+            cursor = self._db().execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at <= ?",
+                (k, self._owner_id(), now + self._lease_s, now),
+            )
+        except sqlite3.Error:
+            # Can't coordinate: load without a lease
+            return True
+        return cursor.rowcount == 1
+
+    def _release(self, k: str) -> None:
+        try:
+            self._db().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (k, self._owner_id()))
+        except sqlite3.Error:
+            pass  # the lease runs out by itself
+
+    def _owner_id(self) -> str:
+        # A cache built before uvicorn forks its workers is shared by all of them
+        return f"{self._owner}-{os.getpid()}"
+
+    def _lookup(self, k: str) -> tuple[bool, Any]:
+        entry = self._read(k)
+        if entry is None:
+            return False, None
+        stored_at, ttl_s, value = entry
+        if self._clock() - stored_at >= ttl_s:
+            return False, None
+        return True, value
+
+    def _stale(self, k: str, max_age_s: float | None = None) -> tuple[Any, float] | None:
+        entry = self._read(k)
+        if entry is None:
+            return None
+        stored_at, _, value = entry
+        age_s = self._clock() - stored_at
+        if max_age_s is not None and age_s > max_age_s:
+            return None
+        return value, age_s
+
+    def _read(self, k: str) -> tuple[float, float, Any] | None:
+        with self._lock:
+            decoded = self._decoded.get(k)
+        # The payload column is only read when this process hasn't decoded that version yet
+        try:
+            row = self._db().execute(
+                "SELECT stored_at, ttl_s, CASE WHEN stored_at = ? THEN NULL ELSE payload END FROM entries WHERE key = ?",
+                (decoded[0] if decoded is not None else None, k),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        stored_at, ttl_s, payload = row
+        if payload is None and decoded is not None:
+            value = decoded[1]
+        else:
+            value = MbtaPayload(self._json.loads(payload))
+            self._remember(k, stored_at, value)
+        return stored_at, ttl_s, value
+
+    def _store(self, k: str, value: Any, ttl_s: float | None) -> None:
+        stored_at = self._clock()
+        payload = dumps(value, separators=(",", ":")).encode()
+        self._remember(k, stored_at, value)
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % _PURGE_EVERY == 0
+        try:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, stored_at, ttl_s, payload) VALUES (?, ?, ?, ?)",
+                (k, stored_at, self._ttl_s if ttl_s is None else ttl_s, payload),
+            )
+            if purge:
+                db.execute("DELETE FROM entries WHERE stored_at < ?", (stored_at - self._keep_s,))
+        except sqlite3.Error:
+            pass  # not shared this time; the caller already has the value
+
+    def _remember(self, k: str, stored_at: float, value: Any) -> None:
+        with self._lock:
+            self._decoded[k] = (stored_at, value)
+            self._decoded.move_to_end(k)
+            while len(self._decoded) > self._max_entries:
+                self._decoded.popitem(last=False)
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per thread, reopened after a fork (connections can't cross processes)
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self._path, timeout=self._lease_s, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+def _encode_key(key: Hashable) -> str:
+    # Cache keys are tuples of str / int / None, whose repr is the same in every process
+    return repr(key)
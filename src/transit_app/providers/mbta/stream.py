@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+
+from transit_app.config.settings import Settings
+from transit_app.domain.models import Prediction
+from transit_app.http.base import EventStreamClient
+from transit_app.providers.mbta.client import PREDICTION_FIELDS, STOP_FIELDS
+from transit_app.providers.mbta.endpoints import predictions as predictions_url
+from transit_app.providers.mbta.mapper import parent_station_of, prediction_from_resource
+
+
+@dataclass(frozen=True)
+class ServerSentEvent:
+    event: str
+    data: str
+
+
+def parse_event_stream(lines: Iterable[str]) -> Iterator[ServerSentEvent]:
+    """
+    Minimal `text/event-stream` parser.
+    Comment lines (":") are keep-alives; a blank line dispatches the event.
+    """
+    event = "message"
+    data: list[str] = []
+    for line in lines:
+        if not line:
+            if data:
+                yield ServerSentEvent(event=event, data="\n".join(data))
+            event, data = "message", []
+            continue
+        if line.startswith(":"):
+            continue
+        name, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if name == "event":
+            event = value
+        elif name == "data":
+            data.append(value)
+
+
+class PredictionStore:
+    """
+    In-memory, incrementally updated index of live predictions.
+
+    Why this exists:
+    - a streaming consumer keeps it current, so /estimate can answer
+      without any upstream call
+    - indexed by stop (platform and parent station), trip and route
+
+    Thread-safe: one writer (the stream consumer) and many readers.
+    """
+
+    def __init__(self, routes: Iterable[str] = ()) -> None:
+        self._routes = frozenset(routes)
+        self._lock = threading.Lock()
+        self._ready = False
+        self._by_id: dict[str, Prediction] = {}
+        self._by_stop: dict[str, set[str]] = {}
+        self._by_trip: dict[str, set[str]] = {}
+        self._by_route: dict[str, set[str]] = {}
+        self._children: dict[str, set[str]] = {}
+
+    def covers(self, route_id: str) -> bool:
+        """True once a snapshot for `route_id` has been received."""
+        return self._ready and route_id in self._routes
+
+    def invalidate(self) -> None:
+        """Stop serving until the next `reset` (e.g. while the stream is down)."""
+        with self._lock:
+            self._ready = False
+
+    def reset(self, resources: list[dict[str, Any]]) -> None:
+        with self._lock:
+            self._by_id.clear()
+            self._by_stop.clear()
+            self._by_trip.clear()
+            self._by_route.clear()
+            self._children.clear()
+            for resource in resources:
+                self._upsert(resource)
+            self._ready = True
+
+    def upsert(self, resource: dict[str, Any]) -> None:
+        with self._lock:
+            self._upsert(resource)
+
+    def remove(self, resource: dict[str, Any]) -> None:
+        if resource.get("type") != "prediction":
+            return
+        with self._lock:
+            self._drop(resource.get("id"))
+
+    def predictions_for(self, stop_id: str, route_id: str | None = None) -> list[Prediction]:
+        """Predictions at a stop (or any platform of a parent station)."""
+        with self._lock:
+            ids: set[str] = set(self._by_stop.get(stop_id, ()))
+            for child in self._children.get(stop_id, ()):
+                ids |= self._by_stop.get(child, set())
+            if route_id is not None:
+                ids &= self._by_route.get(route_id, set())
+            return [self._by_id[i] for i in ids]
+
+    def predictions_for_trip(self, trip_id: str) -> list[Prediction]:
+        with self._lock:
+            return [self._by_id[i] for i in self._by_trip.get(trip_id, ())]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._by_id)
+
+    def _upsert(self, resource: dict[str, Any]) -> None:
+        # Caller holds self._lock
+        kind = resource.get("type")
+        resource_id = resource.get("id")
+        if not isinstance(resource_id, str):
+            return
+        if kind == "stop":
+            parent = parent_station_of(resource)
+            if parent is not None:
+                self._children.setdefault(parent, set()).add(resource_id)
+            return
+        if kind != "prediction":
+            return
+
+        self._drop(resource_id)
+        prediction = prediction_from_resource(resource)
+        if prediction is None:
+            return
+        self._by_id[resource_id] = prediction
+        self._by_stop.setdefault(prediction.stop_id, set()).add(resource_id)
+        if prediction.trip_id:
+            self._by_trip.setdefault(prediction.trip_id, set()).add(resource_id)
+        if prediction.route_id:
+            self._by_route.setdefault(prediction.route_id, set()).add(resource_id)
+
+    def _drop(self, resource_id: Any) -> None:
+        # Caller holds self._lock
+        old = self._by_id.pop(resource_id, None)
+        if old is None:
+            return
+        for index, key in (
+            (self._by_stop, old.stop_id),
+            (self._by_trip, old.trip_id),
+            (self._by_route, old.route_id),
+        ):
+            ids = index.get(key) if key else None
+            if ids is not None:
+                ids.discard(resource_id)
+                if not ids:
+                    del index[key]
+
+
+class PredictionStreamConsumer:
+    """
+    Keeps a PredictionStore current from the MBTA v3 predictions event stream.
+
+    Runs on a background thread. On disconnect it reconnects with jittered
+    exponential backoff; MBTA starts every new connection with a `reset`
+    snapshot, so the store never serves a half-applied state for long.
+    `payload_observer` sees each snapshot and upsert as a JSON:API document
+    (e.g. to archive it); it runs on the consumer thread and must not block.
+    """
+
+    def __init__(
+        self,
+        *,
+        stream: EventStreamClient,
+        settings: Settings,
+        store: PredictionStore,
+        routes: Iterable[str],
+        min_backoff_s: float = 0.5,
+        max_backoff_s: float = 30.0,
+        idle_timeout_s: float = 60.0,
+        payload_observer: Callable[[dict[str, Any]], None] | None = None,
+    ) -> None:
+        self._stream = stream
+        self._settings = settings
+        self._store = store
+        self._routes = list(routes)
+        self._min_backoff_s = min_backoff_s
+        self._max_backoff_s = max_backoff_s
+        self._idle_timeout_s = idle_timeout_s
+        self._payload_observer = payload_observer
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.reconnects = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="mbta-prediction-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 1.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_s)
+            self._thread = None
+
+    def handle(self, event: ServerSentEvent) -> None:
+        if event.event not in ("reset", "add", "update", "remove"):
+            return
+        try:
+            body = json.loads(event.data)
+        except ValueError:
+            return
+        if event.event == "reset":
+            resources = body if isinstance(body, list) else []
+            self._store.reset(resources)
+            self._observe([r for r in resources if isinstance(r, dict) and r.get("type") == "prediction"])
+        elif event.event == "remove":
+            self._store.remove(body)
+        else:
+            self._store.upsert(body)
+            if isinstance(body, dict) and body.get("type") == "prediction":
+                self._observe([body])
+
+    def _observe(self, predictions: list[dict[str, Any]]) -> None:
+        if self._payload_observer is not None and predictions:
+            self._payload_observer({"data": predictions})
+
+    def _run(self) -> None:
+        backoff_s = self._min_backoff_s
+        while not self._stop.is_set():
+            try:
+                for event in parse_event_stream(self._lines()):
+                    if self._stop.is_set():
+                        return
+                    self.handle(event)
+                    backoff_s = self._min_backoff_s
+            except RuntimeError:
+                pass
+            if self._stop.is_set():
+                return
+            # Missed events can't be replayed; readers fall back to polling until the next reset
+            self._store.invalidate()
+            self.reconnects += 1
+            self._stop.wait(backoff_s * (1 + random.random()))
+            backoff_s = min(backoff_s * 2, self._max_backoff_s)
+
+    def _lines(self) -> Iterator[str]:
+        headers: dict[str, str] = {}
+        if self._settings.mbta_api_key:
+            headers["x-api-key"] = self._settings.mbta_api_key
+        params = {
+            "filter[route]": ",".join(self._routes),
+            "include": "stop",
+            "fields[prediction]": PREDICTION_FIELDS,
+            "fields[stop]": STOP_FIELDS,
+        }
+        return self._stream.stream_lines(
+            predictions_url(self._settings.mbta_base_url),
+            params=params,
+            headers=headers or None,
+            timeout_s=self._settings.timeout_s,
+            idle_timeout_s=self._idle_timeout_s,
+        )
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 import json
+import threading
+import time
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Callable, Generic, TypeVar
 
 from transit_app.storage.base import BlobStorage
 
+STOPS_FILE = "stops_min.json"
+ROUTES_FILE = "routes_min.json"
+
+T = TypeVar("T")
+
 
 @dataclass(frozen=True)
 class StopRef:
@@ -20,32 +27,156 @@ class RouteRef:
     route_long_name: str | None
 
 
+@dataclass(frozen=True)
+class _Stops:
+    items: tuple[StopRef, ...]
+    by_id: dict[str, StopRef]
+    parents: dict[str, str]
+
+
+@dataclass(frozen=True)
+class _Routes:
+    items: tuple[RouteRef, ...]
+    by_id: dict[str, RouteRef]
+
+
+@dataclass(frozen=True)
+class _Loaded(Generic[T]):
+    value: T
+    version: str | None
+    checked_at: float
+
+
 class ReferenceRepository:
     """
     Read-only repository for transit reference data (stops, routes).
 
     Backed by JSON artifacts produced from GTFS.
     Storage backend is injected (local now, S3 later).
+
+    Each artifact is read, parsed and indexed by id once, on first use,
+    rather than on every call (a network round trip on S3). At most every
+    `check_interval_s` the storage `version` (mtime, ETag) is compared and
+    the artifact is reloaded only if it changed; a backend that can't report
+    a version keeps the first load until `invalidate`. One caller runs each
+    check without holding any lock, while everyone else keeps reading the
+    loaded index. Concurrent first calls for an artifact share one load.
+    Readers get the finished index, which is swapped in whole and never
+    mutated.
     """
 
-    def __init__(self, storage: BlobStorage) -> None:
+    def __init__(
+        self,
+        storage: BlobStorage,
+        *,
+        check_interval_s: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         self._storage = storage
+        self._check_interval_s = check_interval_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._loaded: dict[str, _Loaded[Any]] = {}
+        # Per artifact, so a slow first load of one doesn't hold up the other
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._checking: set[str] = set()
 
     def list_stops(self) -> list[StopRef]:
-        raw = self._load_json("stops_min.json")
-        return [StopRef(stop_id=x["stop_id"], stop_name=x["stop_name"]) for x in raw]
+        return list(self._stops().items)
+
+    def get_stop(self, stop_id: str) -> StopRef | None:
+        return self._stops().by_id.get(stop_id)
+
+    def parent_stations(self) -> dict[str, str]:
+        """Platform (child stop) id -> parent station id, for stops that have one."""
+        return dict(self._stops().parents)
 
     def list_routes(self) -> list[RouteRef]:
-        raw = self._load_json("routes_min.json")
-        return [
-            RouteRef(
-                route_id=x["route_id"],
-                route_short_name=x.get("route_short_name"),
-                route_long_name=x.get("route_long_name"),
-            )
-            for x in raw
-        ]
+        return list(self._routes().items)
+
+    def get_route(self, route_id: str) -> RouteRef | None:
+        return self._routes().by_id.get(route_id)
+
+    def invalidate(self) -> None:
+        """Forget everything loaded; the next call reads the artifacts again."""
+        with self._lock:
+            self._loaded = {}
+
+    def _stops(self) -> _Stops:
+        return self._get(STOPS_FILE, _index_stops)
+
+    def _routes(self) -> _Routes:
+        return self._get(ROUTES_FILE, _index_routes)
+
+    def _get(self, filename: str, build: Callable[[list[dict[str, Any]]], T]) -> T:
+        now = self._clock()
+        loaded = self._loaded.get(filename)
+        if loaded is None:
+            return self._first_load(filename, build)
+        if now - loaded.checked_at < self._check_interval_s:
+            return loaded.value
+
+        with self._lock:
+            if filename in self._checking:
+                # Another thread is checking; keep serving what we have meanwhile
+                return loaded.value
+            self._checking.add(filename)
+        try:
+            # No lock held: on S3 this is a HEAD request
+            version = self._storage.version(filename)
+            if version is None or version == loaded.version:
+                fresh = _Loaded(loaded.value, loaded.version, now)
+            else:
+                try:
+                    fresh = _Loaded(build(self._load_json(filename)), version, now)
+                except Exception:
+                    # A failed reload keeps the index we have; try again next interval
+                    fresh = _Loaded(loaded.value, loaded.version, now)
+            with self._lock:
+                # Unless `invalidate` dropped it meanwhile
+                if self._loaded.get(filename) is loaded:
+                    self._loaded = {**self._loaded, filename: fresh}
+        finally:
+            with self._lock:
+                self._checking.discard(filename)
+        return fresh.value
+
+    def _first_load(self, filename: str, build: Callable[[list[dict[str, Any]]], T]) -> T:
+        with self._lock:
+            load_lock = self._load_locks.setdefault(filename, threading.Lock())
+        with load_lock:
+            # Another thread may have loaded it while we waited
+            loaded = self._loaded.get(filename)
+            if loaded is not None:
+                return loaded.value
+            # Read the version before the bytes: a change in between is caught next check
+            version = self._storage.version(filename)
+            value = build(self._load_json(filename))
+            with self._lock:
+                self._loaded = {**self._loaded, filename: _Loaded(value, version, self._clock())}
+            return value
 
     def _load_json(self, filename: str) -> list[dict[str, Any]]:
         data = self._storage.read_bytes(filename)
         return json.loads(data.decode("utf-8"))
+
+
+def _index_stops(raw: list[dict[str, Any]]) -> _Stops:
+    items = tuple(StopRef(stop_id=x["stop_id"], stop_name=x["stop_name"]) for x in raw)
+    return _Stops(
+        items=items,
+        by_id={s.stop_id: s for s in items},
+        parents={x["stop_id"]: x["parent_station"] for x in raw if x.get("parent_station")},
+    )
+
+
+def _index_routes(raw: list[dict[str, Any]]) -> _Routes:
+    items = tuple(
+        RouteRef(
+            route_id=x["route_id"],
+            route_short_name=x.get("route_short_name"),
+            route_long_name=x.get("route_long_name"),
+        )
+        for x in raw
+    )
+    return _Routes(items=items, by_id={r.route_id: r for r in items})
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+from zoneinfo import ZoneInfo
+
+from transit_app.services.headways import headway_bucket
+
+# Hour-of-week is taken in service (local) time: rush hour is a local-clock thing
+SERVICE_TZ = ZoneInfo("America/New_York")
+
+# Marks a table entry that pools every hour of the week
+ANY_HOUR = -1
+
+CALIBRATION_FORMAT_VERSION = 1
+
+# (route_id, origin_stop_id, destination_stop_id, hour_of_week, headway_bucket)
+CalibrationKey = tuple[str, str, str, int, int]
+
+
+def hour_of_week(at: datetime) -> int:
+    """0 = Monday 00:00-00:59 service time, 167 = Sunday 23:00-23:59."""
+    local = at.astimezone(SERVICE_TZ)
+    return local.weekday() * 24 + local.hour
+
+
+@dataclass(frozen=True)
+class CalibrationObservation:
+    """One recorded trip: what was predicted at departure vs when it actually arrived."""
+
+    route_id: str
+    origin_stop_id: str
+    destination_stop_id: str
+    departure_time: datetime
+    predicted_arrival: datetime
+    actual_arrival: datetime
+    headway_seconds: Optional[int]
+
+
+@dataclass(frozen=True)
+class BandOffsets:
+    """P80/P90 arrival offsets (seconds after the predicted arrival) and how many trips back them."""
+
+    p80_s: int
+    p90_s: int
+    samples: int
+
+
+class CalibrationTable:
+    """
+    Precomputed arrival-error quantiles, looked up in O(1) per request.
+
+    Why this exists:
+    - fixed headway multiples are a placeholder; recorded trips tell us how
+      late arrivals actually run per route, stop pair, hour of week and headway
+    - all the work happens offline (`build_calibration`); the request path is
+      at most two dict lookups
+
+    A lookup tries the exact hour of week first, then the entry pooled over
+    all hours; None means "no data, use the heuristic".
+    """
+
+    def __init__(self, entries: dict[CalibrationKey, BandOffsets]) -> None:
+        self._entries = entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(
+        self,
+        *,
+        route_id: str,
+        origin_stop_id: str,
+        destination_stop_id: str,
+        departure_time: datetime,
+        headway_seconds: Optional[int],
+    ) -> Optional[BandOffsets]:
+        bucket = headway_bucket(headway_seconds)
+        exact = self._entries.get((route_id, origin_stop_id, destination_stop_id, hour_of_week(departure_time), bucket))
+        if exact is not None:
+            return exact
+        return self._entries.get((route_id, origin_stop_id, destination_stop_id, ANY_HOUR, bucket))
+
+    def to_json(self) -> bytes:
+        rows = [[*key, v.p80_s, v.p90_s, v.samples] for key, v in sorted(self._entries.items())]
+        return json.dumps({"version": CALIBRATION_FORMAT_VERSION, "entries": rows}, separators=(",", ":")).encode()
+
+    @classmethod
+    def from_json(cls, data: bytes) -> "CalibrationTable":
+        doc = json.loads(data.decode("utf-8"))
+        if doc.get("version") != CALIBRATION_FORMAT_VERSION:
+            raise ValueError(f"Unsupported calibration format version: {doc.get('version')!r}")
+        entries: dict[CalibrationKey, BandOffsets] = {}
+        for route_id, origin, dest, how, bucket, p80, p90, samples in doc["entries"]:
+            entries[(route_id, origin, dest, how, bucket)] = BandOffsets(p80_s=p80, p90_s=p90, samples=samples)
+        return cls(entries)
+
+
+def _quantile(sorted_values: list[float], q: float) -> float:
+    # Nearest-rank: an observed value, no interpolation across sparse samples
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def build_calibration(observations: Iterable[CalibrationObservation], *, min_samples: int = 20) -> CalibrationTable:
+    """
+    Offline job: turn recorded trips into a CalibrationTable.
+
+    Groups arrival errors (actual - predicted) by route, stop pair, hour of week
+    and headway bucket, plus one pooled-over-hours group per stop pair and
+    bucket. Groups with fewer than `min_samples` trips are left out.
+    Offsets are clamped so that 0 <= P80 <= P90.
+    """
+    errors: dict[CalibrationKey, list[float]] = {}
+    for obs in observations:
+        error_s = (obs.actual_arrival - obs.predicted_arrival).total_seconds()
+        bucket = headway_bucket(obs.headway_seconds)
+        for how in (hour_of_week(obs.departure_time), ANY_HOUR):
+            key = (obs.route_id, obs.origin_stop_id, obs.destination_stop_id, how, bucket)
+            errors.setdefault(key, []).append(error_s)
+
+    entries: dict[CalibrationKey, BandOffsets] = {}
+    for key, values in errors.items():
+        if len(values) < min_samples:
+            continue
+        values.sort()
+        p80 = max(0, int(round(_quantile(values, 0.80))))
+        p90 = max(p80, int(round(_quantile(values, 0.90))))
+        entries[key] = BandOffsets(p80_s=p80, p90_s=p90, samples=len(values))
+    return CalibrationTable(entries)
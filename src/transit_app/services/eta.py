@@ -1,7 +1,16 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Sequence
+
+from transit_app.services.calibration import CalibrationTable
+from transit_app.services.headways import (
+    HEADWAY_FREQUENT,
+    HEADWAY_MODERATE,
+    HEADWAY_UNKNOWN,
+    HeadwayStats,
+    headway_bucket,
+)
 
 @dataclass(frozen=True)
 class EtaEstimate:
@@ -23,8 +32,19 @@ class EtaEstimator:
     Design intent:
     - Pure logic (no HTTP)
     - Upgradeable later to quantile models/historical calibration.
+
+    With a CalibrationTable, P80/P90 come from recorded arrival errors for
+    the route, stop pair, hour of week and headway bucket when the caller
+    identifies the trip (route_id/origin_stop_id/destination_stop_id);
+    otherwise, or without data, the heuristic applies.
+
+    Given rolling headway stats (HeadwayTracker), their median replaces the
+    single gap to the next departure, so one bunched pair doesn't swing the bands.
     """
 
+    def __init__(self, calibration: CalibrationTable | None = None) -> None:
+        self._calibration = calibration
+
     def estimate(
             self,
             *,
@@ -33,6 +53,10 @@ class EtaEstimator:
             destination_arrival: datetime,
             second_origin_departure: datetime | None = None,
             alert_multiplier: float = 1.0,
+            route_id: str | None = None,
+            origin_stop_id: str | None = None,
+            destination_stop_id: str | None = None,
+            headway: HeadwayStats | None = None,
     ) -> EtaEstimate:
         """
         Parameters:
@@ -44,6 +68,10 @@ class EtaEstimator:
         vehicle after this one (same stop/route/direction)
         - alert_multiplier: >=1 widens uncertainty when alerts
         exist
+        - route_id / origin_stop_id / destination_stop_id: identify
+        the trip for calibrated bands (optional)
+        - headway: recently observed headways at the origin
+        (optional; preferred over second_origin_departure)
 
         Returns:
         - EtaEstimate with P50, P80, and P90 arrival times
@@ -62,10 +90,37 @@ class EtaEstimator:
             delta = (second_origin_departure - origin_departure).total_seconds()
             if delta > 0:
                 headway_seconds = int(delta)
+        if headway is not None:
+            headway_seconds = headway.p50_s
 
         # P50 = prediction arrival for this trip
         p50 = destination_arrival
 
+        calibrated = None
+        if self._calibration is not None and route_id and origin_stop_id and destination_stop_id:
+            calibrated = self._calibration.lookup(
+                route_id=route_id,
+                origin_stop_id=origin_stop_id,
+                destination_stop_id=destination_stop_id,
+                departure_time=origin_departure,
+                headway_seconds=headway_seconds,
+            )
+        if calibrated is not None:
+            explanation = (
+                f"Uncertainty bands are calibrated from {calibrated.samples} past trips "
+                "between these stops at this time of week."
+            )
+            if alert_multiplier > 1.0:
+                explanation += " Active alerts widen the uncertainty bands."
+            return EtaEstimate(
+                depart_time=origin_departure,
+                p50_arrival=p50,
+                p80_arrival=p50 + timedelta(seconds=int(calibrated.p80_s * alert_multiplier)),
+                p90_arrival=p50 + timedelta(seconds=int(calibrated.p90_s * alert_multiplier)),
+                headway_seconds=headway_seconds,
+                explanation=explanation,
+            )
+
         # Uncertainty heuristic:
         # - if headway is large, uncertainty is larger (miss risk/variability proxy)
         # - if headway is unknown, use a conservative default
@@ -78,18 +133,7 @@ class EtaEstimator:
         p80 = p50 + timedelta(seconds=p80_buffer)
         p90 = p50 + timedelta(seconds=p90_buffer)
 
-        # Explanation (simple version 1.0)
-        if headway_seconds is None:
-            explanation = "Uncertainty is wider because headway could not be estimated; using a conservative default."
-        elif headway_seconds >= 12 * 60:
-            explanation = "Uncertainty is wider because headway is large right now (service is less frequent)."
-        elif headway_seconds >= 6 * 60:
-            explanation = "Uncertainty is tighter because headway is small right now (service is frequent)."
-        else:
-            explanation = "Uncertainty is moderate based on current headway."
-
-        if alert_multiplier > 1.0:
-            explanation += "Active alerts widen the uncertainty bands."
+        explanation = _explanation(headway_seconds, alert_multiplier)
 
         return EtaEstimate(
             depart_time=origin_departure,
@@ -99,3 +143,80 @@ class EtaEstimator:
             headway_seconds=headway_seconds,
             explanation=explanation,
         )
+
+    def estimate_many(
+            self,
+            *,
+            now: datetime,
+            origin_departures: Sequence[datetime],
+            destination_arrivals: Sequence[datetime],
+            next_origin_departures: Sequence[datetime | None],
+            alert_multiplier: float = 1.0,
+            headways: Sequence[HeadwayStats | None] | None = None,
+    ) -> list[EtaEstimate]:
+        """
+        `estimate` for many trips in one pass (e.g. every row of a departure board).
+        The sequences are parallel; results are in the same order and
+        identical to calling `estimate` per trip without a route and stops,
+        i.e. heuristic bands: the calibration table is not consulted.
+        """
+        if not len(origin_departures) == len(destination_arrivals) == len(next_origin_departures):
+            raise ValueError("origin_departures, destination_arrivals and next_origin_departures must be the same length")
+        if headways is None:
+            headways = [None] * len(origin_departures)
+        elif len(headways) != len(origin_departures):
+            raise ValueError("headways must be the same length as origin_departures")
+        if now.tzinfo is None:
+            raise ValueError("now must be a timezone-aware datetime")
+
+        # Explanations depend only on the headway bucket; build each string once
+        explanations: dict[int, str] = {}
+        out: list[EtaEstimate] = []
+        for depart, arrive, second, rolling in zip(origin_departures, destination_arrivals, next_origin_departures, headways):
+            if depart.tzinfo is None or arrive.tzinfo is None or (second is not None and second.tzinfo is None):
+                raise ValueError("all departure and arrival times must be timezone-aware datetimes")
+            if arrive < depart:
+                raise ValueError("destination_arrival cannot be earlier than origin_departure")
+
+            headway_seconds: int | None = None
+            if second is not None:
+                delta = (second - depart).total_seconds()
+                if delta > 0:
+                    headway_seconds = int(delta)
+            if rolling is not None:
+                headway_seconds = rolling.p50_s
+            base_headway = headway_seconds if headway_seconds is not None else 10 * 60
+
+            bucket = headway_bucket(headway_seconds)
+            explanation = explanations.get(bucket)
+            if explanation is None:
+                explanation = explanations[bucket] = _explanation(headway_seconds, alert_multiplier)
+
+            out.append(
+                EtaEstimate(
+                    depart_time=depart,
+                    p50_arrival=arrive,
+                    p80_arrival=arrive + timedelta(seconds=int(0.35 * base_headway * alert_multiplier)),
+                    p90_arrival=arrive + timedelta(seconds=int(0.60 * base_headway * alert_multiplier)),
+                    headway_seconds=headway_seconds,
+                    explanation=explanation,
+                )
+            )
+        return out
+
+
+def _explanation(headway_seconds: int | None, alert_multiplier: float) -> str:
+    # Explanation (simple version 1.0)
+    bucket = headway_bucket(headway_seconds)
+    if bucket == HEADWAY_UNKNOWN:
+        explanation = "Uncertainty is wider because headway could not be estimated; using a conservative default."
+    elif bucket == HEADWAY_MODERATE:
+        explanation = "Uncertainty is tighter because headway is small right now (service is frequent)."
+    elif bucket == HEADWAY_FREQUENT:
+        explanation = "Uncertainty is moderate based on current headway."
+    else:
+        explanation = "Uncertainty is wider because headway is large right now (service is less frequent)."
+
+    if alert_multiplier > 1.0:
+        explanation += " Active alerts widen the uncertainty bands."
+    return explanation
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+# (stop_id, route_id, direction_id)
+LineKey = tuple[str, str, Optional[int]]
+
+# One predicted departure: (stop_id, route_id, direction_id, trip_id, departure epoch seconds)
+Departure = tuple[str, str, Optional[int], str, int]
+
+# Headway bucket edges (seconds): where service stops counting as frequent,
+# becomes large, and becomes infrequent. Bands, scores and calibration share them.
+MODERATE_HEADWAY_S = 6 * 60
+LARGE_HEADWAY_S = 10 * 60
+INFREQUENT_HEADWAY_S = 15 * 60
+
+# headway_bucket values; calibration files store them, so never renumber
+HEADWAY_UNKNOWN, HEADWAY_FREQUENT, HEADWAY_MODERATE, HEADWAY_LARGE, HEADWAY_INFREQUENT = range(5)
+
+
+def headway_bucket(headway_seconds: Optional[int]) -> int:
+    """Coarse service frequency class of a headway (HEADWAY_UNKNOWN when there is none)."""
+    if headway_seconds is None:
+        return HEADWAY_UNKNOWN
+    if headway_seconds < MODERATE_HEADWAY_S:
+        return HEADWAY_FREQUENT
+    if headway_seconds < LARGE_HEADWAY_S:
+        return HEADWAY_MODERATE
+    if headway_seconds < INFREQUENT_HEADWAY_S:
+        return HEADWAY_LARGE
+    return HEADWAY_INFREQUENT
+
+
+@dataclass(frozen=True)
+class HeadwayStats:
+    """Rolling statistics over the most recent observed headways at a stop, route and direction."""
+
+    samples: int
+    mean_s: float
+    stdev_s: float
+    p50_s: int
+    p90_s: int
+
+    @property
+    def cv(self) -> float:
+        """Coefficient of variation: ~0 for even service, >= 0.5 when vehicles bunch."""
+        return self.stdev_s / self.mean_s if self.mean_s > 0 else 0.0
+
+
+class RollingHeadway:
+    """
+    The last `window` headways in a ring buffer.
+
+    Mean and variance come from running integer sums (add the new gap,
+    subtract the evicted one): O(1) per update with no floating-point drift.
+    Percentiles read a sorted copy of the window that is kept in step with
+    the ring; the window is small and fixed, so that is constant work too.
+    """
+
+    def __init__(self, window: int) -> None:
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self._ring: list[int] = []
+        self._next = 0
+        self._window = window
+        self._sorted: list[int] = []
+        self._sum = 0
+        self._sum_sq = 0
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def push(self, gap_s: int) -> None:
+        if len(self._ring) < self._window:
+            self._ring.append(gap_s)
+        else:
+            old = self._ring[self._next]
+            self._ring[self._next] = gap_s
+            self._next = (self._next + 1) % self._window
+            self._sum -= old
+            self._sum_sq -= old * old
+            del self._sorted[bisect_left(self._sorted, old)]
+        self._sum += gap_s
+        self._sum_sq += gap_s * gap_s
+        insort(self._sorted, gap_s)
+
+    def stats(self) -> HeadwayStats:
+        n = len(self._ring)
+        if n == 0:
+            raise ValueError("no headways observed yet")
+        mean = self._sum / n
+        variance = max(0.0, self._sum_sq / n - mean * mean)
+        return HeadwayStats(
+            samples=n,
+            mean_s=mean,
+            stdev_s=math.sqrt(variance),
+            p50_s=self._sorted[(n - 1) // 2],
+            p90_s=self._sorted[max(0, math.ceil(0.9 * n) - 1)],
+        )
+
+
+class _Line:
+    """Departure bookkeeping for one stop, route and direction."""
+
+    __slots__ = ("pending", "departed", "last_departure_s", "headways")
+
+    def __init__(self, window: int) -> None:
+        self.pending: dict[str, int] = {}  # trip -> latest predicted departure
+        self.departed: dict[str, None] = {}  # recently committed trips (insertion-ordered, bounded)
+        self.last_departure_s: Optional[int] = None
+        self.headways = RollingHeadway(window)
+
+
+class HeadwayTracker:
+    """
+    Observed headways per stop, route and direction, updated incrementally
+    from the predicted departures we already fetch or stream.
+
+    Why this exists:
+    - one gap between the next two predicted departures swings with every
+      bunched pair; the last `window` observed gaps give a stable headway
+      and a measure of how irregular service is
+    - fed from payloads we already receive (no extra upstream calls, see
+      providers.mbta.headway_observer); reads are a dict lookup
+
+    A trip counts as departed once its predicted departure time has passed;
+    its gap to the previous departure on the same line is then pushed.
+    Gaps longer than `max_gap_s` (overnight, suspended service) restart the
+    sequence instead of being recorded. Callers pass a platform's departures
+    again under its parent station for them to count there too.
+
+    Thread-safe: `observe` and `stats` may run on different threads.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int = 12,
+        min_samples: int = 3,
+        max_gap_s: int = 3600,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._window = window
+        self._min_samples = min_samples
+        self._max_gap_s = max_gap_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._lines: dict[LineKey, _Line] = {}
+
+    def observe(self, departures: Iterable[Departure], captured_at: float | None = None) -> None:
+        """Record predicted departures seen at `captured_at` (default: now)."""
+        now_s = int(self._clock() if captured_at is None else captured_at)
+        with self._lock:
+            touched: set[LineKey] = set()
+            for stop_id, route_id, direction_id, trip_id, departure_s in departures:
+                key = (stop_id, route_id, direction_id)
+                line = self._lines.get(key)
+                if line is None:
+                    line = self._lines[key] = _Line(self._window)
+                if trip_id not in line.departed:
+                    line.pending[trip_id] = departure_s
+                touched.add(key)
+            for key in touched:
+                self._commit(self._lines[key], now_s)
+
+    def stats(self, stop_id: str, route_id: str, direction_id: Optional[int]) -> Optional[HeadwayStats]:
+        """Rolling stats for a line, or None until `min_samples` headways have been observed."""
+        key = (stop_id, route_id, direction_id)
+        with self._lock:
+            line = self._lines.get(key)
+            if line is None:
+                return None
+            self._commit(line, int(self._clock()))
+            if len(line.headways) < self._min_samples:
+                return None
+            return line.headways.stats()
+
+    def _commit(self, line: _Line, now_s: int) -> None:
+        # Caller holds self._lock
+        gone = sorted((dep, trip) for trip, dep in line.pending.items() if dep <= now_s)
+        for departure_s, trip_id in gone:
+            del line.pending[trip_id]
+            line.departed[trip_id] = None
+            if len(line.departed) > 4 * self._window:
+                del line.departed[next(iter(line.departed))]
+            if line.last_departure_s is None:
+                line.last_departure_s = departure_s
+                continue
+            gap_s = departure_s - line.last_departure_s
+            if 0 < gap_s <= self._max_gap_s:
+                line.headways.push(gap_s)
+            if gap_s > 0:
+                line.last_departure_s = departure_s
@@ -1,7 +1,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Sequence
+
+from transit_app.services.headways import (
+    INFREQUENT_HEADWAY_S,
+    LARGE_HEADWAY_S,
+    MODERATE_HEADWAY_S,
+    headway_bucket,
+)
+
+# Headway coefficient of variation at which service counts as irregular
+IRREGULAR_HEADWAY_CV = 0.5
 
 @dataclass(frozen=True)
 class ReliabilityReport:
@@ -27,6 +37,10 @@ class ReliabilityScorer:
         headway_seconds: Optional[int],
         used_default_headway: bool,
         had_destination_match: bool,
+        stale_data_age_s: Optional[float] = None,
+        headway_cv: Optional[float] = None,
+        alert_severity: Optional[int] = None,
+        alert_effect: Optional[str] = None,
     ) -> ReliabilityReport:
         reasons: list[str] = []
 
@@ -39,13 +53,13 @@ class ReliabilityScorer:
             reasons.append("Headway could not be estimated from live data.")
         else:
             # Convert headway into a penalty bucket
-            if headway_seconds >= 15 * 60:
+            if headway_seconds >= INFREQUENT_HEADWAY_S:
                 score -= 45
                 reasons.append("service is infrequent right now (large headway).")
-            elif headway_seconds >= 10 * 60:
+            elif headway_seconds >= LARGE_HEADWAY_S:
                 score -= 30
                 reasons.append("Service headway is moderately large right now.")
-            elif headway_seconds >= 6 * 60:
+            elif headway_seconds >= MODERATE_HEADWAY_S:
                 score -= 15
                 reasons.append("Service headway is moderate right now.")
             else:
@@ -58,6 +72,19 @@ class ReliabilityScorer:
         if not had_destination_match:
             score -= 40
             reasons.append("Destination prediction coverage was missing for upcoming trips.")
+        # 4) Stale data (last-known-good predictions served while MBTA is unavailable)
+        if stale_data_age_s is not None:
+            score -= 20 if stale_data_age_s >= 60 else 10
+            reasons.append(f"Live data is unavailable; using predictions from {int(stale_data_age_s)}s ago.")
+        # 5) Irregular service (rolling headway spread, see HeadwayTracker): bunching makes waits unpredictable
+        if headway_cv is not None and headway_cv >= IRREGULAR_HEADWAY_CV:
+            score -= 10
+            reasons.append("Service is irregular right now (vehicles are bunching).")
+        # 6) Active service alert on the route or either stop (severity 0-10, see AlertsCache)
+        if alert_severity is not None:
+            score -= 30 if alert_severity >= 7 else 20 if alert_severity >= 4 else 10
+            effect = (alert_effect or "service").replace("_", " ").lower()
+            reasons.append(f"Active service alert affects this trip ({effect}).")
         # Clamp and finalize
         score = max(0, min(100, score))
 
@@ -66,3 +93,42 @@ class ReliabilityScorer:
             reasons.append("Reliability could not be assessed with available signals.")
         
         return ReliabilityReport(score=score, reasons=reasons)
+
+    def score_many(
+        self,
+        *,
+        headway_seconds: Sequence[Optional[int]],
+        used_default_headway: Sequence[bool],
+        had_destination_match: bool = True,
+        stale_data_age_s: Optional[float] = None,
+        headway_cvs: Optional[Sequence[Optional[float]]] = None,
+    ) -> list[ReliabilityReport]:
+        """
+        `score` for many trips sharing the same data freshness.
+        The score only depends on the headway bucket and flags, so each
+        distinct combination is scored once and reused.
+        """
+        if len(headway_seconds) != len(used_default_headway):
+            raise ValueError("headway_seconds and used_default_headway must be the same length")
+        if headway_cvs is None:
+            headway_cvs = [None] * len(headway_seconds)
+        elif len(headway_cvs) != len(headway_seconds):
+            raise ValueError("headway_cvs must be the same length as headway_seconds")
+
+        scored: dict[tuple[int, bool, bool], ReliabilityReport] = {}
+        out: list[ReliabilityReport] = []
+        for headway, used_default, cv in zip(headway_seconds, used_default_headway, headway_cvs):
+            irregular = cv is not None and cv >= IRREGULAR_HEADWAY_CV
+            key = (headway_bucket(headway), used_default, irregular)
+            report = scored.get(key)
+            if report is None:
+                report = scored[key] = self.score(
+                    headway_seconds=headway,
+                    used_default_headway=used_default,
+                    had_destination_match=had_destination_match,
+                    stale_data_age_s=stale_data_age_s,
+                    headway_cv=cv,
+                )
+            out.append(ReliabilityReport(score=report.score, reasons=list(report.reasons)))
+        return out
+
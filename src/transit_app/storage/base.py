@@ -10,3 +10,10 @@ class BlobStorage(ABC):
     def read_bytes(self, key: str) -> bytes:
         """Read the object located at `key` and return its bytes."""
         raise NotImplementedError
+
+    def version(self, key: str) -> str | None:
+        """
+        Cheap token that changes whenever the object at `key` changes (mtime,
+        ETag...), without reading it. None if the backend can't tell.
+        """
+        return None
@@ -13,3 +13,10 @@ class LocalBlobStorage(BlobStorage):
     def read_bytes(self, key: str) -> bytes:
         path = self.base_dir / key
         return path.read_bytes()
+
+    def version(self, key: str) -> str | None:
+        try:
+            st = (self.base_dir / key).stat()
+        except FileNotFoundError:
+            return None
+        return f"{st.st_mtime_ns}-{st.st_size}"
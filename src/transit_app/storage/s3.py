@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 import boto3
+from botocore.exceptions import BotoCoreError, ClientError
 
 from transit_app.storage.base import BlobStorage
 
@@ -14,9 +15,18 @@ class S3BlobStorage(BlobStorage):
 
     def read_bytes(self, key: str) -> bytes:
         s3 = boto3.client("s3")
+        resp = s3.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        return resp["Body"].read()
 
-        # Build full object key safely
-        obj_key = f"{self.prefix.strip('/')}/{key}".lstrip("/") if self.prefix else key
+    def version(self, key: str) -> str | None:
+        # HEAD only: the ETag changes whenever the object is re-uploaded
+        s3 = boto3.client("s3")
+        try:
+            resp = s3.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except (BotoCoreError, ClientError):
+            return None
+        return resp.get("ETag")
 
-        resp = s3.get_object(Bucket=self.bucket, Key=obj_key)
-        return resp["Body"].read()
+    def _object_key(self, key: str) -> str:
+        # Build full object key safely
+        return f"{self.prefix.strip('/')}/{key}".lstrip("/") if self.prefix else key
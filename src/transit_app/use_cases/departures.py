@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from transit_app.providers.mbta.client import MbtaV3Client
+from transit_app.providers.mbta.columnar import MISSING, NAT, PredictionBatch, prediction_batch_from_mbta
+from transit_app.services.eta import EtaEstimate, EtaEstimator
+from transit_app.services.headways import HeadwayStats, HeadwayTracker
+from transit_app.services.reliability import ReliabilityReport, ReliabilityScorer
+
+
+@dataclass(frozen=True)
+class Departure:
+    """One row of a departure board."""
+
+    route_id: str | None
+    trip_id: str | None
+    direction_id: int | None
+    eta: EtaEstimate
+    reliability: ReliabilityReport
+
+
+@dataclass(frozen=True)
+class DepartureBoardResult:
+    stop_id: str
+    departures: list[Departure]
+    generated_at: datetime
+
+
+class DepartureBoard:
+    """
+    Every upcoming departure at a stop, across routes, with ETA bands and a
+    reliability score per row.
+
+    Why this exists:
+    - one upstream call per board, mapped column-wise (PredictionBatch)
+    - headways, bands and scores are computed for all rows in one pass
+      (EtaEstimator.estimate_many / ReliabilityScorer.score_many)
+
+    Bands are around the departure itself: P50 is the predicted departure,
+    the headway to the next departure on the same route and direction
+    widens P80/P90, or the rolling headway of that line when a
+    HeadwayTracker has one.
+    """
+
+    def __init__(
+        self,
+        *,
+        mbta_client: MbtaV3Client,
+        eta_estimator: EtaEstimator,
+        reliability_scorer: ReliabilityScorer,
+        headway_tracker: HeadwayTracker | None = None,
+    ) -> None:
+        self._mbta = mbta_client
+        self._eta = eta_estimator
+        self._rel = reliability_scorer
+        self._headways = headway_tracker
+
+    def board(self, *, stop_id: str, now: datetime, limit: int = 20) -> DepartureBoardResult:
+        if now.tzinfo is None:
+            raise ValueError("now must be timezone-aware")
+        # Over-fetch: arrival-only rows (terminals) and departures already gone are dropped
+        raw = self._mbta.get_predictions(stop_id=stop_id, limit=2 * limit, sort="departure_time")
+        return self._build(stop_id, raw, now, limit)
+
+    async def board_async(
+        self,
+        *,
+        stop_id: str,
+        now: datetime,
+        limit: int = 20,
+        deadline_s: float | None = None,
+    ) -> DepartureBoardResult:
+        if now.tzinfo is None:
+            raise ValueError("now must be timezone-aware")
+        try:
+            raw = await asyncio.wait_for(
+                self._mbta.get_predictions_async(stop_id=stop_id, limit=2 * limit, sort="departure_time"),
+                timeout=deadline_s,
+            )
+        except asyncio.TimeoutError as e:
+            raise RuntimeError(f"Upstream predictions did not arrive within {deadline_s}s") from e
+        return self._build(stop_id, raw, now, limit)
+
+    def _build(self, stop_id: str, raw: dict, now: datetime, limit: int) -> DepartureBoardResult:
+        now_s = int(now.timestamp())
+        batch = prediction_batch_from_mbta(raw).filter(require="departure")
+        batch = batch.take(i for i in batch.argsort("departure") if batch.departure[i] >= now_s)
+
+        next_departure = _next_departure_in_line(batch)
+        rows = range(min(limit, len(batch)))
+
+        departs = [_to_datetime(batch.departure[i]) for i in rows]
+        nexts = [_to_datetime(next_departure[i]) if next_departure[i] != NAT else None for i in rows]
+        rolling = [self._rolling_headway(stop_id, batch, i) for i in rows]
+        etas = self._eta.estimate_many(
+            now=now,
+            origin_departures=departs,
+            destination_arrivals=departs,
+            next_origin_departures=nexts,
+            headways=rolling,
+        )
+        headways = [eta.headway_seconds for eta in etas]
+        stale_age_s = getattr(raw, "age_s", None) if getattr(raw, "stale", False) else None
+        reports = self._rel.score_many(
+            headway_seconds=headways,
+            used_default_headway=[h is None for h in headways],
+            stale_data_age_s=stale_age_s,
+            headway_cvs=[r.cv if r is not None else None for r in rolling],
+        )
+
+        departures = [
+            Departure(
+                route_id=batch.string(batch.route[i]),
+                trip_id=batch.string(batch.trip[i]),
+                direction_id=batch.direction[i] if batch.direction[i] != MISSING else None,
+                eta=etas[i],
+                reliability=reports[i],
+            )
+            for i in rows
+        ]
+        return DepartureBoardResult(stop_id=stop_id, departures=departures, generated_at=now)
+
+    def _rolling_headway(self, stop_id: str, batch: PredictionBatch, i: int) -> HeadwayStats | None:
+        route_id = batch.string(batch.route[i])
+        if self._headways is None or route_id is None:
+            return None
+        direction = batch.direction[i]
+        return self._headways.stats(stop_id, route_id, direction if direction != MISSING else None)
+
+
+def _next_departure_in_line(batch: PredictionBatch) -> list[int]:
+    """
+    For each row of a departure-sorted batch, the next departure on the same
+    route and direction (NAT if none): the per-row headway anchor.
+    """
+    following = [NAT] * len(batch)
+    last_seen: dict[tuple[int, int], int] = {}
+    for i in range(len(batch) - 1, -1, -1):
+        line = (batch.route[i], batch.direction[i])
+        following[i] = last_seen.get(line, NAT)
+        last_seen[line] = batch.departure[i]
+    return following
+
+
+def _to_datetime(epoch_s: int) -> datetime:
+    return datetime.fromtimestamp(epoch_s, tz=timezone.utc)
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import asyncio
 from dataclasses import dataclass
 from datetime import datetime
 from transit_app.services.eta import EtaEstimate
@@ -19,22 +20,79 @@ class JourneyEstimate:
     reliability: ReliabilityReport
     generated_at: datetime
 
+@dataclass(frozen=True)
+class JourneyQuery:
+    """One origin/destination/route triple in a batch request."""
+
+    origin_stop_id: str
+    destination_stop_id: str
+    route_id: str
+
+@dataclass(frozen=True)
+class JourneyOutcome:
+    """Result for one JourneyQuery: exactly one of `estimate` / `error` is set."""
+
+    query: JourneyQuery
+    estimate: JourneyEstimate | None = None
+    error: str | None = None
+
 from typing import Optional
 from transit_app.domain.models import Prediction
+from transit_app.providers.mbta.alerts import NO_IMPACT, AlertsCache
 from transit_app.providers.mbta.client import MbtaV3Client
-from transit_app.providers.mbta.mapper import predictions_from_mbta
+from transit_app.providers.mbta.mapper import predictions_by_stop
+from transit_app.providers.mbta.prefetch import HotStopPrefetcher
+from transit_app.providers.base import PredictionSource
 from transit_app.services.eta import EtaEstimator
+from transit_app.services.headways import HeadwayTracker
 
 class JourneyEstimator:
     """
     Orchestrates real-time MBTA predictions to produce
     a full journey ETA estimate.
+
+    If a live PredictionSource (event-stream PredictionStore, GTFS-Realtime
+    TripUpdatesFeed) covers the route and has rows for both stops,
+    predictions are read from it and no upstream call is made; otherwise
+    MBTA is polled.
+
+    Polling starts with a small page (`initial_limit` predictions for both
+    stops together). Only when the trip join misses and the page was full is
+    the query retried with a doubled page, filtered to the travel direction
+    once it can be inferred, up to `max_limit`.
+
+    With a HeadwayTracker, bands and scores use the rolling headway observed
+    at the origin instead of the single gap to the next departure.
+    With an AlertsCache, active alerts on the route or either stop widen
+    the bands (alert_multiplier) and lower the reliability score.
+    With a HotStopPrefetcher, every polled query is recorded so the most
+    popular ones are kept warm in the prediction cache.
     """
 
-    def __init__(self, *, mbta_client: MbtaV3Client, eta_estimator: EtaEstimator, reliability_scorer: ReliabilityScorer) -> None:
+    def __init__(
+        self,
+        *,
+        mbta_client: MbtaV3Client,
+        eta_estimator: EtaEstimator,
+        reliability_scorer: ReliabilityScorer,
+        prediction_store: PredictionSource | None = None,
+        initial_limit: int = 10,
+        max_limit: int = 80,
+        headway_tracker: HeadwayTracker | None = None,
+        alerts: AlertsCache | None = None,
+        prefetcher: HotStopPrefetcher | None = None,
+    ) -> None:
+        if initial_limit <= 0 or max_limit < initial_limit:
+            raise ValueError("need 0 < initial_limit <= max_limit")
         self._mbta = mbta_client
         self._eta = eta_estimator
         self._rel = reliability_scorer
+        self._store = prediction_store
+        self._initial_limit = initial_limit
+        self._max_limit = max_limit
+        self._headways = headway_tracker
+        self._alerts = alerts
+        self._prefetcher = prefetcher
 
     def estimate(
         self,
@@ -47,18 +105,276 @@ class JourneyEstimator:
         if now.tzinfo is None:
             raise ValueError("now must be timezone-aware")
 
-        # 1) Fetch origin predictions
-        origin_raw = self._mbta.get_predictions(
-            stop_id=origin_stop_id,
-            route_id=route_id,
-            limit=5,
-            sort="departure_time",
-        )
-        origin_preds = predictions_from_mbta(origin_raw)
+        # 1) Fetch origin + destination predictions (live store, else upstream pages)
+        by_stop = self._from_store(origin_stop_id, destination_stop_id, route_id)
+        if by_stop is not None:
+            return self._estimate_from_stops(
+                origin_stop_id=origin_stop_id,
+                destination_stop_id=destination_stop_id,
+                route_id=route_id,
+                now=now,
+                by_stop=by_stop,
+                stale_age_s=None,
+            )
+
+        stop_ids = [origin_stop_id, destination_stop_id]
+        if self._prefetcher is not None:
+            self._prefetcher.record(stop_ids, route_id, self._initial_limit)
+        limit, direction_id = self._initial_limit, None
+        while True:
+            raw = self._mbta.get_predictions_many(
+                stop_ids=stop_ids,
+                route_id=route_id,
+                direction_id=direction_id,
+                limit=limit,
+                sort="departure_time",
+            )
+            by_stop = predictions_by_stop(raw, stop_ids)
+            try:
+                return self._estimate_from_stops(
+                    origin_stop_id=origin_stop_id,
+                    destination_stop_id=destination_stop_id,
+                    route_id=route_id,
+                    now=now,
+                    by_stop=by_stop,
+                    stale_age_s=_stale_age_s(raw),
+                )
+            except RuntimeError:
+                widened = self._widen(raw, by_stop, stop_ids, limit, direction_id)
+                if widened is None:
+                    raise
+                limit, direction_id = widened
+
+    async def estimate_async(
+        self,
+        *,
+        origin_stop_id: str,
+        destination_stop_id: str,
+        route_id: str,
+        now: datetime,
+        deadline_s: float | None = None,
+    ) -> JourneyEstimate:
+        """
+        Same as `estimate`, but awaits the upstream fetch instead of blocking
+        a worker thread. `deadline_s` bounds the whole upstream wait.
+        """
+        if now.tzinfo is None:
+            raise ValueError("now must be timezone-aware")
+
+        by_stop = self._from_store(origin_stop_id, destination_stop_id, route_id)
+        if by_stop is not None:
+            return self._estimate_from_stops(
+                origin_stop_id=origin_stop_id,
+                destination_stop_id=destination_stop_id,
+                route_id=route_id,
+                now=now,
+                by_stop=by_stop,
+                stale_age_s=None,
+            )
+
+        stop_ids = [origin_stop_id, destination_stop_id]
+        if self._prefetcher is not None:
+            self._prefetcher.record(stop_ids, route_id, self._initial_limit)
+
+        async def paged() -> JourneyEstimate:
+            limit, direction_id = self._initial_limit, None
+            while True:
+                raw = await self._mbta.get_predictions_many_async(
+                    stop_ids=stop_ids,
+                    route_id=route_id,
+                    direction_id=direction_id,
+                    limit=limit,
+                    sort="departure_time",
+                )
+                by_stop = predictions_by_stop(raw, stop_ids)
+                try:
+                    return self._estimate_from_stops(
+                        origin_stop_id=origin_stop_id,
+                        destination_stop_id=destination_stop_id,
+                        route_id=route_id,
+                        now=now,
+                        by_stop=by_stop,
+                        stale_age_s=_stale_age_s(raw),
+                    )
+                except RuntimeError:
+                    widened = self._widen(raw, by_stop, stop_ids, limit, direction_id)
+                    if widened is None:
+                        raise
+                    limit, direction_id = widened
+
+        try:
+            return await asyncio.wait_for(paged(), timeout=deadline_s)
+        except asyncio.TimeoutError as e:
+            raise RuntimeError(f"Upstream predictions did not arrive within {deadline_s}s") from e
+
+    def estimate_many(self, queries: list[JourneyQuery], *, now: datetime) -> list[JourneyOutcome]:
+        """
+        Estimate many journeys from shared upstream data.
+
+        The distinct stops of each route are fetched once (one multi-stop call
+        per route), then every estimate is computed from that shared data.
+        Outcomes come back in request order; failures are reported per item.
+        """
+        if now.tzinfo is None:
+            raise ValueError("now must be timezone-aware")
+
+        fetched: dict[str, _RouteData | str] = {}
+        for route_id, stop_ids in self._stops_to_fetch(queries).items():
+            try:
+                raw = self._mbta.get_predictions_many(
+                    stop_ids=stop_ids,
+                    route_id=route_id,
+                    limit=30 * len(stop_ids),
+                    sort="departure_time",
+                )
+            except RuntimeError as e:
+                fetched[route_id] = str(e)
+                continue
+            fetched[route_id] = (predictions_by_stop(raw, stop_ids), _stale_age_s(raw))
+        return [self._outcome(query, fetched, now) for query in queries]
+
+    async def estimate_many_async(
+        self,
+        queries: list[JourneyQuery],
+        *,
+        now: datetime,
+        deadline_s: float | None = None,
+    ) -> list[JourneyOutcome]:
+        """
+        Same as `estimate_many`, with the per-route fetches running concurrently.
+        `deadline_s` bounds each route's upstream wait; a slow route only
+        fails the queries on that route.
+        """
+        if now.tzinfo is None:
+            raise ValueError("now must be timezone-aware")
+
+        async def fetch(route_id: str, stop_ids: list[str]) -> _RouteData | str:
+            try:
+                raw = await asyncio.wait_for(
+                    self._mbta.get_predictions_many_async(
+                        stop_ids=stop_ids,
+                        route_id=route_id,
+                        limit=30 * len(stop_ids),
+                        sort="departure_time",
+                    ),
+                    timeout=deadline_s,
+                )
+            except asyncio.TimeoutError:
+                return f"Upstream predictions did not arrive within {deadline_s}s"
+            except RuntimeError as e:
+                return str(e)
+            return predictions_by_stop(raw, stop_ids), _stale_age_s(raw)
+
+        to_fetch = self._stops_to_fetch(queries)
+        results = await asyncio.gather(*(fetch(route_id, stop_ids) for route_id, stop_ids in to_fetch.items()))
+        fetched = dict(zip(to_fetch, results))
+        return [self._outcome(query, fetched, now) for query in queries]
+
+    def _widen(
+        self,
+        raw: dict,
+        by_stop: dict[str, list[Prediction]],
+        stop_ids: list[str],
+        limit: int,
+        direction_id: int | None,
+    ) -> tuple[int, int | None] | None:
+        """
+        Next (limit, direction_id) to try after the trip join missed, or None
+        if the page already held everything upstream had or the budget is spent.
+        """
+        if len(raw.get("data") or []) < limit or limit >= self._max_limit:
+            return None
+        if direction_id is None:
+            direction_id = _infer_direction(by_stop[stop_ids[0]], by_stop[stop_ids[1]])
+        return min(limit * 2, self._max_limit), direction_id
+
+    def _stops_to_fetch(self, queries: list[JourneyQuery]) -> dict[str, list[str]]:
+        """route -> distinct stops (first-seen order) for queries the live store can't answer."""
+        stops: dict[str, dict[str, None]] = {}
+        for q in queries:
+            if self._from_store(q.origin_stop_id, q.destination_stop_id, q.route_id) is not None:
+                continue
+            route_stops = stops.setdefault(q.route_id, {})
+            route_stops[q.origin_stop_id] = None
+            route_stops[q.destination_stop_id] = None
+        return {route_id: list(route_stops) for route_id, route_stops in stops.items()}
+
+    def _outcome(self, query: JourneyQuery, fetched: dict[str, _RouteData | str], now: datetime) -> JourneyOutcome:
+        stale_age_s: float | None = None
+        by_stop = self._from_store(query.origin_stop_id, query.destination_stop_id, query.route_id)
+        if by_stop is None:
+            route_data = fetched.get(query.route_id)
+            if route_data is None:
+                # The store covered this route when the batch was planned but was invalidated since
+                return JourneyOutcome(query=query, error="Live predictions became unavailable; retry")
+            if isinstance(route_data, str):
+                return JourneyOutcome(query=query, error=route_data)
+            by_stop, stale_age_s = route_data
+        try:
+            estimate = self._estimate_from_stops(
+                origin_stop_id=query.origin_stop_id,
+                destination_stop_id=query.destination_stop_id,
+                route_id=query.route_id,
+                now=now,
+                by_stop=by_stop,
+                stale_age_s=stale_age_s,
+            )
+        except RuntimeError as e:
+            return JourneyOutcome(query=query, error=str(e))
+        return JourneyOutcome(query=query, estimate=estimate)
+
+    def _from_store(
+        self,
+        origin_stop_id: str,
+        destination_stop_id: str,
+        route_id: str,
+    ) -> dict[str, list[Prediction]] | None:
+        if self._store is None or not self._store.covers(route_id):
+            return None
+        origin = self._store.predictions_for(origin_stop_id, route_id)
+        destination = self._store.predictions_for(destination_stop_id, route_id)
+        if not origin or not destination:
+            # e.g. a parent station the source can't map its platforms to; polling can answer it
+            return None
+        return {origin_stop_id: origin, destination_stop_id: destination}
+
+    def _estimate_from_stops(
+        self,
+        *,
+        origin_stop_id: str,
+        destination_stop_id: str,
+        route_id: str,
+        now: datetime,
+        by_stop: dict[str, list[Prediction]],
+        stale_age_s: float | None,
+    ) -> JourneyEstimate:
+        origin_preds = by_stop[origin_stop_id]
+        dest_preds = by_stop[destination_stop_id]
 
         if not origin_preds:
             raise RuntimeError("No upcoming departures found at origin stop")
 
+        return self._estimate_from_predictions(
+            origin_stop_id=origin_stop_id,
+            destination_stop_id=destination_stop_id,
+            route_id=route_id,
+            now=now,
+            origin_preds=origin_preds,
+            dest_preds=dest_preds,
+            stale_age_s=stale_age_s,
+        )
+
+    def _estimate_from_predictions(
+        self,
+        *,
+        origin_stop_id: str,
+        destination_stop_id: str,
+        route_id: str,
+        now: datetime,
+        origin_preds: list[Prediction],
+        dest_preds: list[Prediction],
+        stale_age_s: float | None = None,
+    ) -> JourneyEstimate:
         # 2) Choose the next trip with a valid departure time
         origin_preds = [
             p for p in origin_preds
@@ -70,14 +386,6 @@ class JourneyEstimator:
 
         origin_preds.sort(key=lambda p: p.departure_time)
 
-        # Fetch destination predictions once and index by trip_id
-        dest_raw = self._mbta.get_predictions(
-            stop_id=destination_stop_id,
-         route_id=route_id,
-            limit=25,
-        )
-        dest_preds = predictions_from_mbta(dest_raw)
-
         # Build a map: trip_id -> best available destination time (prefer arrival_time)
         dest_time_by_trip: dict[str, datetime] = {}
         for p in dest_preds:
@@ -98,9 +406,11 @@ class JourneyEstimator:
         for i, cand in enumerate(origin_preds):
             if not cand.trip_id or cand.departure_time is None:
                 continue
-            if cand.trip_id in dest_time_by_trip:
+            matched = dest_time_by_trip.get(cand.trip_id)
+            # A trip reaching the destination before it leaves the origin runs the other way
+            if matched is not None and matched >= cand.departure_time:
                 chosen = cand
-                dest_time = dest_time_by_trip[cand.trip_id]
+                dest_time = matched
                 # headway = next departure after chosen (if any)
                 if i + 1 < len(origin_preds):
                     second_dep = origin_preds[i + 1].departure_time
@@ -108,16 +418,32 @@ class JourneyEstimator:
 
         if chosen is None or dest_time is None:
             raise RuntimeError(
-                "No matching destination prediction found for upcoming origin departures. "
-                "Try a closer destination stop or increase prediction limits."
+                "No matching destination prediction found for upcoming origin departures "
+                "within the current prediction window."
             )
 
+        rolling = (
+            self._headways.stats(origin_stop_id, route_id, chosen.direction_id)
+            if self._headways is not None
+            else None
+        )
+        alert = (
+            self._alerts.impact(route_id=route_id, stop_ids=(origin_stop_id, destination_stop_id))
+            if self._alerts is not None
+            else NO_IMPACT
+        )
+
         # Estimate ETA using chosen origin departure and matched destination time
         eta = self._eta.estimate(
             now=now,
             origin_departure=chosen.departure_time,
             destination_arrival=dest_time,
             second_origin_departure=second_dep,
+            alert_multiplier=alert.multiplier,
+            route_id=route_id,
+            origin_stop_id=origin_stop_id,
+            destination_stop_id=destination_stop_id,
+            headway=rolling,
         )
         used_default_headway = eta.headway_seconds is None
         had_destination_match = True
@@ -126,6 +452,10 @@ class JourneyEstimator:
             headway_seconds=eta.headway_seconds,
             used_default_headway=used_default_headway,
             had_destination_match=had_destination_match,
+            stale_data_age_s=stale_age_s,
+            headway_cv=rolling.cv if rolling is not None else None,
+            alert_severity=alert.severity,
+            alert_effect=alert.effect,
         )
         return JourneyEstimate(
             origin_stop_id=origin_stop_id,
@@ -135,4 +465,28 @@ class JourneyEstimator:
             eta=eta,
             reliability=reliability,
             generated_at=now,
-        )
\ No newline at end of file
+        )
+
+
+def _stale_age_s(raw: dict) -> float | None:
+    # MbtaPayload marks last-known-good copies served while upstream is unavailable
+    return getattr(raw, "age_s", None) if getattr(raw, "stale", False) else None
+
+
+# Per-route fetch result: predictions split by requested stop, and stale age (None when fresh)
+_RouteData = tuple[dict[str, list[Prediction]], Optional[float]]
+
+
+def _infer_direction(origin_preds: list[Prediction], dest_preds: list[Prediction]) -> int | None:
+    """
+    Travel direction if the data pins it down: the only direction served at
+    both stops, or the only one departing the origin (platform stops, termini).
+    """
+    origin_dirs = {p.direction_id for p in origin_preds if p.direction_id is not None and p.departure_time is not None}
+    dest_dirs = {p.direction_id for p in dest_preds if p.direction_id is not None}
+    common = origin_dirs & dest_dirs
+    if len(common) == 1:
+        return common.pop()
+    if len(origin_dirs) == 1:
+        return next(iter(origin_dirs))
+    return None
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone
+
+from transit_app.config.settings import Settings
+from transit_app.providers.mbta.alerts import NO_IMPACT, AlertsCache
+from transit_app.providers.mbta.client import ALERT_FIELDS, MbtaV3Client
+from transit_app.services.eta import EtaEstimator
+from transit_app.services.reliability import ReliabilityScorer
+from transit_app.use_cases.journey import JourneyEstimator
+
+NOW = datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc)
+
+
+def _alert(alert_id: str, effect: str, severity: int, entities: list[dict], end: str | None = None) -> dict:
+    return {
+        "type": "alert",
+        "id": alert_id,
+        "attributes": {
+            "effect": effect,
+            "severity": severity,
+            "active_period": [{"start": "2026-01-20T11:00:00+00:00", "end": end}],
+            "informed_entity": entities,
+        },
+    }
+
+
+ALERTS = {
+    "data": [
+        _alert("route-delay", "DELAY", 5, [{"route": "Red"}]),
+        _alert("stop-closed", "STOP_CLOSURE", 10, [{"route": "Green-B", "stop": "place-bland"}]),
+        _alert("elevator", "ELEVATOR_CLOSURE", 10, [{"stop": "place-davis"}]),
+        _alert("expired", "SUSPENSION", 10, [{"route": "Orange"}], end="2026-01-20T11:30:00+00:00"),
+    ]
+}
+
+
+class FakeAlertsClient:
+    def __init__(self, payload: dict) -> None:
+        self.payload = payload
+        self.calls = 0
+        self.fail = False
+
+    def get_alerts(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return self.payload
+
+
+def _cache(client: FakeAlertsClient) -> AlertsCache:
+    cache = AlertsCache(client, clock=lambda: NOW.timestamp())
+    cache.refresh()
+    return cache
+
+
+def test_impact_looks_up_route_and_stop_alerts():
+    cache = _cache(FakeAlertsClient(ALERTS))
+
+    red = cache.impact(route_id="Red", stop_ids=["place-davis", "place-pktrm"])
+    assert (red.multiplier, red.severity, red.effect) == (1.5, 5, "DELAY")
+
+    # Route+stop entity only applies on that route; closures weigh 0.5
+    assert cache.impact(route_id="Green-B", stop_ids=["place-bland"]).multiplier == 1.5
+    assert cache.impact(route_id="Green-C", stop_ids=["place-bland"]) is NO_IMPACT
+
+    # Accessibility-only effects and expired alerts don't change travel time
+    assert cache.impact(route_id="Orange", stop_ids=["place-davis"]) is NO_IMPACT
+
+
+def test_failed_refresh_keeps_last_index_and_unchanged_payload_is_not_reindexed():
+    client = FakeAlertsClient(ALERTS)
+    cache = _cache(client)
+    index = cache._index
+
+    cache.refresh()  # same payload object, as a 304 returns
+    assert cache._index is index
+
+    client.fail = True
+    try:
+        cache.refresh()
+    except RuntimeError:
+        pass
+    assert cache.impact(route_id="Red").effect == "DELAY"
+
+
+def test_refresh_thread_survives_unexpected_errors():
+    client = FakeAlertsClient({"data": ["not an alert"]})
+    cache = AlertsCache(client, refresh_s=0.01)
+    cache.start()
+    deadline = time.monotonic() + 5
+    while cache.failed_refreshes < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    cache.stop()
+
+    assert cache.failed_refreshes >= 2
+
+
+class OneTripClient:
+    def get_predictions_many(self, *, stop_ids, route_id, direction_id=None, limit=30, sort=None):
+        def resource(stop: str, field: str, at: str) -> dict:
+            return {
+                "attributes": {field: at},
+                "relationships": {
+                    "stop": {"data": {"id": stop}},
+                    "route": {"data": {"id": route_id}},
+                    "trip": {"data": {"id": "trip-1"}},
+                },
+            }
+
+        return {
+            "data": [
+                resource("place-davis", "departure_time", "2026-01-20T12:05:00+00:00"),
+                resource("place-pktrm", "arrival_time", "2026-01-20T12:20:00+00:00"),
+            ]
+        }
+
+
+def test_journey_widens_bands_and_lowers_score_under_alerts():
+    def estimator(alerts):
+        return JourneyEstimator(
+            mbta_client=OneTripClient(),
+            eta_estimator=EtaEstimator(),
+            reliability_scorer=ReliabilityScorer(),
+            alerts=alerts,
+        )
+
+    kwargs = dict(origin_stop_id="place-davis", destination_stop_id="place-pktrm", route_id="Red", now=NOW)
+    calm = estimator(None).estimate(**kwargs)
+    alerted = estimator(_cache(FakeAlertsClient(ALERTS))).estimate(**kwargs)
+
+    assert alerted.eta.p90_arrival > calm.eta.p90_arrival
+    assert alerted.reliability.score == calm.reliability.score - 20
+    assert any("delay" in r for r in alerted.reliability.reasons)
+    assert "Active alerts widen" in alerted.eta.explanation
+
+
+class RecordingHttp:
+    def __init__(self) -> None:
+        self.urls: list[str] = []
+        self.params: list[dict] = []
+
+    def get_json(self, url, *, params=None, headers=None, timeout_s=10.0):
+        self.urls.append(url)
+        self.params.append(params)
+        return {"data": []}
+
+
+def test_client_fetches_active_alerts_without_notifying_prediction_observers():
+    http = RecordingHttp()
+    observed = []
+    client = MbtaV3Client(http=http, settings=Settings(), conditional_requests=False, payload_observer=observed.append)
+
+    client.get_alerts()
+
+    assert http.urls == ["https://api-v3.mbta.com/alerts"]
+    assert http.params[0] == {"filter[datetime]": "NOW", "fields[alert]": ALERT_FIELDS}
+    assert observed == []
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from transit_app.archive.backtest import BacktestUnit, plan_units, run_backtest
+from transit_app.archive.replay import ReplayMbtaClient
+from transit_app.archive.segments import ArchiveReader, SegmentWriter, Snapshot
+from transit_app.providers.mbta.columnar import prediction_batch_from_mbta
+from transit_app.providers.mbta.mapper import predictions_from_mbta
+from transit_app.use_cases.journey import JourneyQuery
+
+T0 = int(datetime(2026, 1, 20, 15, 0, tzinfo=timezone.utc).timestamp())
+
+# trip -> (departs A, predicted arrival at B, actual arrival at B)
+TRIPS = {
+    "t1": (T0 + 300, T0 + 900, T0 + 960),
+    "t2": (T0 + 600, T0 + 1200, T0 + 1400),
+    "t3": (T0 + 900, T0 + 1500, T0 + 1500),
+}
+
+
+def _iso(epoch_s: int) -> str:
+    return datetime.fromtimestamp(epoch_s, tz=timezone.utc).isoformat()
+
+
+def _resource(stop: str, trip: str, *, arrival: int | None = None, departure: int | None = None) -> dict:
+    return {
+        "attributes": {
+            "direction_id": 0,
+            "arrival_time": _iso(arrival) if arrival else None,
+            "departure_time": _iso(departure) if departure else None,
+        },
+        "relationships": {
+            "stop": {"data": {"id": stop}},
+            "route": {"data": {"id": "Red"}},
+            "trip": {"data": {"id": trip}},
+        },
+    }
+
+
+def _write_archive(root) -> None:
+    """A poll every minute; each trip's B arrival switches from predicted to actual once it departs A."""
+    snapshots = []
+    for captured in range(T0 - 60, T0 + 1560, 60):
+        data = []
+        for trip, (depart_a, predicted_b, actual_b) in TRIPS.items():
+            if depart_a >= captured:
+                data.append(_resource("A", trip, departure=depart_a))
+            arrive_b = predicted_b if captured < depart_a else actual_b
+            if arrive_b >= captured:
+                data.append(_resource("B", trip, arrival=arrive_b))
+        snapshots.append(Snapshot(captured_at=captured, batch=prediction_batch_from_mbta({"data": data})))
+    writer = SegmentWriter(root)
+    writer.write(snapshots)
+    writer.close()
+
+
+def _dt(epoch_s: int) -> datetime:
+    return datetime.fromtimestamp(epoch_s, tz=timezone.utc)
+
+
+def test_replay_client_serves_the_view_as_of_the_injected_time(tmp_path):
+    _write_archive(tmp_path)
+    client = ReplayMbtaClient(ArchiveReader(tmp_path), start=_dt(T0 - 600), end=_dt(T0 + 3600), route_ids=["Red"])
+
+    client.advance_to(_dt(T0 + 400))
+    payload = client.get_predictions_many(stop_ids=["A", "B"], route_id="Red", limit=10)
+    origin = [p for p in predictions_from_mbta(payload) if p.stop_id == "A"]
+    assert [p.trip_id for p in origin] == ["t2", "t3"]  # t1 already left A
+
+    assert len(client.get_predictions_many(stop_ids=["A", "B"], limit=2)["data"]) == 2
+    with pytest.raises(ValueError):
+        client.advance_to(_dt(T0))
+
+    actuals = client.actual_arrivals()
+    assert actuals[("B", "t1")] == T0 + 960
+    assert actuals[("B", "t2")] == T0 + 1400
+
+
+def test_backtest_scores_band_coverage_against_actual_arrivals(tmp_path):
+    _write_archive(tmp_path)
+    query = JourneyQuery(origin_stop_id="A", destination_stop_id="B", route_id="Red")
+    unit = BacktestUnit(archive_root=str(tmp_path), start=_dt(T0), end=_dt(T0 + 600), queries=(query,), step_s=120)
+
+    coverage = run_backtest([unit], max_workers=1)[query]
+
+    # t1 (3 steps) lands inside its bands; t2 (2 steps) is later than P90
+    assert (coverage.estimates, coverage.failed, coverage.scored) == (5, 0, 5)
+    assert (coverage.within_p80, coverage.within_p90) == (3, 3)
+    assert coverage.p80_coverage == pytest.approx(0.6)
+    assert coverage.p50_mean_abs_error_s == pytest.approx((3 * 60 + 2 * 200) / 5)
+
+
+def test_backtest_answers_journeys_asked_by_parent_station(tmp_path):
+    _write_archive(tmp_path)
+    query = JourneyQuery(origin_stop_id="place-a", destination_stop_id="place-b", route_id="Red")
+    (unit,) = plan_units(
+        archive_root=tmp_path,
+        start=_dt(T0),
+        end=_dt(T0 + 600),
+        queries=[query],
+        step_s=120,
+        parents={"A": "place-a", "B": "place-b"},
+    )
+
+    coverage = run_backtest([unit], max_workers=1)[query]
+
+    assert (coverage.estimates, coverage.failed, coverage.scored) == (5, 0, 5)
+    assert (coverage.within_p80, coverage.within_p90) == (3, 3)
+
+
+def test_backtest_over_a_process_pool_matches_in_process_run(tmp_path):
+    _write_archive(tmp_path)
+    query = JourneyQuery(origin_stop_id="A", destination_stop_id="B", route_id="Red")
+    units = [
+        BacktestUnit(archive_root=str(tmp_path), start=_dt(T0), end=_dt(T0 + 300), queries=(query,), step_s=120),
+        BacktestUnit(archive_root=str(tmp_path), start=_dt(T0 + 300), end=_dt(T0 + 600), queries=(query,), step_s=120),
+    ]
+    assert run_backtest(units, max_workers=2) == run_backtest(units, max_workers=1)
+
+
+def test_plan_units_splits_by_service_day_and_route(tmp_path):
+    red = JourneyQuery(origin_stop_id="A", destination_stop_id="B", route_id="Red")
+    orange = JourneyQuery(origin_stop_id="C", destination_stop_id="D", route_id="Orange")
+    start = datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc)
+
+    units = plan_units(archive_root=tmp_path, start=start, end=start + timedelta(days=1), queries=[red, orange])
+
+    # 07:00 local to midnight, midnight to 07:00 local; one unit per route each
+    assert len(units) == 4
+    assert {u.queries for u in units} == {(red,), (orange,)}
+    assert units[0].end == units[2].start
+    assert units[0].end.astimezone(timezone.utc) == datetime(2026, 1, 21, 5, 0, tzinfo=timezone.utc)
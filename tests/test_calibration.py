@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from transit_app.services.calibration import (
+    CalibrationObservation,
+    CalibrationTable,
+    build_calibration,
+    hour_of_week,
+)
+from transit_app.services.eta import EtaEstimator
+
+# Tuesday 08:05 in Boston (EST, UTC-5)
+DEPART = datetime(2026, 1, 20, 13, 5, tzinfo=timezone.utc)
+
+
+def _observations(n: int, *, departure: datetime = DEPART) -> list[CalibrationObservation]:
+    predicted = departure + timedelta(minutes=20)
+    return [
+        CalibrationObservation(
+            route_id="Red",
+            origin_stop_id="place-davis",
+            destination_stop_id="place-pktrm",
+            departure_time=departure,
+            predicted_arrival=predicted,
+            actual_arrival=predicted + timedelta(seconds=10 * i),  # 0s .. 190s late
+            headway_seconds=300,
+        )
+        for i in range(n)
+    ]
+
+
+def test_hour_of_week_uses_service_time():
+    assert hour_of_week(DEPART) == 24 + 8
+
+
+def test_build_calibration_computes_quantiles_and_round_trips():
+    table = build_calibration(_observations(20), min_samples=20)
+
+    offsets = table.lookup(
+        route_id="Red",
+        origin_stop_id="place-davis",
+        destination_stop_id="place-pktrm",
+        departure_time=DEPART,
+        headway_seconds=280,
+    )
+    assert offsets is not None
+    assert (offsets.p80_s, offsets.p90_s, offsets.samples) == (150, 170, 20)
+
+    # Another hour of the week falls back to the pooled entry
+    later = CalibrationTable.from_json(table.to_json()).lookup(
+        route_id="Red",
+        origin_stop_id="place-davis",
+        destination_stop_id="place-pktrm",
+        departure_time=DEPART + timedelta(hours=5),
+        headway_seconds=280,
+    )
+    assert later == offsets
+
+
+def test_sparse_groups_are_left_out():
+    table = build_calibration(_observations(5), min_samples=20)
+    assert len(table) == 0
+
+
+def test_estimator_uses_calibration_and_falls_back_to_heuristic():
+    est = EtaEstimator(build_calibration(_observations(20), min_samples=20))
+    arrive = DEPART + timedelta(minutes=20)
+    kwargs = dict(
+        now=DEPART - timedelta(minutes=2),
+        origin_departure=DEPART,
+        destination_arrival=arrive,
+        second_origin_departure=DEPART + timedelta(minutes=5),
+    )
+
+    calibrated = est.estimate(**kwargs, route_id="Red", origin_stop_id="place-davis", destination_stop_id="place-pktrm")
+    assert calibrated.p80_arrival == arrive + timedelta(seconds=150)
+    assert "calibrated" in calibrated.explanation
+
+    heuristic = est.estimate(**kwargs, route_id="Red", origin_stop_id="place-davis", destination_stop_id="elsewhere")
+    assert heuristic == EtaEstimator().estimate(**kwargs)
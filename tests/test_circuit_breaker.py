@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from transit_app.config.settings import Settings
+from transit_app.http.base import HttpStatusError
+from transit_app.http.circuit_breaker import BreakerState, CircuitBreaker, CircuitBreakers, CircuitOpenError
+from transit_app.providers.mbta.cache import PredictionCache
+from transit_app.providers.mbta.client import MbtaV3Client
+from transit_app.providers.mbta.mapper import predictions_from_mbta
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=30.0, clock=clock)
+
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.status().state is BreakerState.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 31.0
+    breaker.before_call()  # the half-open probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.status().state is BreakerState.CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=10.0, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 11.0
+    breaker.before_call()
+    breaker.record_failure()
+
+    status = breaker.status()
+    assert status.state is BreakerState.OPEN
+    assert status.retry_in_s == pytest.approx(10.0)
+
+
+class FlakyHttp:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.error: RuntimeError | None = None
+
+    def get_json(self, url, *, params=None, headers=None, timeout_s=10.0):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return {
+            "data": [
+                {
+                    "attributes": {"departure_time": "2026-01-20T12:05:00-05:00"},
+                    "relationships": {"stop": {"data": {"id": "place-davis"}}},
+                }
+            ]
+        }
+
+
+def _client(http: FlakyHttp, clock: FakeClock) -> MbtaV3Client:
+    return MbtaV3Client(
+        http=http,
+        settings=Settings(),
+        cache=PredictionCache(ttl_s=10.0, clock=clock),
+        conditional_requests=False,
+        breakers=CircuitBreakers(failure_threshold=2, reset_timeout_s=30.0, clock=clock),
+        stale_max_age_s=300.0,
+    )
+
+
+def test_client_serves_stale_payload_while_upstream_fails():
+    clock = FakeClock()
+    http = FlakyHttp()
+    client = _client(http, clock)
+
+    fresh = client.get_predictions(stop_id="place-davis")
+    assert not fresh.stale
+
+    clock.now = 60.0
+    http.error = RuntimeError("HTTP 503")
+    stale = client.get_predictions(stop_id="place-davis")
+    assert stale.stale
+    assert stale.age_s == pytest.approx(60.0)
+    assert len(predictions_from_mbta(stale)) == 1
+
+    # Second failure opens the breaker; the next call never reaches upstream
+    client.get_predictions(stop_id="place-davis")
+    calls = http.calls
+    assert client.get_predictions(stop_id="place-davis").stale
+    assert http.calls == calls
+
+
+def test_client_raises_when_stale_copy_is_too_old():
+    clock = FakeClock()
+    http = FlakyHttp()
+    client = _client(http, clock)
+    client.get_predictions(stop_id="place-davis")
+
+    clock.now = 400.0
+    http.error = RuntimeError("HTTP 503")
+    with pytest.raises(RuntimeError):
+        client.get_predictions(stop_id="place-davis")
+
+
+def test_client_errors_do_not_trip_breaker():
+    clock = FakeClock()
+    http = FlakyHttp()
+    http.error = HttpStatusError("HTTP 400", status_code=400)
+    client = _client(http, clock)
+
+    for _ in range(3):
+        with pytest.raises(HttpStatusError):
+            client.get_predictions(stop_id="bad-stop")
+    assert http.calls == 3
+
+
+def test_cancelled_probe_frees_the_slot_without_counting():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=10.0, clock=clock)
+    breaker.record_failure()
+    clock.now = 11.0
+
+    breaker.before_call()
+    breaker.record_abandoned()
+    assert breaker.status().consecutive_failures == 1
+
+    breaker.before_call()  # a new probe may go through
+    breaker.record_success()
+    assert breaker.status().state is BreakerState.CLOSED
+
+
+class HangingAsyncHttp:
+    async def get_json(self, url, *, params=None, headers=None, timeout_s=10.0):
+        await asyncio.sleep(10.0)
+
+
+def test_caller_cancellation_does_not_trip_breaker():
+    clock = FakeClock()
+    breakers = CircuitBreakers(failure_threshold=1, reset_timeout_s=30.0, clock=clock)
+    client = MbtaV3Client(
+        http=FlakyHttp(),
+        settings=Settings(),
+        async_http=HangingAsyncHttp(),
+        conditional_requests=False,
+        breakers=breakers,
+    )
+
+    async def scenario() -> None:
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(client.get_predictions_async(stop_id="place-davis"), timeout=0.01)
+
+    asyncio.run(scenario())
+    status = breakers.statuses()["predictions"]
+    assert status.state is BreakerState.CLOSED
+    assert status.consecutive_failures == 0
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+
+from transit_app.config.settings import Settings
+from transit_app.container import build_container
+
+
+def test_build_container_wires_shared_http_client(tmp_path):
+    container = build_container(Settings(reference_dir=str(tmp_path)))
+
+    assert container.mbta._http is container.http
+    assert container.journey._mbta is container.mbta
+    container.close()
+
+
+def test_container_warm_up_loads_reference_and_opens_connection(tmp_path, monkeypatch):
+    (tmp_path / "stops_min.json").write_text(json.dumps([{"stop_id": "place-davis", "stop_name": "Davis"}]))
+    (tmp_path / "routes_min.json").write_text("[]")
+    container = build_container(Settings(reference_dir=str(tmp_path), mbta_base_url="https://example.test"))
+
+    warmed = []
+    monkeypatch.setattr(container.http, "warm", lambda url, timeout_s: warmed.append(url) or True)
+
+    container.warm_up()
+    assert warmed == ["https://example.test"]
+    container.close()
+
+
+def test_container_warm_up_survives_missing_reference_artifacts(tmp_path, monkeypatch):
+    container = build_container(Settings(reference_dir=str(tmp_path), mbta_base_url="https://example.test"))
+
+    warmed = []
+    monkeypatch.setattr(container.http, "warm", lambda url, timeout_s: warmed.append(url) or True)
+
+    container.warm_up()
+    assert warmed == ["https://example.test"]
+    container.close()
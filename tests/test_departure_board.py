@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+from transit_app.services.eta import EtaEstimator
+from transit_app.services.reliability import ReliabilityScorer
+from transit_app.use_cases.departures import DepartureBoard
+
+
+def _row(route: str, trip: str, direction: int, departure: str | None) -> dict:
+    return {
+        "attributes": {"direction_id": direction, "departure_time": departure, "arrival_time": None},
+        "relationships": {
+            "stop": {"data": {"id": "70064"}},
+            "route": {"data": {"id": route}},
+            "trip": {"data": {"id": trip}},
+        },
+    }
+
+
+class FakeMbtaClient:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def get_predictions(self, *, stop_id, route_id=None, limit=10, sort=None):
+        self.calls += 1
+        return {
+            "data": [
+                _row("Red", "r-2", 0, "2026-01-20T12:12:00+00:00"),
+                _row("Red", "r-1", 0, "2026-01-20T12:04:00+00:00"),
+                _row("87", "b-1", 1, "2026-01-20T12:06:00+00:00"),
+                _row("Red", "r-0", 0, "2026-01-20T11:58:00+00:00"),  # already gone
+                _row("Red", "r-9", 1, None),  # arrival-only (terminal)
+            ]
+        }
+
+    async def get_predictions_async(self, **kwargs):
+        return self.get_predictions(**kwargs)
+
+
+def _board(client: FakeMbtaClient) -> DepartureBoard:
+    return DepartureBoard(mbta_client=client, eta_estimator=EtaEstimator(), reliability_scorer=ReliabilityScorer())
+
+
+def test_board_lists_upcoming_departures_with_per_line_headways():
+    client = FakeMbtaClient()
+    result = _board(client).board(stop_id="place-davis", now=datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc))
+
+    assert client.calls == 1
+    assert [d.trip_id for d in result.departures] == ["r-1", "b-1", "r-2"]
+    first, bus, last = result.departures
+    assert first.eta.headway_seconds == 8 * 60
+    assert bus.eta.headway_seconds is None
+    assert last.eta.headway_seconds is None
+    assert first.eta.p50_arrival == first.eta.depart_time
+    assert first.reliability.score > bus.reliability.score
+
+
+def test_board_async_respects_limit():
+    result = asyncio.run(
+        _board(FakeMbtaClient()).board_async(
+            stop_id="place-davis",
+            now=datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc),
+            limit=2,
+        )
+    )
+    assert [d.trip_id for d in result.departures] == ["r-1", "b-1"]
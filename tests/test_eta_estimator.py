@@ -50,3 +50,22 @@ def test_eta_estimator_requires_tz_aware_datetimes():
             origin_departure=naive,
             destination_arrival=naive,
         )
+
+
+def test_estimate_many_matches_single_estimates():
+    est = EtaEstimator()
+    departs = [_dt(5), _dt(8), _dt(30)]
+    arrives = [_dt(25), _dt(28), _dt(50)]
+    nexts = [_dt(8), _dt(30), None]
+
+    many = est.estimate_many(
+        now=_dt(0),
+        origin_departures=departs,
+        destination_arrivals=arrives,
+        next_origin_departures=nexts,
+    )
+
+    assert many == [
+        est.estimate(now=_dt(0), origin_departure=d, destination_arrival=a, second_origin_departure=n)
+        for d, a, n in zip(departs, arrives, nexts)
+    ]
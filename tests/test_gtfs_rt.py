@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from transit_app.providers.base import PredictionSources
+from transit_app.providers.gtfs_rt.feed import TripUpdatesFeed
+from transit_app.providers.gtfs_rt.protobuf import as_signed, iter_fields, read_varint
+from transit_app.providers.gtfs_rt.trip_updates import decode_trip_updates
+from transit_app.services.eta import EtaEstimator
+from transit_app.services.reliability import ReliabilityScorer
+from transit_app.use_cases.journey import JourneyEstimator, JourneyQuery
+
+T0 = int(datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc).timestamp())
+
+
+# --- minimal protobuf writer for building test feeds ---
+
+def _varint(value: int) -> bytes:
+    value &= (1 << 64) - 1
+    out = bytearray()
+    while True:
+        b = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _int(field: int, value: int) -> bytes:
+    return _varint(field << 3) + _varint(value)
+
+
+def _msg(field: int, *parts: bytes) -> bytes:
+    body = b"".join(parts)
+    return _varint(field << 3 | 2) + _varint(len(body)) + body
+
+
+def _str(field: int, value: str) -> bytes:
+    return _msg(field, value.encode())
+
+
+def _stop_time_update(stop_id: str, *, arrival: int | None = None, departure: int | None = None, skipped=False) -> bytes:
+    parts = [_int(1, 7), _str(4, stop_id)]
+    if arrival is not None:
+        parts.append(_msg(2, _int(1, -30), _int(2, arrival)))  # negative delay: 10-byte varint
+    if departure is not None:
+        parts.append(_msg(3, _int(2, departure)))
+    if skipped:
+        parts.append(_int(5, 1))
+    return _msg(2, *parts)
+
+
+def _trip_entity(entity_id: str, trip_id: str, route_id: str, direction: int, *updates: bytes, deleted=False) -> bytes:
+    trip = _msg(1, _str(1, trip_id), _str(3, "20260120"), _str(5, route_id), _int(6, direction))
+    parts = [_str(1, entity_id), _msg(3, trip, *updates)]
+    if deleted:
+        parts.append(_int(2, 1))
+    return _msg(2, *parts)
+
+
+def _feed(timestamp: int, *entities: bytes) -> bytes:
+    header = _msg(1, _str(1, "2.0"), _int(2, 0), _int(3, timestamp))
+    return header + b"".join(entities)
+
+
+FEED = _feed(
+    T0,
+    _trip_entity(
+        "e1", "trip-1", "Red", 0,
+        _stop_time_update("70061", departure=T0 + 300),
+        _stop_time_update("70063", arrival=T0 + 480, skipped=True),
+        _stop_time_update("70075", arrival=T0 + 1200),
+    ),
+    _trip_entity("e2", "trip-2", "Red", 0, _stop_time_update("70061", departure=T0 + 720)),
+    _trip_entity("e3", "trip-gone", "Red", 0, _stop_time_update("70061", departure=T0 + 60), deleted=True),
+    # A vehicle position entity: skipped by length
+    _msg(2, _str(1, "v1"), _msg(4, _msg(2, _int(1, 5)))),
+)
+
+
+def test_wire_reader_decodes_varints_and_signed_values():
+    assert read_varint(_varint(300), 0) == (300, 2)
+    assert as_signed(read_varint(_varint(-30), 0)[0]) == -30
+    assert [(f, w) for f, w, _, _ in iter_fields(_int(1, 5) + _str(2, "x"))] == [(1, 0), (2, 2)]
+    with pytest.raises(ValueError):
+        list(iter_fields(_str(2, "abc")[:-1]))
+
+
+def test_decode_trip_updates_maps_stop_time_updates_to_predictions():
+    feed = decode_trip_updates(FEED)
+
+    assert feed.timestamp == T0
+    rows = [(p.trip_id, p.stop_id, p.route_id, p.direction_id) for p in feed.predictions]
+    assert rows == [
+        ("trip-1", "70061", "Red", 0),
+        ("trip-1", "70075", "Red", 0),
+        ("trip-2", "70061", "Red", 0),
+    ]
+    first = feed.predictions[0]
+    assert first.departure_time == datetime.fromtimestamp(T0 + 300, tz=timezone.utc)
+    assert first.arrival_time is None
+
+
+class FakeBytesHttp:
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        self.calls = 0
+
+    def get_bytes(self, url, *, params=None, headers=None, timeout_s=10.0):
+        self.calls += 1
+        return self.body
+
+
+class Clock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _feed_source(http: FakeBytesHttp, clock: Clock) -> TripUpdatesFeed:
+    return TripUpdatesFeed(
+        http=http,
+        url="https://cdn.example/TripUpdates.pb",
+        max_age_s=60,
+        parents={"70061": "place-davis", "70075": "place-pktrm"},
+        clock=clock,
+    )
+
+
+def test_feed_indexes_by_stop_parent_and_trip_and_ages_out():
+    http, clock = FakeBytesHttp(FEED), Clock(T0)
+    source = _feed_source(http, clock)
+    assert not source.covers("Red")
+
+    assert source.refresh()
+    assert source.covers("Red")
+    assert len(source) == 3
+    assert {p.trip_id for p in source.predictions_for("place-davis", "Red")} == {"trip-1", "trip-2"}
+    assert source.predictions_for("place-davis", "Orange") == []
+    assert [p.stop_id for p in source.predictions_for_trip("trip-1")] == ["70061", "70075"]
+
+    assert not source.refresh()  # same header timestamp: not decoded again
+
+    http.body = b"\x0a\xff"  # truncated
+    clock.now += 61
+    with pytest.raises(RuntimeError):
+        source.refresh()
+    assert not source.covers("Red")
+
+
+def test_truncated_stop_time_event_is_malformed_not_a_crash():
+    # The arrival StopTimeEvent ends right after the key of its `time` field, at the end of the buffer
+    event = _msg(2, _varint(2 << 3))
+    data = _feed(T0, _trip_entity("e1", "trip-1", "Red", 0, _msg(2, _str(4, "70061"), event)))
+    with pytest.raises(ValueError):
+        decode_trip_updates(data)
+
+    source = _feed_source(FakeBytesHttp(data), Clock(T0))
+    with pytest.raises(RuntimeError, match="Malformed"):
+        source.refresh()
+
+
+def test_stop_time_event_skips_fixed_width_fields_before_time():
+    # Unknown fixed32 (field 14) and fixed64 (field 15) fields ahead of `time`
+    event = _msg(2, _varint(14 << 3 | 5) + b"\x00" * 4, _varint(15 << 3 | 1) + b"\x00" * 8, _int(2, T0 + 60))
+    data = _feed(T0, _trip_entity("e1", "trip-1", "Red", 0, _msg(2, _str(4, "70061"), event)))
+
+    (prediction,) = decode_trip_updates(data).predictions
+    assert prediction.arrival_time == datetime.fromtimestamp(T0 + 60, tz=timezone.utc)
+
+
+def test_read_varint_respects_message_end():
+    with pytest.raises(ValueError):
+        read_varint(b"\x96\x01", 0, 1)
+    with pytest.raises(ValueError):
+        read_varint(b"", 0)
+
+
+class ExplodingMbtaClient:
+    def get_predictions_many(self, **kwargs):
+        raise AssertionError("journeys covered by the feed must not poll")
+
+
+def test_journey_estimator_runs_against_the_feed():
+    clock = Clock(T0)
+    source = _feed_source(FakeBytesHttp(FEED), clock)
+    source.refresh()
+    estimator = JourneyEstimator(
+        mbta_client=ExplodingMbtaClient(),
+        eta_estimator=EtaEstimator(),
+        reliability_scorer=ReliabilityScorer(),
+        prediction_store=source,
+    )
+
+    result = estimator.estimate(
+        origin_stop_id="place-davis",
+        destination_stop_id="place-pktrm",
+        route_id="Red",
+        now=datetime.fromtimestamp(T0, tz=timezone.utc),
+    )
+
+    assert result.trip_id == "trip-1"
+    assert result.eta.headway_seconds == 420
+
+
+class PollingMbtaClient:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def get_predictions_many(self, *, stop_ids, route_id, direction_id=None, limit=30, sort=None):
+        self.calls += 1
+        rows = [("place-davis", "departure_time", T0 + 300), ("place-pktrm", "arrival_time", T0 + 1200)]
+        return {
+            "data": [
+                {
+                    "attributes": {field: datetime.fromtimestamp(t, tz=timezone.utc).isoformat()},
+                    "relationships": {"stop": {"data": {"id": stop}}, "trip": {"data": {"id": "trip-1"}}},
+                }
+                for stop, field, t in rows
+            ]
+        }
+
+
+def test_journey_estimator_polls_when_feed_has_no_rows_for_a_stop():
+    # No parent map (e.g. reference data without parent_station): the feed only knows platform ids
+    clock = Clock(T0)
+    source = TripUpdatesFeed(http=FakeBytesHttp(FEED), url="https://cdn.example/TripUpdates.pb", clock=clock)
+    source.refresh()
+    client = PollingMbtaClient()
+    estimator = JourneyEstimator(
+        mbta_client=client,
+        eta_estimator=EtaEstimator(),
+        reliability_scorer=ReliabilityScorer(),
+        prediction_store=source,
+    )
+
+    result = estimator.estimate(
+        origin_stop_id="place-davis",
+        destination_stop_id="place-pktrm",
+        route_id="Red",
+        now=datetime.fromtimestamp(T0, tz=timezone.utc),
+    )
+
+    assert result.trip_id == "trip-1"
+    assert client.calls == 1
+
+
+def test_estimate_many_polls_queries_the_feed_cannot_answer():
+    clock = Clock(T0)
+    source = TripUpdatesFeed(http=FakeBytesHttp(FEED), url="https://cdn.example/TripUpdates.pb", clock=clock)
+    source.refresh()
+    client = PollingMbtaClient()
+    estimator = JourneyEstimator(
+        mbta_client=client,
+        eta_estimator=EtaEstimator(),
+        reliability_scorer=ReliabilityScorer(),
+        prediction_store=source,
+    )
+    queries = [
+        JourneyQuery(origin_stop_id="place-davis", destination_stop_id="place-pktrm", route_id="Red"),
+        JourneyQuery(origin_stop_id="70061", destination_stop_id="70075", route_id="Red"),
+    ]
+
+    outcomes = estimator.estimate_many(queries, now=datetime.fromtimestamp(T0, tz=timezone.utc))
+
+    assert [o.estimate.trip_id for o in outcomes] == ["trip-1", "trip-1"]
+    assert client.calls == 1  # only the parent-station query polled
+
+
+class StaticSource:
+    def __init__(self, routes, name):
+        self.routes, self.name = routes, name
+
+    def covers(self, route_id):
+        return route_id in self.routes
+
+    def predictions_for(self, stop_id, route_id=None):
+        return [self.name]
+
+
+def test_prediction_sources_ask_the_first_covering_source():
+    sources = PredictionSources([StaticSource({"Red"}, "stream"), StaticSource({"Red", "Orange"}, "feed")])
+
+    assert sources.predictions_for("s", "Red") == ["stream"]
+    assert sources.predictions_for("s", "Orange") == ["feed"]
+    assert not sources.covers("Blue")
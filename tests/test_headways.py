@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import statistics
+from datetime import datetime, timezone
+
+import pytest
+
+from transit_app.providers.mbta.headway_observer import HeadwayObserver, HeadwayObserverStats, departures_from_mbta
+from transit_app.services.eta import EtaEstimator
+from transit_app.services.headways import (
+    HEADWAY_FREQUENT,
+    HEADWAY_INFREQUENT,
+    HEADWAY_LARGE,
+    HEADWAY_MODERATE,
+    HEADWAY_UNKNOWN,
+    HeadwayTracker,
+    RollingHeadway,
+    headway_bucket,
+)
+from transit_app.services.reliability import ReliabilityScorer
+from transit_app.use_cases.journey import JourneyEstimator
+
+T0 = int(datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc).timestamp())
+
+
+def _iso(epoch_s: int) -> str:
+    return datetime.fromtimestamp(epoch_s, tz=timezone.utc).isoformat()
+
+
+def _departure(stop: str, trip: str, departure_s: int, *, route: str = "Red", direction: int = 0) -> dict:
+    return {
+        "attributes": {"direction_id": direction, "departure_time": _iso(departure_s)},
+        "relationships": {
+            "stop": {"data": {"id": stop}},
+            "route": {"data": {"id": route}},
+            "trip": {"data": {"id": trip}},
+        },
+    }
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_rolling_window_matches_full_recomputation_after_eviction():
+    rolling = RollingHeadway(window=5)
+    gaps = [300, 420, 180, 600, 240, 360, 330, 900]
+    for gap in gaps:
+        rolling.push(gap)
+
+    window = gaps[-5:]
+    stats = rolling.stats()
+    assert stats.samples == 5
+    assert stats.mean_s == pytest.approx(statistics.fmean(window))
+    assert stats.stdev_s == pytest.approx(statistics.pstdev(window))
+    assert stats.p50_s == 360
+    assert stats.p90_s == 900
+
+
+def _tracker_with_departures(departures: list[int]) -> tuple[HeadwayTracker, FakeClock]:
+    clock = FakeClock(T0)
+    tracker = HeadwayTracker(window=8, min_samples=3, clock=clock)
+    data = [_departure("70061", f"trip-{i}", t) for i, t in enumerate(departures)]
+    tracker.observe(
+        departures_from_mbta(
+            {
+                "data": data,
+                "included": [
+                    {"type": "stop", "id": "70061", "relationships": {"parent_station": {"data": {"id": "place-alfcl"}}}}
+                ],
+            }
+        ),
+        captured_at=T0,
+    )
+    clock.now = departures[-1] + 1
+    return tracker, clock
+
+
+def test_tracker_records_gaps_once_departures_pass():
+    tracker, clock = _tracker_with_departures([T0 + 60, T0 + 360, T0 + 660, T0 + 960])
+
+    stats = tracker.stats("70061", "Red", 0)
+    assert stats is not None
+    assert (stats.samples, stats.p50_s, stats.cv) == (3, 300, 0.0)
+    # Platform departures count towards the parent station too
+    assert tracker.stats("place-alfcl", "Red", 0) == stats
+    assert tracker.stats("70061", "Red", 1) is None
+
+    # The same trips seen again (still listed just after departing) are not counted twice
+    tracker.observe([("70061", "Red", 0, "trip-3", T0 + 960)], captured_at=clock.now)
+    assert tracker.stats("70061", "Red", 0).samples == 3
+
+
+def test_departures_from_mbta_skips_incomplete_rows():
+    payload = {
+        "data": [
+            _departure("70061", "trip-1", T0),
+            {"attributes": {"direction_id": 0, "departure_time": None}, "relationships": {}},
+            {"attributes": {"departure_time": _iso(T0)}, "relationships": {"route": {"data": {"id": "Red"}}}},
+        ]
+    }
+    assert departures_from_mbta(payload) == [("70061", "Red", 0, "trip-1", T0)]
+
+
+def test_observer_feeds_the_tracker_off_the_caller_thread():
+    clock = FakeClock(T0)
+    tracker = HeadwayTracker(window=8, min_samples=3, clock=clock)
+    observer = HeadwayObserver(tracker, max_pending=2, clock=clock)
+    departures = [T0 + 60, T0 + 360, T0 + 660, T0 + 960]
+
+    assert observer.record_payload({"data": [_departure("70061", f"trip-{i}", t) for i, t in enumerate(departures)]})
+    assert observer.record_payload({"data": ["not a resource"]})
+    assert not observer.record_payload({"data": []})  # queue full
+    clock.now = departures[-1] + 1
+    assert tracker.stats("70061", "Red", 0) is None  # nothing done on the caller's thread
+
+    observer.flush()
+    assert tracker.stats("70061", "Red", 0).samples == 3
+    assert observer.stats() == HeadwayObserverStats(observed_payloads=1, dropped_payloads=1, errors=1)
+
+
+def test_tracker_needs_min_samples_and_skips_service_gaps():
+    tracker, _ = _tracker_with_departures([T0 + 60, T0 + 360, T0 + 5000, T0 + 5300])
+    # 300s, (4640s gap restarts the sequence), 300s: only two samples
+    assert tracker.stats("70061", "Red", 0) is None
+
+
+def test_bunched_service_is_flagged_by_the_scorer():
+    tracker, _ = _tracker_with_departures([T0, T0 + 60, T0 + 660, T0 + 720, T0 + 1320])
+    stats = tracker.stats("70061", "Red", 0)
+    assert stats.cv >= 0.5
+
+    scorer = ReliabilityScorer()
+    even = scorer.score(headway_seconds=stats.p50_s, used_default_headway=False, had_destination_match=True)
+    bunched = scorer.score(
+        headway_seconds=stats.p50_s,
+        used_default_headway=False,
+        had_destination_match=True,
+        headway_cv=stats.cv,
+    )
+    assert bunched.score == even.score - 10
+    assert any("bunching" in r for r in bunched.reasons)
+
+
+class FakeMbtaClient:
+    """Origin departures bunched 1 minute apart; rolling headway says 5 minutes."""
+
+    def get_predictions_many(self, *, stop_ids, route_id, direction_id=None, limit=30, sort=None):
+        return {
+            "data": [
+                _departure("origin", "trip-1", T0 + 600),
+                _departure("origin", "trip-2", T0 + 660),
+                {
+                    "attributes": {"direction_id": 0, "arrival_time": _iso(T0 + 1800)},
+                    "relationships": {
+                        "stop": {"data": {"id": "destination"}},
+                        "route": {"data": {"id": "Red"}},
+                        "trip": {"data": {"id": "trip-1"}},
+                    },
+                },
+            ]
+        }
+
+
+def test_journey_uses_rolling_headway_instead_of_single_gap():
+    clock = FakeClock(T0)
+    tracker = HeadwayTracker(clock=clock)
+    tracker.observe(
+        [("origin", "Red", 0, f"past-{i}", T0 - 1500 + 300 * i) for i in range(5)],
+        captured_at=T0 - 1500,
+    )
+    now = datetime.fromtimestamp(T0, tz=timezone.utc)
+    estimator = JourneyEstimator(
+        mbta_client=FakeMbtaClient(),
+        eta_estimator=EtaEstimator(),
+        reliability_scorer=ReliabilityScorer(),
+        headway_tracker=tracker,
+    )
+
+    result = estimator.estimate(origin_stop_id="origin", destination_stop_id="destination", route_id="Red", now=now)
+
+    assert result.eta.headway_seconds == 300
+    assert (result.eta.p80_arrival - result.eta.p50_arrival).total_seconds() == int(0.35 * 300)
+
+
+def test_headway_buckets_follow_the_scorer_thresholds():
+    assert [headway_bucket(h) for h in (None, 359, 360, 599, 600, 899, 900)] == [
+        HEADWAY_UNKNOWN,
+        HEADWAY_FREQUENT,
+        HEADWAY_MODERATE,
+        HEADWAY_MODERATE,
+        HEADWAY_LARGE,
+        HEADWAY_LARGE,
+        HEADWAY_INFREQUENT,
+    ]
+    # score_many reuses one report per bucket, so it must agree with score at every edge
+    scorer = ReliabilityScorer()
+    headways = [None, 359, 360, 599, 600, 899, 900]
+    many = scorer.score_many(headway_seconds=headways, used_default_headway=[False] * len(headways))
+    assert [r.score for r in many] == [
+        scorer.score(headway_seconds=h, used_default_headway=False, had_destination_match=True).score for h in headways
+    ]
@@ -1,8 +1,9 @@
+import asyncio
 from datetime import datetime, timedelta, timezone
 import pytest
 from transit_app.domain.models import Prediction
 from transit_app.services.eta import EtaEstimator
-from transit_app.use_cases.journey import JourneyEstimator
+from transit_app.use_cases.journey import JourneyEstimator, JourneyQuery
 from transit_app.services.reliability import ReliabilityScorer
 
 class FakeMbtaClient:
@@ -49,7 +50,27 @@ class FakeMbtaClient:
             }
 
         return {"data": []}
-    
+
+    def get_predictions_many(self, *, stop_ids, route_id, direction_id=None, limit=30, sort=None):
+        data = []
+        for stop_id in stop_ids:
+            data.extend(self.get_predictions(stop_id=stop_id, route_id=route_id)["data"])
+        return {"data": data}
+
+    async def get_predictions_many_async(self, *, stop_ids, route_id, direction_id=None, limit=30, sort=None):
+        return self.get_predictions_many(stop_ids=stop_ids, route_id=route_id, limit=limit, sort=sort)
+
+
+class SlowFakeMbtaClient(FakeMbtaClient):
+    def __init__(self, delay_s: float) -> None:
+        self.delay_s = delay_s
+        self.calls = 0
+
+    async def get_predictions_many_async(self, *, stop_ids, route_id, direction_id=None, limit=30, sort=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay_s)
+        return self.get_predictions_many(stop_ids=stop_ids, route_id=route_id, limit=limit, sort=sort)
+
 def test_journey_estimator_end_to_end():
     estimator = JourneyEstimator(
         mbta_client=FakeMbtaClient(),
@@ -68,4 +89,193 @@ def test_journey_estimator_end_to_end():
 
     assert result.trip_id == "trip-1"
     assert result.eta.p50_arrival > now
-    assert result.eta.p50_arrival <= result.eta.p80_arrival <= result.eta.p90_arrival
\ No newline at end of file
+    assert result.eta.p50_arrival <= result.eta.p80_arrival <= result.eta.p90_arrival
+
+
+def test_journey_estimator_async_fetches_both_stops_in_one_call():
+    client = SlowFakeMbtaClient(delay_s=0.01)
+    estimator = JourneyEstimator(
+        mbta_client=client,
+        eta_estimator=EtaEstimator(),
+        reliability_scorer=ReliabilityScorer(),
+    )
+
+    result = asyncio.run(
+        estimator.estimate_async(
+            origin_stop_id="origin",
+            destination_stop_id="destination",
+            route_id="Red",
+            now=datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc),
+        )
+    )
+
+    assert result.trip_id == "trip-1"
+    assert client.calls == 1
+
+
+def test_journey_estimator_async_enforces_shared_deadline():
+    estimator = JourneyEstimator(
+        mbta_client=SlowFakeMbtaClient(delay_s=1.0),
+        eta_estimator=EtaEstimator(),
+        reliability_scorer=ReliabilityScorer(),
+    )
+
+    with pytest.raises(RuntimeError, match="did not arrive"):
+        asyncio.run(
+            estimator.estimate_async(
+                origin_stop_id="origin",
+                destination_stop_id="destination",
+                route_id="Red",
+                now=datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc),
+                deadline_s=0.05,
+            )
+        )
+
+
+class BatchFakeMbtaClient(FakeMbtaClient):
+    def __init__(self) -> None:
+        self.fetched: list[tuple[str, tuple[str, ...]]] = []
+
+    async def get_predictions_many_async(self, *, stop_ids, route_id, direction_id=None, limit=30, sort=None):
+        self.fetched.append((route_id, tuple(stop_ids)))
+        if route_id == "Broken":
+            raise RuntimeError("HTTP 503")
+        return self.get_predictions_many(stop_ids=stop_ids, route_id=route_id, limit=limit, sort=sort)
+
+
+def test_estimate_many_fetches_each_route_once_and_keeps_order():
+    client = BatchFakeMbtaClient()
+    estimator = JourneyEstimator(
+        mbta_client=client,
+        eta_estimator=EtaEstimator(),
+        reliability_scorer=ReliabilityScorer(),
+    )
+    queries = [
+        JourneyQuery(origin_stop_id="origin", destination_stop_id="destination", route_id="Red"),
+        JourneyQuery(origin_stop_id="origin", destination_stop_id="destination", route_id="Broken"),
+        JourneyQuery(origin_stop_id="destination", destination_stop_id="origin", route_id="Red"),
+        JourneyQuery(origin_stop_id="origin", destination_stop_id="destination", route_id="Red"),
+    ]
+
+    outcomes = asyncio.run(
+        estimator.estimate_many_async(queries, now=datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc))
+    )
+
+    assert sorted(client.fetched) == [("Broken", ("origin", "destination")), ("Red", ("origin", "destination"))]
+    assert [o.query for o in outcomes] == queries
+    assert outcomes[0].estimate is not None and outcomes[0].estimate.trip_id == "trip-1"
+    assert outcomes[1].estimate is None and "503" in outcomes[1].error
+    assert outcomes[2].estimate is None and outcomes[2].error
+    assert outcomes[3].estimate == outcomes[0].estimate
+
+
+class ReverseFakeMbtaClient:
+    """Route "Rev": the only trip serving both stops reaches the destination before it leaves the origin."""
+
+    def get_predictions_many(self, *, stop_ids, route_id, direction_id=None, limit=30, sort=None):
+        if route_id != "Rev":
+            return FakeMbtaClient().get_predictions_many(stop_ids=stop_ids, route_id=route_id, limit=limit, sort=sort)
+        rows = [
+            ("origin", "departure_time", "2026-01-20T12:20:00+00:00"),
+            ("destination", "arrival_time", "2026-01-20T12:10:00+00:00"),
+        ]
+        return {
+            "data": [
+                {
+                    "attributes": {field: t},
+                    "relationships": {"stop": {"data": {"id": stop}}, "trip": {"data": {"id": "trip-r"}}},
+                }
+                for stop, field, t in rows
+            ]
+        }
+
+    async def get_predictions_many_async(self, **kwargs):
+        return self.get_predictions_many(**kwargs)
+
+
+def test_estimate_many_reports_reverse_direction_trip_per_item():
+    estimator = JourneyEstimator(
+        mbta_client=ReverseFakeMbtaClient(),
+        eta_estimator=EtaEstimator(),
+        reliability_scorer=ReliabilityScorer(),
+    )
+    queries = [
+        JourneyQuery(origin_stop_id="origin", destination_stop_id="destination", route_id="Rev"),
+        JourneyQuery(origin_stop_id="origin", destination_stop_id="destination", route_id="Red"),
+    ]
+
+    outcomes = asyncio.run(
+        estimator.estimate_many_async(queries, now=datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc))
+    )
+
+    assert outcomes[0].estimate is None and "No matching destination" in outcomes[0].error
+    assert outcomes[1].estimate is not None
+
+
+class PagedFakeMbtaClient:
+    """Origin departures in both directions first; the destination shows up only on a wider page."""
+
+    def __init__(self) -> None:
+        self.requests: list[tuple[int, int | None]] = []
+
+    def get_predictions_many(self, *, stop_ids, route_id, direction_id=None, limit=30, sort=None):
+        self.requests.append((limit, direction_id))
+        rows = []
+        for i in range(8):
+            rows.append(("origin", f"south-{i}", 0, f"2026-01-20T12:{i:02d}:00+00:00"))
+            rows.append(("origin", f"north-{i}", 1, f"2026-01-20T12:{i:02d}:30+00:00"))
+        rows.append(("destination", "north-0", 1, "2026-01-20T12:40:00+00:00"))
+        if direction_id is not None:
+            rows = [r for r in rows if r[2] == direction_id]
+        return {
+            "data": [
+                {
+                    "attributes": {"departure_time": t, "direction_id": d},
+                    "relationships": {"stop": {"data": {"id": stop}}, "trip": {"data": {"id": trip}}},
+                }
+                for stop, trip, d, t in rows[:limit]
+            ]
+        }
+
+
+def test_journey_estimator_widens_page_and_filters_direction_on_miss():
+    client = PagedFakeMbtaClient()
+    estimator = JourneyEstimator(
+        mbta_client=client,
+        eta_estimator=EtaEstimator(),
+        reliability_scorer=ReliabilityScorer(),
+        initial_limit=4,
+        max_limit=64,
+    )
+
+    result = estimator.estimate(
+        origin_stop_id="origin",
+        destination_stop_id="destination",
+        route_id="Red",
+        now=datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc),
+    )
+
+    assert result.trip_id == "north-0"
+    assert client.requests[0] == (4, None)
+    assert len(client.requests) > 1
+    assert client.requests[-1][0] <= 64
+
+
+def test_journey_estimator_gives_up_when_budget_is_spent():
+    client = PagedFakeMbtaClient()
+    estimator = JourneyEstimator(
+        mbta_client=client,
+        eta_estimator=EtaEstimator(),
+        reliability_scorer=ReliabilityScorer(),
+        initial_limit=2,
+        max_limit=4,
+    )
+
+    with pytest.raises(RuntimeError, match="No matching destination"):
+        estimator.estimate(
+            origin_stop_id="origin",
+            destination_stop_id="destination",
+            route_id="Red",
+            now=datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc),
+        )
+    assert [limit for limit, _ in client.requests] == [2, 4]
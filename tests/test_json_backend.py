@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import pytest
+
+from transit_app.http.json_backend import StdlibJsonBackend, json_backend
+from transit_app.providers.mbta.mapper import predictions_from_bytes
+
+BODY = (
+    b'{"data": [{"attributes": {"departure_time": "2026-01-20T12:05:00-05:00"},'
+    b' "relationships": {"stop": {"data": {"id": "place-davis"}}}}]}'
+)
+
+
+def test_auto_backend_prefers_installed_fast_decoder():
+    backend = json_backend("auto")
+    assert backend.loads(b'{"a": 1}') == {"a": 1}
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        return
+    assert backend.name == "orjson"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        json_backend("simdjson")
+
+
+@pytest.mark.parametrize("name", ["auto", "json"])
+def test_backends_raise_value_error_on_malformed_input(name):
+    with pytest.raises(ValueError):
+        json_backend(name).loads(b"{not json")
+
+
+def test_predictions_from_bytes_matches_dict_path():
+    preds = predictions_from_bytes(BODY, json=StdlibJsonBackend())
+    assert [p.stop_id for p in preds] == ["place-davis"]
+    assert preds == predictions_from_bytes(BODY)
+
+
+def test_predictions_from_bytes_rejects_non_json():
+    with pytest.raises(RuntimeError):
+        predictions_from_bytes(b"<html>")
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from transit_app.config.settings import Settings
+from transit_app.http.base import ConditionalResponse
+from transit_app.providers.mbta.client import PREDICTION_FIELDS, MbtaV3Client
+
+
+class RecordingHttp:
+    def __init__(self) -> None:
+        self.params: list[dict] = []
+
+    def get_json(self, url, *, params=None, headers=None, timeout_s=10.0):
+        self.params.append(params)
+        return {"data": []}
+
+
+def test_get_predictions_requests_sparse_fields_without_includes():
+    http = RecordingHttp()
+    client = MbtaV3Client(http=http, settings=Settings(), conditional_requests=False)
+    client.get_predictions(stop_id="place-davis", route_id="Red")
+
+    params = http.params[0]
+    assert params["fields[prediction]"] == PREDICTION_FIELDS
+    assert "include" not in params
+
+
+def test_get_predictions_many_includes_only_trimmed_stops():
+    http = RecordingHttp()
+    MbtaV3Client(http=http, settings=Settings(), conditional_requests=False).get_predictions_many(
+        stop_ids=["place-davis", "place-harsq"], route_id="Red"
+    )
+
+    params = http.params[0]
+    assert params["filter[stop]"] == "place-davis,place-harsq"
+    assert params["include"] == "stop"
+    assert "fields[stop]" in params
+
+
+class ConditionalHttp:
+    def __init__(self) -> None:
+        self.sent: list[tuple[str | None, str | None]] = []
+
+    def get_json_conditional(self, url, *, params=None, headers=None, timeout_s=10.0, etag=None, last_modified=None):
+        self.sent.append((etag, last_modified))
+        if etag == '"v1"':
+            return ConditionalResponse(not_modified=True, data=None, etag='"v1"', last_modified=None)
+        return ConditionalResponse(
+            not_modified=False,
+            data={
+                "data": [
+                    {
+                        "attributes": {"departure_time": "2026-01-20T12:05:00-05:00"},
+                        "relationships": {"stop": {"data": {"id": "place-davis"}}},
+                    }
+                ]
+            },
+            etag='"v1"',
+            last_modified=None,
+        )
+
+
+def test_conditional_requests_reuse_mapped_payload_on_304(monkeypatch):
+    import transit_app.providers.mbta.mapper as mapper
+
+    http = ConditionalHttp()
+    client = MbtaV3Client(http=http, settings=Settings())
+
+    first = client.get_predictions(stop_id="place-davis")
+    assert len(mapper.predictions_from_mbta(first)) == 1
+
+    # A 304 must hand back the same payload, already mapped: parsing again would fail
+    monkeypatch.setattr(mapper, "_parse_time", lambda value: 1 / 0)
+    second = client.get_predictions(stop_id="place-davis")
+
+    assert second is first
+    assert len(mapper.predictions_from_mbta(second)) == 1
+    assert http.sent == [(None, None), ('"v1"', None)]
+
+
+def test_failing_payload_observer_does_not_fail_the_request():
+    def observer(payload):
+        raise KeyError("observer bug")
+
+    client = MbtaV3Client(http=RecordingHttp(), settings=Settings(), conditional_requests=False, payload_observer=observer)
+    assert client.get_predictions(stop_id="place-davis", route_id="Red") == {"data": []}
@@ -25,4 +25,78 @@ def test_predictions_from_mbta_parses_minimal_payload():
     assert p.route_id == "Red"
     assert p.trip_id == "trip-123"
     assert p.direction_id == 1
-    assert p.arrival_time is not None
\ No newline at end of file
+    assert p.arrival_time is not None
+
+def test_predictions_by_stop_attributes_platforms_to_parent_station():
+    from transit_app.providers.mbta.mapper import predictions_by_stop
+
+    payload = {
+        "data": [
+            {
+                "attributes": {"departure_time": "2026-01-20T12:05:00-05:00"},
+                "relationships": {
+                    "stop": {"data": {"id": "70064"}},
+                    "route": {"data": {"id": "Red"}},
+                    "trip": {"data": {"id": "trip-1"}},
+                },
+            },
+            {
+                "attributes": {"arrival_time": "2026-01-20T12:15:00-05:00"},
+                "relationships": {
+                    "stop": {"data": {"id": "place-harsq"}},
+                    "route": {"data": {"id": "Red"}},
+                    "trip": {"data": {"id": "trip-1"}},
+                },
+            },
+            {
+                "attributes": {"arrival_time": "2026-01-20T12:20:00-05:00"},
+                "relationships": {
+                    "stop": {"data": {"id": "70070"}},
+                    "route": {"data": {"id": "Red"}},
+                    "trip": {"data": {"id": "trip-1"}},
+                },
+            },
+        ],
+        "included": [
+            {"type": "stop", "id": "70064", "relationships": {"parent_station": {"data": {"id": "place-davis"}}}},
+            {"type": "stop", "id": "70070", "relationships": {"parent_station": {"data": {"id": "place-cntsq"}}}},
+        ],
+    }
+
+    by_stop = predictions_by_stop(payload, ["place-davis", "place-harsq"])
+    assert [p.stop_id for p in by_stop["place-davis"]] == ["70064"]
+    assert [p.stop_id for p in by_stop["place-harsq"]] == ["place-harsq"]
+
+
+def test_predictions_from_mbta_accepts_trimmed_payload():
+    payload = {
+        "data": [
+            {
+                "attributes": {"departure_time": "2026-01-20T12:05:00-05:00"},
+                "relationships": {
+                    "stop": {"data": {"id": "70064"}},
+                    "route": {"data": {"id": "Red"}},
+                    "trip": {"data": None},
+                },
+            },
+            {"relationships": {"stop": {"data": {"id": "70064"}}}},
+        ]
+    }
+
+    preds = predictions_from_mbta(payload)
+    assert len(preds) == 2
+    assert preds[0].trip_id is None
+    assert preds[1].route_id is None
+    assert preds[1].departure_time is None
+
+
+def test_mapped_predictions_are_compact_and_share_parsed_times():
+    record = {
+        "attributes": {"arrival_time": "2026-01-20T12:00:00-05:00", "departure_time": "2026-01-20T12:00:00-05:00"},
+        "relationships": {"stop": {"data": {"id": "place-alfcl"}}, "trip": {"data": {"id": "trip-123"}}},
+    }
+    first, second = predictions_from_mbta({"data": [record, dict(record)]})
+
+    assert not hasattr(first, "__dict__")
+    assert first.arrival_time is second.departure_time
+    assert first.trip_id is second.trip_id
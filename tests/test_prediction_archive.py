@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from transit_app.archive.recorder import PredictionRecorder
+from transit_app.archive.segments import ArchiveReader, SegmentWriter, partition_of
+
+T0 = int(datetime(2026, 1, 20, 13, 0, tzinfo=timezone.utc).timestamp())
+
+
+def _payload(trip: str, departure: str | None) -> dict:
+    return {
+        "data": [
+            {
+                "attributes": {"direction_id": 1, "departure_time": departure, "arrival_time": None},
+                "relationships": {
+                    "stop": {"data": {"id": "70064"}},
+                    "route": {"data": {"id": "Red"}},
+                    "trip": {"data": {"id": trip}},
+                },
+            }
+        ]
+    }
+
+
+def _dt(epoch_s: int) -> datetime:
+    return datetime.fromtimestamp(epoch_s, tz=timezone.utc)
+
+
+def test_recorded_snapshots_scan_back_by_time_range_with_projection(tmp_path):
+    recorder = PredictionRecorder(SegmentWriter(tmp_path))
+    recorder.record_payload(_payload("trip-1", "2026-01-20T13:05:00+00:00"), captured_at=T0 + 10)
+    recorder.record_payload(_payload("trip-2", None), captured_at=T0 + 20)
+    recorder.record_payload(_payload("trip-3", "2026-01-20T14:30:00+00:00"), captured_at=T0 + 3600 + 5)
+    recorder.stop()
+
+    assert recorder.stats().recorded_rows == 3
+    assert sorted(p.parent.name for p in tmp_path.rglob("*.tpar")) == ["13", "14"]
+
+    reader = ArchiveReader(tmp_path)
+    blocks = list(reader.scan(_dt(T0), _dt(T0 + 15), columns=["trip", "departure"]))
+    assert [b["trip"] for b in blocks] == [["trip-1"]]
+    assert list(blocks[0]["departure"]) == [T0 + 300]
+    assert set(blocks[0]) == {"trip", "departure"}
+
+    everything = list(reader.scan(_dt(T0), _dt(T0 + 7200), columns=["trip", "captured_at"]))
+    assert [t for b in everything for t in b["trip"]] == ["trip-1", "trip-2", "trip-3"]
+
+
+def test_segments_rotate_and_truncated_tail_is_skipped(tmp_path):
+    writer = SegmentWriter(tmp_path, max_segment_bytes=1)
+    recorder = PredictionRecorder(writer)
+    for i in range(3):
+        recorder.record_payload(_payload(f"trip-{i}", None), captured_at=T0 + i)
+        recorder.flush()
+    recorder.stop()
+
+    segments = sorted(tmp_path.rglob("*.tpar"))
+    assert len(segments) == 3
+    with segments[-1].open("ab") as f:
+        f.write(b"\x00\x00\x01\x00{partial")
+
+    trips = [t for b in ArchiveReader(tmp_path).scan(_dt(T0), _dt(T0 + 60), columns=["trip"]) for t in b["trip"]]
+    assert trips == ["trip-0", "trip-1", "trip-2"]
+
+
+def test_full_buffer_drops_instead_of_blocking(tmp_path):
+    recorder = PredictionRecorder(SegmentWriter(tmp_path), max_buffered_rows=1)
+    assert recorder.record_payload(_payload("trip-1", None), captured_at=T0)
+    assert not recorder.record_payload(_payload("trip-2", None), captured_at=T0)
+    assert recorder.stats().dropped_snapshots == 1
+    recorder.stop()
+
+
+class FailingWriter(SegmentWriter):
+    def write(self, snapshots):
+        raise OSError("disk full")
+
+
+def test_failed_write_counts_the_batch_as_dropped(tmp_path):
+    recorder = PredictionRecorder(FailingWriter(tmp_path))
+    recorder.record_payload(_payload("trip-1", None), captured_at=T0)
+    recorder.record_payload(_payload("trip-2", None), captured_at=T0 + 1)
+
+    with pytest.raises(OSError):
+        recorder.flush()
+    assert recorder.stats().dropped_snapshots == 2
+    assert recorder.stats().recorded_rows == 0
+
+
+def test_writers_in_the_same_millisecond_use_distinct_segment_names(tmp_path):
+    writers = [SegmentWriter(tmp_path) for _ in range(2)]
+    for i, writer in enumerate(writers):
+        recorder = PredictionRecorder(writer)
+        recorder.record_payload(_payload(f"trip-{i}", None), captured_at=T0)
+        recorder.stop()
+
+    assert len(list(tmp_path.rglob("*.tpar"))) == 2
+
+
+class TornFile:
+    """Writes half of what it's given, then fails like a full disk."""
+
+    def __init__(self, f) -> None:
+        self._f = f
+
+    def write(self, data):
+        self._f.write(data[: len(data) // 2])
+        self._f.flush()
+        raise OSError("No space left on device")
+
+    def tell(self):
+        return self._f.tell()
+
+    def close(self):
+        self._f.close()
+
+
+def test_block_after_a_failed_write_goes_to_a_new_segment(tmp_path):
+    writer = SegmentWriter(tmp_path)
+    recorder = PredictionRecorder(writer)
+    recorder.record_payload(_payload("trip-0", None), captured_at=T0)
+    recorder.flush()
+
+    partition = partition_of(T0)
+    writer._open[partition] = TornFile(writer._open[partition])
+    recorder.record_payload(_payload("trip-1", None), captured_at=T0 + 1)
+    with pytest.raises(OSError):
+        recorder.flush()
+    recorder.record_payload(_payload("trip-2", None), captured_at=T0 + 2)
+    recorder.stop()
+
+    assert len(list(tmp_path.rglob("*.tpar"))) == 2
+    trips = [t for b in ArchiveReader(tmp_path).scan(_dt(T0), _dt(T0 + 60), columns=["trip"]) for t in b["trip"]]
+    assert trips == ["trip-0", "trip-2"]
+
+
+class FlakyWriter(SegmentWriter):
+    def __init__(self, root) -> None:
+        super().__init__(root)
+        self.failures = 1
+
+    def write(self, snapshots):
+        if self.failures:
+            self.failures -= 1
+            raise ValueError("unexpected bug")
+        super().write(snapshots)
+
+
+def test_recorder_thread_survives_any_flush_error(tmp_path):
+    recorder = PredictionRecorder(FlakyWriter(tmp_path), flush_interval_s=0.01)
+    recorder.start()
+    recorder.record_payload(_payload("trip-1", None), captured_at=T0)
+    deadline = time.monotonic() + 5
+    while recorder.stats().dropped_snapshots < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    recorder.record_payload(_payload("trip-2", None), captured_at=T0 + 1)
+    recorder.stop()
+
+    assert recorder.stats().dropped_snapshots == 1
+    assert recorder.stats().recorded_rows == 1
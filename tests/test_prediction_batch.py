@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from transit_app.providers.mbta.columnar import (
+    MISSING,
+    NAT,
+    epoch_seconds,
+    prediction_batch_from_mbta,
+    prediction_batches_by_stop,
+)
+from transit_app.providers.mbta.mapper import predictions_from_mbta
+
+
+def _record(stop: str, trip: str | None, arrival: str | None, departure: str | None) -> dict:
+    rel = {"stop": {"data": {"id": stop}}, "route": {"data": {"id": "Red"}}}
+    if trip is not None:
+        rel["trip"] = {"data": {"id": trip}}
+    return {
+        "attributes": {"direction_id": 0, "arrival_time": arrival, "departure_time": departure},
+        "relationships": rel,
+    }
+
+
+PAYLOAD = {
+    "data": [
+        _record("70064", "trip-2", None, "2026-01-20T12:09:00-05:00"),
+        _record("70064", "trip-1", None, "2026-01-20T12:05:00-05:00"),
+        _record("70066", "trip-1", "2026-01-20T12:20:00-05:00", None),
+        _record("70066", None, "2026-01-20T12:21:00-05:00", None),
+        _record("70064", "trip-3", None, None),
+    ],
+    "included": [
+        {"type": "stop", "id": "70064", "relationships": {"parent_station": {"data": {"id": "place-davis"}}}},
+        {"type": "stop", "id": "70066", "relationships": {"parent_station": {"data": {"id": "place-harsq"}}}},
+    ],
+}
+
+
+def test_epoch_seconds_matches_fromisoformat():
+    for value in ("2026-01-20T12:05:07-05:00", "2026-07-01T00:00:00+02:30", "2026-01-20T17:05:07Z"):
+        expected = int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+        assert epoch_seconds(value) == expected
+    assert epoch_seconds(None) == NAT
+    assert epoch_seconds("not a time") == NAT
+    assert epoch_seconds("2026-01-20T12:05:07") == NAT
+
+
+def test_batch_round_trips_to_row_mapper():
+    batch = prediction_batch_from_mbta(PAYLOAD)
+    assert batch.to_predictions() == predictions_from_mbta(PAYLOAD)
+
+
+def test_filter_sort_and_trip_join_without_row_objects():
+    by_stop = prediction_batches_by_stop(PAYLOAD, ["place-davis", "place-harsq"])
+    origin = by_stop["place-davis"].filter(require="departure").sort_by("departure")
+    dest_times = by_stop["place-harsq"].earliest_by_trip()
+
+    assert [origin.string(code) for code in origin.trip] == ["trip-1", "trip-2"]
+    assert dest_times == {"trip-1": epoch_seconds("2026-01-20T12:20:00-05:00")}
+    assert len(by_stop["place-harsq"]) == 2
+
+
+def test_filter_by_unknown_ids_does_not_match_rows_missing_that_id():
+    payload = {
+        "data": [
+            {"attributes": {"direction_id": 0}, "relationships": {"route": {"data": {"id": "Red"}}}},
+            {"attributes": {"direction_id": 0}, "relationships": {"stop": {"data": {"id": "70064"}}}},
+        ]
+    }
+    batch = prediction_batch_from_mbta(payload)
+
+    assert len(batch.filter(stop_ids=["unknown"])) == 0
+    assert len(batch.filter(route_id="Orange")) == 0
+    assert len(batch.filter(stop_ids=["70064", "unknown"])) == 1
+
+
+def test_code_of_maps_every_interned_string():
+    batch = prediction_batch_from_mbta(PAYLOAD)
+
+    assert [batch.code_of(value) for value in batch.strings] == list(range(len(batch.strings)))
+    assert batch.code_of("unknown") == MISSING
+    assert batch.filter(stop_ids=["70066"]).code_of("trip-1") == batch.code_of("trip-1")
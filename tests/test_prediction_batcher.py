@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+
+from transit_app.http.rate_limit import Priority
+from transit_app.providers.mbta.batching import PredictionBatcher
+
+
+def test_batcher_merges_requests_within_window():
+    calls = []
+
+    async def fetch(stop_ids, route_id, direction_id, limit, sort, priority):
+        calls.append((list(stop_ids), route_id, limit))
+        return {"data": [], "stops": list(stop_ids)}
+
+    batcher = PredictionBatcher(fetch, window_s=0.01)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.get(stop_ids=["a", "b"], route_id="Red", direction_id=None, limit=30, sort="departure_time"),
+            batcher.get(stop_ids=["b", "c"], route_id="Red", direction_id=None, limit=30, sort="departure_time"),
+            batcher.get(stop_ids=["x"], route_id="Orange", direction_id=None, limit=10, sort="departure_time"),
+        )
+
+    red_1, red_2, orange = asyncio.run(run())
+
+    assert red_1 is red_2
+    assert red_1["stops"] == ["a", "b", "c"]
+    assert orange["stops"] == ["x"]
+    assert sorted(calls) == [(["a", "b", "c"], "Red", 60), (["x"], "Orange", 10)]
+
+
+def test_batcher_propagates_upstream_errors_to_every_waiter():
+    async def fetch(stop_ids, route_id, direction_id, limit, sort, priority):
+        raise RuntimeError("HTTP 503")
+
+    batcher = PredictionBatcher(fetch, window_s=0.01)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.get(stop_ids=["a"], route_id="Red", direction_id=None, limit=5, sort="departure_time"),
+            batcher.get(stop_ids=["b"], route_id="Red", direction_id=None, limit=5, sort="departure_time"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_batcher_keeps_priorities_apart():
+    calls = []
+
+    async def fetch(stop_ids, route_id, direction_id, limit, sort, priority):
+        calls.append((list(stop_ids), priority))
+        return {"data": []}
+
+    batcher = PredictionBatcher(fetch, window_s=0.01)
+
+    async def run():
+        await asyncio.gather(
+            batcher.get(stop_ids=["a"], route_id="Red", direction_id=None, limit=5, sort="departure_time"),
+            batcher.get(
+                stop_ids=["b"],
+                route_id="Red",
+                direction_id=None,
+                limit=5,
+                sort="departure_time",
+                priority=Priority.BACKGROUND,
+            ),
+        )
+
+    asyncio.run(run())
+    assert sorted(calls) == [(["a"], Priority.INTERACTIVE), (["b"], Priority.BACKGROUND)]
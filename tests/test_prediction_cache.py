@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from transit_app.config.settings import Settings
+from transit_app.providers.mbta.cache import PredictionCache
+from transit_app.providers.mbta.client import MbtaV3Client
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingHttp:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def get_json(self, url, *, params=None, headers=None, timeout_s=10.0):
+        self.calls += 1
+        return {"data": [], "stop": params["filter[stop]"]}
+
+
+def test_cache_hits_until_ttl_expires():
+    clock = FakeClock()
+    cache = PredictionCache(ttl_s=10, clock=clock)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return {"data": []}
+
+    cache.get_or_load("k", loader)
+    cache.get_or_load("k", loader)
+    assert len(loads) == 1
+
+    clock.now = 10.0
+    cache.get_or_load("k", loader)
+    assert len(loads) == 2
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (1, 2)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = PredictionCache(ttl_s=60, max_entries=2)
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+    cache.get_or_load("a", lambda: 1)  # touch a -> b is now LRU
+    cache.get_or_load("c", lambda: 3)
+
+    assert cache.get_or_load("a", lambda: "reloaded") == 1
+    assert cache.get_or_load("b", lambda: "reloaded") == "reloaded"
+
+
+def test_cache_does_not_store_failures():
+    cache = PredictionCache(ttl_s=60)
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("k", boom)
+    assert cache.get_or_load("k", lambda: "ok") == "ok"
+
+
+def test_concurrent_thread_misses_share_one_load():
+    cache = PredictionCache(ttl_s=60)
+    release = threading.Event()
+    loads = []
+
+    def slow_loader():
+        loads.append(1)
+        release.wait(timeout=2)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", slow_loader))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    # wait until every follower has joined the in-flight load
+    deadline = time.monotonic() + 5
+    while cache.stats().coalesced < 4 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert loads == [1]
+    assert results == ["value"] * 5
+    assert cache.stats().coalesced == 4
+
+
+def test_concurrent_async_misses_share_one_load():
+    cache = PredictionCache(ttl_s=60)
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load_async("k", loader) for _ in range(3)))
+
+    assert asyncio.run(run()) == ["value"] * 3
+    assert loads == [1]
+    assert cache.stats().coalesced == 2
+
+
+def test_coalesced_caller_waits_instead_of_serving_a_copy_past_the_stale_limit():
+    clock = FakeClock()
+    cache = PredictionCache(ttl_s=10, clock=clock)
+    cache.put("k", {"v": "old"})
+
+    async def run(age_s):
+        clock.now += age_s
+        started = asyncio.Event()
+
+        async def loader():
+            started.set()
+            await asyncio.sleep(0.01)
+            return {"v": "new"}
+
+        async def follower():
+            await started.wait()
+            return await cache.get_or_load_async(
+                "k", loader, serve_stale=lambda v, age: (v, age), stale_max_age_s=300
+            )
+
+        return await asyncio.gather(cache.get_or_load_async("k", loader), follower())
+
+    assert asyncio.run(run(60)) == [{"v": "new"}, ({"v": "old"}, 60.0)]
+    cache.put("k", {"v": "old"})
+    assert asyncio.run(run(3 * 3600)) == [{"v": "new"}, {"v": "new"}]
+
+
+def test_mbta_client_keys_cache_by_query():
+    http = CountingHttp()
+    client = MbtaV3Client(http=http, settings=Settings(), conditional_requests=False, cache=PredictionCache(ttl_s=60))
+
+    client.get_predictions(stop_id="place-davis", route_id="Red", limit=5)
+    client.get_predictions(stop_id="place-davis", route_id="Red", limit=5)
+    client.get_predictions(stop_id="place-davis", route_id="Red", limit=25)
+
+    assert http.calls == 2
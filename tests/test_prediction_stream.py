@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from transit_app.config.settings import Settings
+from transit_app.http.requests_client import RequestsHttpClient
+from transit_app.providers.mbta.stream import (
+    PredictionStore,
+    PredictionStreamConsumer,
+    ServerSentEvent,
+    parse_event_stream,
+)
+from transit_app.services.eta import EtaEstimator
+from transit_app.services.reliability import ReliabilityScorer
+from transit_app.use_cases.journey import JourneyEstimator
+
+
+def _prediction(pid: str, stop: str, trip: str, *, departure: str | None = None, arrival: str | None = None) -> dict:
+    return {
+        "type": "prediction",
+        "id": pid,
+        "attributes": {"departure_time": departure, "arrival_time": arrival, "direction_id": 0},
+        "relationships": {
+            "stop": {"data": {"id": stop, "type": "stop"}},
+            "route": {"data": {"id": "Red", "type": "route"}},
+            "trip": {"data": {"id": trip, "type": "trip"}},
+        },
+    }
+
+
+def _platform(stop_id: str, parent: str) -> dict:
+    return {"type": "stop", "id": stop_id, "relationships": {"parent_station": {"data": {"id": parent}}}}
+
+
+def _sse(event: str, body) -> str:
+    return f"event: {event}\ndata: {json.dumps(body)}\n\n"
+
+
+def test_parse_event_stream_skips_comments_and_joins_data_lines():
+    lines = [": keep-alive", "event: reset", "data: [1,", "data: 2]", "", "data: x", ""]
+    events = list(parse_event_stream(lines))
+    assert events == [ServerSentEvent("reset", "[1,\n2]"), ServerSentEvent("message", "x")]
+
+
+def test_store_indexes_by_parent_station_and_applies_updates():
+    store = PredictionStore(routes=["Red"])
+    assert not store.covers("Red")
+
+    store.reset(
+        [
+            _platform("70064", "place-davis"),
+            _prediction("p1", "70064", "trip-1", departure="2026-01-20T12:05:00+00:00"),
+            _prediction("p2", "70064", "trip-2", departure="2026-01-20T12:10:00+00:00"),
+        ]
+    )
+    assert store.covers("Red")
+    assert len(store.predictions_for("place-davis", "Red")) == 2
+
+    store.upsert(_prediction("p1", "70064", "trip-1", departure="2026-01-20T12:06:00+00:00"))
+    (trip_1,) = store.predictions_for_trip("trip-1")
+    assert trip_1.departure_time.minute == 6
+
+    store.remove({"type": "prediction", "id": "p2"})
+    assert [p.trip_id for p in store.predictions_for("place-davis")] == ["trip-1"]
+    assert store.predictions_for_trip("trip-2") == []
+
+
+def test_journey_estimator_reads_store_without_upstream_call():
+    class NoUpstream:
+        def get_predictions_many(self, **kwargs):
+            raise AssertionError("upstream must not be called")
+
+    store = PredictionStore(routes=["Red"])
+    store.reset(
+        [
+            _prediction("o1", "origin", "trip-1", departure="2026-01-20T12:05:00+00:00"),
+            _prediction("o2", "origin", "trip-2", departure="2026-01-20T12:17:00+00:00"),
+            _prediction("d1", "destination", "trip-1", arrival="2026-01-20T12:25:00+00:00"),
+        ]
+    )
+    estimator = JourneyEstimator(
+        mbta_client=NoUpstream(),
+        eta_estimator=EtaEstimator(),
+        reliability_scorer=ReliabilityScorer(),
+        prediction_store=store,
+    )
+
+    result = estimator.estimate(
+        origin_stop_id="origin",
+        destination_stop_id="destination",
+        route_id="Red",
+        now=datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc),
+    )
+    assert result.trip_id == "trip-1"
+    assert result.eta.headway_seconds == 12 * 60
+
+
+def test_consumer_follows_local_sse_server_across_reconnects():
+    connections = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send_chunk(self, text: str) -> None:
+            body = text.encode()
+            self.wfile.write(f"{len(body):x}\r\n".encode() + body + b"\r\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            connections.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            if len(connections) == 1:
+                # First connection: snapshot + update, then drop the connection
+                self.send_chunk(_sse("reset", [_prediction("p1", "place-davis", "trip-1")]))
+                self.send_chunk(_sse("add", _prediction("p2", "place-davis", "trip-2")))
+                self.close_connection = True
+                return
+            # Reconnect: MBTA always starts with a fresh snapshot, then holds the stream open
+            self.send_chunk(_sse("reset", [_prediction("p3", "place-davis", "trip-3")]))
+            time.sleep(1.0)
+            self.wfile.write(b"0\r\n\r\n")
+            self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    store = PredictionStore(routes=["Red"])
+    consumer = PredictionStreamConsumer(
+        stream=RequestsHttpClient(),
+        settings=Settings(mbta_base_url=f"http://127.0.0.1:{server.server_address[1]}", timeout_s=2),
+        store=store,
+        routes=["Red"],
+        min_backoff_s=0.01,
+    )
+    consumer.start()
+    covered = False
+    try:
+        deadline = time.monotonic() + 3
+        while time.monotonic() < deadline:
+            trips = [p.trip_id for p in store.predictions_for("place-davis")]
+            if trips == ["trip-3"] and store.covers("Red"):
+                covered = True
+                break
+            time.sleep(0.01)
+    finally:
+        consumer.stop(timeout_s=0.1)
+        server.shutdown()
+
+    assert covered
+    assert consumer.reconnects >= 1
+    assert "filter%5Broute%5D=Red" in connections[0]
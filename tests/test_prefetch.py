@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from transit_app.config.settings import Settings
+from transit_app.providers.mbta.cache import PredictionCache
+from transit_app.providers.mbta.client import MbtaV3Client
+from transit_app.providers.mbta.prefetch import HotQuery, HotStopPrefetcher, PopularityCounter
+from transit_app.services.eta import EtaEstimator
+from transit_app.services.headways import HeadwayStats
+from transit_app.services.reliability import ReliabilityScorer
+from transit_app.use_cases.journey import JourneyEstimator
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingHttp:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self.fail = False
+
+    def get_json(self, url, *, params=None, headers=None, timeout_s=10.0):
+        self.calls.append(params["filter[stop]"])
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return {"data": [], "included": []}
+
+
+class FakeHeadways:
+    def __init__(self, p50_by_stop: dict[str, int]) -> None:
+        self.p50_by_stop = p50_by_stop
+
+    def stats(self, stop_id, route_id, direction_id):
+        p50 = self.p50_by_stop.get(stop_id)
+        if p50 is None or direction_id != 0:
+            return None
+        return HeadwayStats(samples=5, mean_s=p50, stdev_s=0.0, p50_s=p50, p90_s=p50)
+
+
+def _setup(clock: FakeClock, **kwargs) -> tuple[CountingHttp, MbtaV3Client, HotStopPrefetcher]:
+    http = CountingHttp()
+    mbta = MbtaV3Client(
+        http=http,
+        settings=Settings(),
+        cache=PredictionCache(ttl_s=10, clock=clock),
+        conditional_requests=False,
+    )
+    return http, mbta, HotStopPrefetcher(mbta, clock=clock, **kwargs)
+
+
+def test_popularity_counter_decays_old_hits():
+    clock = FakeClock()
+    counter = PopularityCounter(half_life_s=60, clock=clock)
+    for _ in range(4):
+        counter.hit("old")
+    clock.now += 120  # two half-lives: 4 hits now weigh 1
+    counter.hit("new")
+    counter.hit("new")
+
+    top = counter.top(2)
+    assert [key for key, _ in top] == ["new", "old"]
+    assert abs(top[1][1] - 1.0) < 1e-9
+
+
+def test_popularity_counter_bounds_tracked_keys():
+    counter = PopularityCounter(max_keys=8, clock=FakeClock())
+    for _ in range(3):
+        counter.hit("hot")
+    for i in range(20):
+        counter.hit(f"cold-{i}")
+
+    assert len(counter) <= 8
+    assert counter.top(1)[0][0] == "hot"
+
+
+def test_prefetched_query_is_served_warm():
+    clock = FakeClock()
+    http, mbta, prefetcher = _setup(clock)
+    prefetcher.record(["place-davis", "place-pktrm"], "Red", 10)
+
+    assert prefetcher.run_once() == 1
+    mbta.get_predictions_many(stop_ids=["place-davis", "place-pktrm"], route_id="Red", limit=10)
+    assert http.calls == ["place-davis,place-pktrm"]
+
+    # Not due again until its interval has passed
+    clock.now += 5
+    assert prefetcher.run_once() == 0
+    clock.now += 6
+    assert prefetcher.run_once() == 1
+
+
+def test_prefetch_keeps_entry_fresh_past_the_cache_ttl():
+    clock = FakeClock()
+    http, mbta, prefetcher = _setup(clock, headways=FakeHeadways({"a": 600}))
+    prefetcher.record(["a", "b"], "Red", 10)
+    prefetcher.run_once()
+
+    # headway 600s -> 60s interval; the entry outlives the 10s cache TTL
+    clock.now += 30
+    mbta.get_predictions_many(stop_ids=["a", "b"], route_id="Red", limit=10)
+    assert len(http.calls) == 1
+
+
+def test_interval_follows_headway():
+    clock = FakeClock()
+    _, _, prefetcher = _setup(clock, headways=FakeHeadways({"busy": 240, "sparse": 1800, "rare": 7200}))
+
+    def interval(stop: str) -> float:
+        return prefetcher.interval_for(HotQuery(stop_ids=(stop, "dest"), route_id="Red", limit=10))
+
+    assert interval("busy") == 24.0
+    assert interval("sparse") == 60.0  # clamped to max_interval_s
+    assert interval("rare") == 60.0
+    assert interval("unknown") == 10.0  # min_interval_s until a headway is observed
+
+
+def test_budget_refreshes_hottest_queries_first():
+    clock = FakeClock()
+    http, _, prefetcher = _setup(clock, top_k=10, budget_per_min=12)  # burst of 2
+    for rank, stop in enumerate(["a", "b", "c", "d"]):
+        for _ in range(10 - rank):
+            prefetcher.record([stop, "dest"], "Red", 10)
+
+    assert prefetcher.run_once() == 2
+    assert http.calls == ["a,dest", "b,dest"]
+    assert prefetcher.stats().over_budget == 2
+
+    # One token back after 5s: the next-hottest skipped query goes first
+    clock.now += 5
+    prefetcher.run_once()
+    assert http.calls[-1] == "c,dest"
+
+
+def test_only_top_k_queries_are_refreshed():
+    clock = FakeClock()
+    http, _, prefetcher = _setup(clock, top_k=1)
+    prefetcher.record(["a", "dest"], "Red", 10)
+    prefetcher.record(["a", "dest"], "Red", 10)
+    prefetcher.record(["b", "dest"], "Red", 10)
+
+    prefetcher.run_once()
+    assert http.calls == ["a,dest"]
+
+
+def test_failed_refresh_is_counted_and_retried():
+    clock = FakeClock()
+    http, _, prefetcher = _setup(clock, min_interval_s=10, max_interval_s=60)
+    http.fail = True
+    prefetcher.record(["a", "dest"], "Red", 10)
+
+    assert prefetcher.run_once() == 0
+    assert prefetcher.stats().failed == 1
+
+    http.fail = False
+    clock.now += 10
+    assert prefetcher.run_once() == 1
+
+
+def test_only_the_leader_refreshes():
+    clock = FakeClock()
+    leading = False
+    http, _, prefetcher = _setup(clock, leader=lambda: leading)
+    prefetcher.record(["a", "dest"], "Red", 10)
+
+    assert prefetcher.run_once() == 0
+    assert http.calls == []
+    leading = True
+    assert prefetcher.run_once() == 1
+
+
+def test_failed_pass_is_counted_and_the_thread_keeps_running():
+    passes = 0
+
+    def leader():
+        nonlocal passes
+        passes += 1
+        raise KeyError("broken lease table")
+
+    _, _, prefetcher = _setup(FakeClock(), leader=leader, tick_s=0.01)
+    prefetcher.start()
+    deadline = time.monotonic() + 5
+    while prefetcher.stats().errors < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    prefetcher.stop()
+
+    assert prefetcher.stats().errors >= 3
+    assert passes >= 3
+
+
+def test_journey_estimator_records_polled_queries():
+    clock = FakeClock()
+    _, mbta, prefetcher = _setup(clock)
+    journey = JourneyEstimator(
+        mbta_client=mbta,
+        eta_estimator=EtaEstimator(),
+        reliability_scorer=ReliabilityScorer(),
+        prefetcher=prefetcher,
+        initial_limit=10,
+    )
+
+    with pytest.raises(RuntimeError):
+        journey.estimate(
+            origin_stop_id="a",
+            destination_stop_id="b",
+            route_id="Red",
+            now=datetime(2026, 1, 20, 12, 0, tzinfo=timezone.utc),
+        )
+    assert prefetcher._popularity.top(1)[0][0] == HotQuery(stop_ids=("a", "b"), route_id="Red", limit=10)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from transit_app.config.settings import Settings
+from transit_app.http.rate_limit import Priority, RateLimitExceeded, TokenBucketScheduler
+from transit_app.providers.mbta.client import MbtaV3Client
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_grants_burst_then_sheds_when_wait_budget_too_small():
+    clock = FakeClock()
+    sched = TokenBucketScheduler(rate_per_s=1, burst=2, max_wait_s=0, clock=clock, wall_clock=clock)
+
+    sched.acquire()
+    sched.acquire()
+    with pytest.raises(RateLimitExceeded):
+        sched.acquire()
+
+    clock.now += 1.0
+    sched.acquire()
+    assert sched.stats().granted == 3
+    assert sched.stats().shed == 1
+
+
+def test_background_requests_leave_reserve_for_interactive():
+    clock = FakeClock()
+    sched = TokenBucketScheduler(rate_per_s=1, burst=4, max_wait_s=0, background_reserve=0.5, clock=clock, wall_clock=clock)
+
+    # Background may only spend down to the reserve (2 of 4 tokens)
+    sched.acquire(Priority.BACKGROUND)
+    sched.acquire(Priority.BACKGROUND)
+    with pytest.raises(RateLimitExceeded, match="background"):
+        sched.acquire(Priority.BACKGROUND)
+
+    sched.acquire(Priority.INTERACTIVE)
+    sched.acquire(Priority.INTERACTIVE)
+
+
+def test_observed_headers_block_until_upstream_reset():
+    clock = FakeClock()
+    sched = TokenBucketScheduler(rate_per_s=100, burst=10, max_wait_s=0, clock=clock, wall_clock=clock)
+
+    sched.observe_headers({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(clock.now + 30)})
+    with pytest.raises(RateLimitExceeded):
+        sched.acquire()
+    assert sched.stats().blocked_for_s == pytest.approx(30)
+
+    clock.now += 30
+    sched.acquire()
+
+
+def test_async_acquire_waits_for_refill():
+    sched = TokenBucketScheduler(rate_per_s=50, burst=1, max_wait_s=1)
+
+    async def run():
+        await sched.acquire_async()
+        await sched.acquire_async()  # needs ~20ms of refill
+
+    asyncio.run(run())
+    assert sched.stats().granted == 2
+
+
+def test_mbta_client_spends_tokens_only_on_upstream_calls():
+    class Http:
+        def get_json(self, url, *, params=None, headers=None, timeout_s=10.0):
+            return {"data": []}
+
+    clock = FakeClock()
+    sched = TokenBucketScheduler(rate_per_s=1, burst=1, max_wait_s=0, clock=clock, wall_clock=clock)
+    client = MbtaV3Client(http=Http(), settings=Settings(), conditional_requests=False, scheduler=sched)
+
+    client.get_predictions(stop_id="place-davis")
+    with pytest.raises(RateLimitExceeded):
+        client.get_predictions(stop_id="place-harsq", priority=Priority.BACKGROUND)
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import os
+import threading
+import time
+
 from transit_app.repositories.reference import ReferenceRepository
 from transit_app.storage.base import BlobStorage
+from transit_app.storage.local import LocalBlobStorage
 
 
 class FakeStorage(BlobStorage):
@@ -36,3 +41,133 @@ def test_reference_repository_reads_routes():
     routes = repo.list_routes()
     assert routes[0].route_id == "Red"
     assert routes[0].route_long_name == "Red Line"
+
+
+class VersionedStorage(BlobStorage):
+    def __init__(self, mapping: dict[str, bytes]) -> None:
+        self.m = mapping
+        self.versions = {key: "v1" for key in mapping}
+        self.reads = 0
+
+    def read_bytes(self, key: str) -> bytes:
+        self.reads += 1
+        return self.m[key]
+
+    def version(self, key: str) -> str | None:
+        return self.versions.get(key)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+STOPS = b'[{"stop_id":"70061","stop_name":"Alewife","parent_station":"place-alfcl"},{"stop_id":"place-alfcl","stop_name":"Alewife"}]'
+
+
+def test_reference_repository_loads_once_and_indexes_by_id():
+    storage = VersionedStorage({"stops_min.json": STOPS, "routes_min.json": b'[{"route_id":"Red"}]'})
+    repo = ReferenceRepository(storage)
+
+    for _ in range(3):
+        assert repo.get_stop("70061").stop_name == "Alewife"
+        assert repo.get_route("Red").route_id == "Red"
+        assert len(repo.list_stops()) == 2
+    assert repo.get_stop("missing") is None
+    assert repo.parent_stations() == {"70061": "place-alfcl"}
+    assert storage.reads == 2
+
+
+def test_reference_repository_reloads_only_when_version_changes():
+    clock = FakeClock()
+    storage = VersionedStorage({"stops_min.json": STOPS, "routes_min.json": b"[]"})
+    repo = ReferenceRepository(storage, check_interval_s=60, clock=clock)
+    repo.list_stops()
+
+    clock.now += 61
+    repo.list_stops()
+    assert storage.reads == 1  # version checked, unchanged
+
+    storage.m["stops_min.json"] = b'[{"stop_id":"place-davis","stop_name":"Davis"}]'
+    storage.versions["stops_min.json"] = "v2"
+    assert repo.get_stop("place-davis") is None  # not re-checked within the interval
+    clock.now += 61
+    assert repo.get_stop("place-davis").stop_name == "Davis"
+    assert storage.reads == 2
+
+
+def test_reference_repository_without_versions_keeps_first_load_until_invalidated():
+    storage = FakeStorage({"stops_min.json": STOPS, "routes_min.json": b"[]"})
+    repo = ReferenceRepository(storage, check_interval_s=0)
+    assert len(repo.list_stops()) == 2
+
+    storage._m["stops_min.json"] = b"[]"
+    assert len(repo.list_stops()) == 2
+    repo.invalidate()
+    assert repo.list_stops() == []
+
+
+def test_concurrent_first_calls_share_one_load():
+    class SlowStorage(VersionedStorage):
+        def read_bytes(self, key: str) -> bytes:
+            time.sleep(0.05)
+            return super().read_bytes(key)
+
+    storage = SlowStorage({"stops_min.json": STOPS, "routes_min.json": b"[]"})
+    repo = ReferenceRepository(storage)
+    threads = [threading.Thread(target=repo.list_stops) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert storage.reads == 1
+
+
+def test_slow_version_check_does_not_block_lookups():
+    class SlowHeadStorage(VersionedStorage):
+        def __init__(self, mapping):
+            super().__init__(mapping)
+            self.in_check = threading.Event()
+            self.release = threading.Event()
+
+        def version(self, key):
+            if self.in_check.is_set() or key != "stops_min.json" or self.reads < 2:
+                return super().version(key)
+            self.in_check.set()
+            self.release.wait(timeout=5)
+            return "v2"
+
+    clock = FakeClock()
+    storage = SlowHeadStorage({"stops_min.json": STOPS, "routes_min.json": b'[{"route_id":"Red"}]'})
+    repo = ReferenceRepository(storage, check_interval_s=60, clock=clock)
+    repo.list_stops()
+    repo.list_routes()
+    clock.now += 61
+
+    checker = threading.Thread(target=repo.list_stops)
+    checker.start()
+    assert storage.in_check.wait(timeout=5)
+    # While the HEAD request hangs, other callers get the loaded indexes right away
+    started = time.monotonic()
+    assert repo.get_stop("70061").stop_name == "Alewife"
+    assert repo.get_route("Red").route_id == "Red"
+    assert time.monotonic() - started < 1
+    storage.release.set()
+    checker.join()
+    assert storage.reads == 3  # the changed version was reloaded
+
+
+def test_local_storage_version_follows_file_changes(tmp_path):
+    storage = LocalBlobStorage(tmp_path)
+    assert storage.version("stops_min.json") is None
+
+    path = tmp_path / "stops_min.json"
+    path.write_bytes(b"[]")
+    first = storage.version("stops_min.json")
+    path.write_bytes(b"[1]")
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+    assert storage.version("stops_min.json") not in (None, first)
@@ -32,3 +32,29 @@ def test_reliability_penalized_when_default_used():
     )
     assert report.score < 80
     assert any("conservative default" in r.lower() for r in report.reasons)
+
+
+def test_reliability_penalized_when_data_is_stale():
+    scorer = ReliabilityScorer()
+    fresh = scorer.score(headway_seconds=3 * 60, used_default_headway=False, had_destination_match=True)
+    stale = scorer.score(
+        headway_seconds=3 * 60,
+        used_default_headway=False,
+        had_destination_match=True,
+        stale_data_age_s=90.0,
+    )
+    assert stale.score < fresh.score
+    assert any("unavailable" in r.lower() for r in stale.reasons)
+
+
+def test_score_many_matches_single_scores():
+    scorer = ReliabilityScorer()
+    headways = [3 * 60, None, 16 * 60, 4 * 60]
+    defaults = [False, True, False, False]
+
+    many = scorer.score_many(headway_seconds=headways, used_default_headway=defaults)
+
+    assert many == [
+        scorer.score(headway_seconds=h, used_default_headway=d, had_destination_match=True)
+        for h, d in zip(headways, defaults)
+    ]
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+
+import pytest
+import requests
+
+from transit_app.config.settings import Settings
+from transit_app.http.requests_client import RETRY_STATUSES, AsyncRequestsHttpClient, RequestsHttpClient
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, payload: dict | None = None, text: str = "") -> None:
+        self.status_code = status_code
+        self._payload = payload
+        self.text = text
+        self.content = json.dumps(payload).encode() if payload is not None else text.encode()
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}")
+
+    def json(self):
+        if self._payload is None:
+            raise ValueError("no json")
+        return self._payload
+
+
+def test_requests_client_mounts_pooled_adapter_from_settings():
+    settings = Settings(http_pool_size=7, http_max_retries=4, http_backoff_s=0.5, http_backoff_jitter_s=0.1)
+    client = RequestsHttpClient(settings)
+
+    adapter = client._session.get_adapter("https://api-v3.mbta.com/predictions")
+    assert adapter._pool_maxsize == 7
+    assert adapter.max_retries.total == 4
+    assert adapter.max_retries.backoff_factor == 0.5
+    assert adapter.max_retries.backoff_jitter == 0.1
+    assert set(adapter.max_retries.status_forcelist) == set(RETRY_STATUSES)
+    assert "gzip" in client._session.headers["Accept-Encoding"]
+    client.close()
+
+
+def test_requests_client_reuses_one_session(monkeypatch):
+    client = RequestsHttpClient()
+    calls = []
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        calls.append(url)
+        return FakeResponse(200, {"data": []})
+
+    monkeypatch.setattr(client._session, "get", fake_get)
+
+    assert client.get_json("https://example.test/a") == {"data": []}
+    assert client.get_json("https://example.test/b") == {"data": []}
+    assert calls == ["https://example.test/a", "https://example.test/b"]
+
+
+def test_requests_client_raises_runtime_error_on_http_error(monkeypatch):
+    client = RequestsHttpClient()
+    monkeypatch.setattr(client._session, "get", lambda *a, **k: FakeResponse(429, text="slow down"))
+
+    with pytest.raises(RuntimeError, match="HTTP 429"):
+        client.get_json("https://example.test/a")
+
+
+def test_async_client_overlaps_blocking_calls():
+    barrier = threading.Barrier(2, timeout=2)
+
+    class BlockingHttp:
+        def get_json(self, url, *, params=None, headers=None, timeout_s=10.0):
+            # Both calls must be in flight at once to pass the barrier
+            barrier.wait()
+            return {"url": url}
+
+    client = AsyncRequestsHttpClient(BlockingHttp(), max_workers=2)
+
+    async def run():
+        return await asyncio.gather(client.get_json("a"), client.get_json("b"))
+
+    assert asyncio.run(run()) == [{"url": "a"}, {"url": "b"}]
+    client.close()
+
+
+def test_conditional_get_sends_validators_and_reports_304(monkeypatch):
+    client = RequestsHttpClient()
+    seen_headers = {}
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        seen_headers.update(headers)
+        resp = FakeResponse(304)
+        resp.headers = {"ETag": '"abc"'}
+        return resp
+
+    monkeypatch.setattr(client._session, "get", fake_get)
+
+    out = client.get_json_conditional("https://example.test/a", etag='"abc"', last_modified="Tue, 20 Jan 2026 12:00:00 GMT")
+    assert out.not_modified is True
+    assert out.data is None
+    assert out.etag == '"abc"'
+    assert seen_headers["If-None-Match"] == '"abc"'
+    assert seen_headers["If-Modified-Since"] == "Tue, 20 Jan 2026 12:00:00 GMT"
+
+
+def test_get_bytes_returns_raw_body_and_decodes_with_backend(monkeypatch):
+    class RecordingBackend:
+        name = "recording"
+
+        def __init__(self) -> None:
+            self.seen: list[bytes] = []
+
+        def loads(self, data):
+            self.seen.append(data)
+            return json.loads(data)
+
+    backend = RecordingBackend()
+    client = RequestsHttpClient(json=backend)
+    monkeypatch.setattr(client._session, "get", lambda *a, **k: FakeResponse(200, {"data": [1]}))
+
+    assert client.get_bytes("https://example.test/a") == b'{"data": [1]}'
+    assert client.get_json("https://example.test/a") == {"data": [1]}
+    assert backend.seen == [b'{"data": [1]}']
@@ -37,3 +37,16 @@ def test_s3_blob_storage_reads_bytes(monkeypatch):
     storage = S3BlobStorage(bucket="my-bucket", prefix="ref")
     data = storage.read_bytes("stops_min.json")
     assert data == b"abc"
+
+
+def test_s3_blob_storage_version_is_the_etag(monkeypatch):
+    import transit_app.storage.s3 as s3mod
+
+    class HeadClient:
+        def head_object(self, Bucket: str, Key: str):
+            assert (Bucket, Key) == ("my-bucket", "ref/stops_min.json")
+            return {"ETag": '"abc123"'}
+
+    monkeypatch.setattr(s3mod.boto3, "client", lambda service_name: HeadClient())
+
+    assert S3BlobStorage(bucket="my-bucket", prefix="ref").version("stops_min.json") == '"abc123"'
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from transit_app.config.settings import Settings
+from transit_app.container import build_container
+from transit_app.providers.mbta.client import MbtaV3Client
+from transit_app.providers.mbta.mapper import MbtaPayload
+from transit_app.providers.mbta.shared_cache import SharedPredictionCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingHttp:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def get_json(self, url, *, params=None, headers=None, timeout_s=10.0):
+        self.calls += 1
+        return {"data": [], "stop": params["filter[stop]"]}
+
+
+def test_entries_are_shared_between_cache_instances(tmp_path):
+    clock = FakeClock()
+    path = tmp_path / "cache.db"
+    worker_a = SharedPredictionCache(path, ttl_s=10, clock=clock)
+    worker_b = SharedPredictionCache(path, ttl_s=10, clock=clock)
+    loads = []
+
+    assert worker_a.get_or_load(("k",), lambda: loads.append(1) or {"data": [1]}) == {"data": [1]}
+    value = worker_b.get_or_load(("k",), lambda: loads.append(1) or {"data": [2]})
+
+    assert value == {"data": [1]}
+    assert isinstance(value, MbtaPayload)
+    assert len(loads) == 1
+    assert worker_b.stats().hits == 1
+
+
+def test_entry_expires_after_ttl_but_stays_available_as_stale(tmp_path):
+    clock = FakeClock()
+    cache = SharedPredictionCache(tmp_path / "cache.db", ttl_s=10, clock=clock)
+    cache.get_or_load(("k",), lambda: {"v": 1})
+
+    clock.now += 11
+    assert cache.get_or_load(("k",), lambda: {"v": 2}) == {"v": 2}
+    clock.now += 5
+    assert cache.get_stale(("k",)) == ({"v": 2}, 5.0)
+    assert cache.get_stale(("k",), max_age_s=1) is None
+
+
+def test_repeated_hits_reuse_the_decoded_payload(tmp_path):
+    cache = SharedPredictionCache(tmp_path / "cache.db", ttl_s=10, clock=FakeClock())
+    cache.put(("k",), {"data": []})
+    reader = SharedPredictionCache(tmp_path / "cache.db", ttl_s=10, clock=FakeClock())
+
+    first = reader.get_or_load(("k",), lambda: pytest.fail("should hit"))
+    assert reader.get_or_load(("k",), lambda: pytest.fail("should hit")) is first
+
+
+def test_put_ttl_overrides_cache_ttl(tmp_path):
+    clock = FakeClock()
+    cache = SharedPredictionCache(tmp_path / "cache.db", ttl_s=10, clock=clock)
+    cache.put(("k",), {"v": 1}, ttl_s=60)
+
+    clock.now += 30
+    assert cache.get_or_load(("k",), lambda: {"v": 2}) == {"v": 1}
+
+
+def test_waiting_worker_serves_stale_while_another_holds_the_lease(tmp_path):
+    clock = FakeClock()
+    path = tmp_path / "cache.db"
+    writer = SharedPredictionCache(path, ttl_s=10, clock=clock)
+    reader = SharedPredictionCache(path, ttl_s=10, clock=clock)
+    writer.put(("k",), {"v": "old"})
+    clock.now += 11
+
+    assert writer._claim(repr(("k",)))  # the writer is refreshing this key
+    value = reader.get_or_load(("k",), lambda: pytest.fail("lease is held"), serve_stale=lambda v, age: (v, age))
+    assert value == ({"v": "old"}, 11.0)
+
+
+def test_waiting_worker_skips_a_stale_copy_past_the_limit(tmp_path):
+    path = tmp_path / "cache.db"
+    writer = SharedPredictionCache(path, ttl_s=10, lease_s=0.05, poll_s=0.01)
+    reader = SharedPredictionCache(path, ttl_s=10, lease_s=0.05, poll_s=0.01)
+    writer.put(("k",), {"v": "old"})
+    with sqlite3.connect(path) as db:
+        db.execute("UPDATE entries SET stored_at = stored_at - 3 * 3600")
+
+    assert writer._claim(repr(("k",)))
+    value = reader.get_or_load(("k",), lambda: {"v": "new"}, serve_stale=lambda v, age: (v, age), stale_max_age_s=300)
+    assert value == {"v": "new"}
+
+
+def test_expired_lease_lets_another_worker_load(tmp_path):
+    path = tmp_path / "cache.db"
+    stuck = SharedPredictionCache(path, ttl_s=10, lease_s=0.05)
+    other = SharedPredictionCache(path, ttl_s=10, lease_s=0.05, poll_s=0.01)
+    assert stuck._claim(repr(("k",)))
+
+    assert other.get_or_load(("k",), lambda: {"v": 1}) == {"v": 1}
+
+
+def test_failed_load_releases_the_lease(tmp_path):
+    path = tmp_path / "cache.db"
+    a = SharedPredictionCache(path, ttl_s=10, lease_s=30)
+    b = SharedPredictionCache(path, ttl_s=10, lease_s=30)
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        a.get_or_load(("k",), boom)
+    assert b.get_or_load(("k",), lambda: {"v": 1}) == {"v": 1}
+
+
+def test_async_load_is_shared(tmp_path):
+    cache = SharedPredictionCache(tmp_path / "cache.db", ttl_s=10)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"v": calls}
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_load_async(("k",), loader) for _ in range(5)))
+
+    assert asyncio.run(main()) == [{"v": 1}] * 5
+    assert calls == 1
+
+
+def test_async_lease_and_writes_do_not_block_the_event_loop(tmp_path):
+    path = tmp_path / "cache.db"
+    cache = SharedPredictionCache(path, ttl_s=10, lease_s=0.2)
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")  # another process holds the write lock
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    async def loader():
+        return {"v": 1}
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        value = await cache.get_or_load_async(("k",), loader)
+        task.cancel()
+        return value
+
+    try:
+        assert asyncio.run(main()) == {"v": 1}
+    finally:
+        blocker.rollback()
+    assert ticks >= 10
+
+
+def test_async_reads_run_off_the_event_loop(tmp_path):
+    cache = SharedPredictionCache(tmp_path / "cache.db", ttl_s=10)
+    cache.put(("k",), {"v": 1})
+    read_threads = []
+    read = cache._read
+
+    def tracking_read(k):
+        read_threads.append(threading.get_ident())
+        return read(k)
+
+    cache._read = tracking_read
+
+    async def main():
+        return threading.get_ident(), await cache.get_or_load_async(("k",), pytest.fail)
+
+    loop_thread, value = asyncio.run(main())
+    assert value == {"v": 1}
+    assert read_threads and loop_thread not in read_threads
+
+
+def test_sqlite_errors_count_as_a_miss(tmp_path):
+    path = tmp_path / "cache.db"
+    cache = SharedPredictionCache(path, ttl_s=10)
+    with sqlite3.connect(path) as db:
+        db.execute("DROP TABLE entries")
+        db.execute("DROP TABLE leases")
+
+    async def loader():
+        return {"v": 2}
+
+    assert cache.get_or_load(("k",), lambda: {"v": 1}) == {"v": 1}
+    assert asyncio.run(cache.get_or_load_async(("j",), loader)) == {"v": 2}
+    assert cache.get_stale(("k",)) is None
+
+
+def test_hold_lease_keeps_one_holder_until_it_lapses(tmp_path):
+    clock = FakeClock()
+    path = tmp_path / "cache.db"
+    a = SharedPredictionCache(path, ttl_s=10, clock=clock)
+    b = SharedPredictionCache(path, ttl_s=10, clock=clock)
+
+    assert a.hold_lease("prefetch", 30)
+    assert not b.hold_lease("prefetch", 30)
+    clock.now += 20
+    assert a.hold_lease("prefetch", 30)  # renewed
+    clock.now += 20
+    assert not b.hold_lease("prefetch", 30)
+    clock.now += 11
+    assert b.hold_lease("prefetch", 30)
+    assert not a.hold_lease("prefetch", 30)
+
+
+def test_mbta_client_uses_shared_cache(tmp_path):
+    http = CountingHttp()
+    path = tmp_path / "cache.db"
+    worker_a = MbtaV3Client(
+        http=http, settings=Settings(), cache=SharedPredictionCache(path, ttl_s=60), conditional_requests=False
+    )
+    worker_b = MbtaV3Client(
+        http=http, settings=Settings(), cache=SharedPredictionCache(path, ttl_s=60), conditional_requests=False
+    )
+
+    worker_a.get_predictions(stop_id="place-davis", route_id="Red", limit=5)
+    worker_b.get_predictions(stop_id="place-davis", route_id="Red", limit=5)
+
+    assert http.calls == 1
+
+
+def test_container_builds_shared_cache_when_configured(tmp_path):
+    container = build_container(
+        Settings(reference_dir=str(tmp_path), prediction_cache_shared_path=str(tmp_path / "cache.db"))
+    )
+    assert isinstance(container.prediction_cache, SharedPredictionCache)
+    container.close()
+
+
+def _worker(path: str, log: str, start, results) -> None:
+    cache = SharedPredictionCache(path, ttl_s=60, poll_s=0.01)
+
+    def loader():
+        with open(log, "a") as f:
+            f.write(f"{os.getpid()}\n")
+        time.sleep(0.2)
+        return {"loaded_by": os.getpid()}
+
+    start.wait()
+    results.put(cache.get_or_load(("place-davis", "Red"), loader)["loaded_by"])
+
+
+def test_one_process_loads_for_all_workers(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    path, log = str(tmp_path / "cache.db"), str(tmp_path / "loads.log")
+    SharedPredictionCache(path, ttl_s=60)  # create the schema up front
+    start, results = ctx.Barrier(4), ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(path, log, start, results)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    loaded_by = [results.get(timeout=10) for _ in workers]
+    for w in workers:
+        w.join(timeout=10)
+
+    assert all(w.exitcode == 0 for w in workers)
+    with open(log) as f:
+        assert len(f.readlines()) == 1
+    assert len(set(loaded_by)) == 1